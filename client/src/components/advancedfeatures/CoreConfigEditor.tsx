@@ -58,7 +58,11 @@ const CoreConfigEditor: React.FC = () => {
     setIsRestarting(true);
     
     try {
-      const response = await fetch('/api/takserver/restart-takserver', { method: 'POST' });
+      // Saved changes only need the services their restart plan names
+      const pending = await fetch('/api/config-transactions/pending').then(res => res.json());
+      const response = pending.action !== 'none'
+        ? await fetch('/api/config-transactions/pending/apply', { method: 'POST' })
+        : await fetch('/api/takserver/restart-takserver', { method: 'POST' });
       
       if (!response.ok) {
         const data = await response.json();
@@ -124,12 +128,12 @@ const CoreConfigEditor: React.FC = () => {
         body: JSON.stringify({ content }),
       });
       
-      if (!response.ok) {
-        const errorData = await response.json();
-        showToast('Validation Error', errorData.detail || 'Invalid configuration', 'destructive');
+      const data = await response.json();
+      if (!response.ok || !data.valid) {
+        showToast('Validation Error', data.error || data.detail || 'Invalid configuration', 'destructive');
         return false;
       }
-      
+
       return true;
     } catch (error: unknown) {
       const errorMessage = error instanceof Error ? error.message : 'Unknown error occurred';
@@ -202,41 +206,71 @@ const CoreConfigEditor: React.FC = () => {
     }
     
     try {
-      // Save the configuration first - ensure the endpoint is correct
-      const response = await fetch('/api/advanced/core-config', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ content: xmlContent }),
-      });
-      
-      const data = await response.json();
-      if (response.ok) {
-        // Apply port changes if requested
+      // Stage the config and its port changes together so they are written as one commit
+      const openResponse = await fetch('/api/config-transactions', { method: 'POST' });
+      const transaction = await openResponse.json();
+      if (!openResponse.ok) {
+        throw new Error(transaction.detail || 'Failed to start configuration transaction');
+      }
+      const transactionUrl = `/api/config-transactions/${transaction.id}`;
+
+      try {
+        const stageResponse = await fetch(`${transactionUrl}/files/core-config`, {
+          method: 'PUT',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ content: xmlContent }),
+        });
+        if (!stageResponse.ok) {
+          const data = await stageResponse.json();
+          throw new Error(data.detail || 'Failed to stage configuration');
+        }
+
         if (applyPortChanges) {
-          try {
-            await portManager.applyChanges();
-            showToast(
-              'Success', 
-              'Configuration saved and port changes applied. Restart the server for changes to take effect.'
-            );
-          } catch (error) {
-            // If port changes fail, still notify about config save but mention port issue
-            showToast(
-              'Partial Success', 
-              'Configuration saved successfully, but failed to update docker port mappings.'
-            );
+          const portsResponse = await fetch(`${transactionUrl}/ports`, {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+              add: portConfirmDialog.portsToAdd.map(port => ({ host_port: port })),
+              remove: portConfirmDialog.portsToRemove.map(port => ({ host_port: port }))
+            }),
+          });
+          if (!portsResponse.ok) {
+            const data = await portsResponse.json();
+            throw new Error(data.detail || 'Failed to stage port changes');
           }
-        } else {
-          showToast('Success', 'Configuration saved successfully');
         }
-        
-        // Refresh the configuration after saving to ensure everything is in sync
-        await fetchConfig(false);
-      } else {
-        throw new Error(data.error || data.detail || 'Failed to save configuration');
+
+        const commitResponse = await fetch(`${transactionUrl}/commit`, {
+          method: 'POST',
+          headers: {
+            'Content-Type': 'application/json',
+          },
+          body: JSON.stringify({ apply: false }),
+        });
+        const data = await commitResponse.json();
+        if (!commitResponse.ok) {
+          const detail = typeof data.detail === 'string' ? data.detail : 'The configuration is invalid and cannot be saved.';
+          throw new Error(detail);
+        }
+
+        const pending = data.pending?.action && data.pending.action !== 'none';
+        showToast(
+          'Success',
+          `Configuration saved${applyPortChanges ? ' and port changes applied' : ''}.` +
+            (pending ? ' Restart the server for changes to take effect.' : '')
+        );
+      } catch (error) {
+        // Nothing was written; drop the staged changes
+        await fetch(transactionUrl, { method: 'DELETE' }).catch(() => undefined);
+        throw error;
       }
+
+      // Refresh the configuration after saving to ensure everything is in sync
+      await fetchConfig(false);
     } catch (error) {
       console.error('Error saving configuration:', error);
       showToast(
@@ -229,7 +229,47 @@ const ExistingCertificates: React.FC<ExistingCertificatesProps> = ({
       const certsToDownload = username ? [username] : Array.from(selectedCerts);
       setDownloadingCerts(new Set(certsToDownload));
 
-      for (const cert of certsToDownload) {
+      // Multiple certificates are streamed by the server as a single ZIP
+      if (certsToDownload.length > 1) {
+        try {
+          const response = await fetch('/api/certmanager/certificates/download', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({usernames: certsToDownload})
+          });
+
+          if (!response.ok) {
+            throw new Error(await response.text());
+          }
+
+          const blob = await response.blob();
+          const buffer = await blob.arrayBuffer();
+
+          if (window.pywebview) {
+            const filePath = await window.pywebview.api.save_file_dialog(
+              'certificates.zip',
+              [['ZIP Files', 'zip'], ['All Files', '*']]
+            );
+            if (filePath) {
+              await window.pywebview.api.write_binary_file(filePath, new Uint8Array(buffer));
+            }
+          } else {
+            const url = window.URL.createObjectURL(new Blob([buffer], {type: 'application/zip'}));
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = 'certificates.zip';
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+            window.URL.revokeObjectURL(url);
+          }
+        } catch (error) {
+          console.error('Batch download failed:', error);
+        }
+        setDownloadingCerts(new Set());
+      }
+
+      for (const cert of certsToDownload.length > 1 ? [] : certsToDownload) {
         try {
           // Fetch certificate data first
           const response = await fetch('/api/certmanager/certificates/download', {
@@ -4,6 +4,7 @@ import { Badge } from '@/components/shared/ui/shadcn/badge';
 import { Skeleton } from '@/components/shared/ui/shadcn/skeleton';
 import { ArrowDownToLine, ArrowUpFromLine } from 'lucide-react';
 import { useTakServer } from '@/components/shared/ui/shadcn/sidebar/app-sidebar';
+import { LiveSource, openLiveSource } from '@/lib/liveChannel';
 
 interface ConnectedClient {
   callsign: string;
@@ -25,6 +26,54 @@ interface ConnectedClientsResponse {
   timestamp?: number;
 }
 
+// Stream events: a compact roster snapshot, then deltas keyed by clientUid
+interface RosterSnapshotEvent {
+  type: 'snapshot';
+  status: 'success';
+  seq: number;
+  fields: (keyof ConnectedClient)[];
+  rows: unknown[][];
+}
+
+interface RosterDeltaEvent {
+  type: 'delta';
+  status: 'success';
+  seq: number;
+  added: ConnectedClient[];
+  removed: string[];
+  updated: { clientUid: string; changes: Partial<ConnectedClient> }[];
+}
+
+interface RosterErrorEvent {
+  type: 'error';
+  status: 'error';
+  message: string;
+  code: string;
+}
+
+type RosterEvent = RosterSnapshotEvent | RosterDeltaEvent | RosterErrorEvent;
+
+const rowsToClients = (fields: (keyof ConnectedClient)[], rows: unknown[][]): ConnectedClient[] =>
+  rows.map((row) => {
+    const client = {} as Record<string, unknown>;
+    fields.forEach((field, index) => {
+      client[field] = row[index];
+    });
+    return client as unknown as ConnectedClient;
+  });
+
+const applyDelta = (clients: ConnectedClient[], delta: RosterDeltaEvent): ConnectedClient[] => {
+  const removed = new Set(delta.removed);
+  const changes = new Map(delta.updated.map((update) => [update.clientUid, update.changes]));
+  const next = clients
+    .filter((client) => !removed.has(client.clientUid))
+    .map((client) => {
+      const change = changes.get(client.clientUid);
+      return change ? { ...client, ...change } : client;
+    });
+  return next.concat(delta.added);
+};
+
 // Session storage key
 const STORAGE_KEY = 'connected_clients_data';
 
@@ -46,7 +95,9 @@ export const ConnectedClientsCard: React.FC = () => {
   
   const [loading, setLoading] = useState<boolean>(takServerActive && clients.length === 0);
   const [error, setError] = useState<string | null>(null);
-  const eventSourceRef = useRef<EventSource | null>(null);
+  const eventSourceRef = useRef<LiveSource | null>(null);
+  // Sequence number of the last applied snapshot/delta; null until a snapshot arrives
+  const seqRef = useRef<number | null>(null);
 
   // Save to sessionStorage whenever clients change
   useEffect(() => {
@@ -83,19 +134,11 @@ export const ConnectedClientsCard: React.FC = () => {
     
     // Cleanup function
     return () => {
+      // Monitoring stops on the server with its last subscriber
       if (eventSourceRef.current) {
         eventSourceRef.current.close();
         eventSourceRef.current = null;
       }
-      
-      // Only send stop request if server is active
-      if (takServerActive) {
-        fetch('/api/takserver-api/connected-clients-stream/stop', {
-          method: 'POST'
-        }).catch(error => {
-          console.error('Error stopping client monitoring:', error);
-        });
-      }
     };
   }, [takServerActive, serverState.isInstalled, serverState.isRunning]);
 
@@ -148,17 +191,29 @@ export const ConnectedClientsCard: React.FC = () => {
       eventSourceRef.current.close();
     }
 
-    // Create a new EventSource connection
-    const eventSource = new EventSource('/api/takserver-api/connected-clients-stream');
+    // Subscribe on the shared live channel
+    const eventSource = openLiveSource('connected-clients');
     eventSourceRef.current = eventSource;
+    seqRef.current = null;
 
     // Handle connected_clients events
     eventSource.addEventListener('connected_clients', (event) => {
       try {
-        const data: ConnectedClientsResponse = JSON.parse(event.data);
+        const data: RosterEvent = JSON.parse(event.data);
         
-        if (data.status === 'success') {
-          setClients(data.clients || []);
+        if (data.type === 'snapshot') {
+          seqRef.current = data.seq;
+          setClients(rowsToClients(data.fields, data.rows));
+          setError(null);
+          setLoading(false);
+        } else if (data.type === 'delta') {
+          // A gap means a missed delta: wait for the next snapshot
+          if (seqRef.current === null || data.seq !== seqRef.current + 1) {
+            seqRef.current = null;
+            return;
+          }
+          seqRef.current = data.seq;
+          setClients(prev => applyDelta(prev, data));
           setError(null);
           setLoading(false);
         } else {
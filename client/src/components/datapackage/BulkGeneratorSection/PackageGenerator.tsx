@@ -319,99 +319,89 @@ const BulkGeneratorSection: React.FC<BulkGeneratorSectionProps> = ({
           });
         }
       } else {
-        // Handle existing client cert package generation
-        let successCount = 0;
+        // Handle existing client cert package generation in a single bulk job
         const totalCerts = selectedCerts.length;
+        const streamCount = parseInt(preferences.count?.value || "1");
+        const fullTakServerConfig: Record<string, string> = { count: streamCount.toString() };
+
+        for (let i = 0; i < streamCount; i++) {
+          fullTakServerConfig[`description${i}`] = preferences[`description${i}`]?.value || "";
+          fullTakServerConfig[`ipAddress${i}`] = preferences[`ipAddress${i}`]?.value || "";
+          fullTakServerConfig[`port${i}`] = preferences[`port${i}`]?.value || "";
+          fullTakServerConfig[`protocol${i}`] = preferences[`protocol${i}`]?.value || "";
+          fullTakServerConfig[`caLocation${i}`] = preferences[`caLocation${i}`]?.value || "";
+          fullTakServerConfig[`certPassword${i}`] = preferences[`certPassword${i}`]?.value || "";
+        }
 
-        for (const cert of selectedCerts) {
-          try {
-            const streamCount = parseInt(preferences.count?.value || "1");
-            const fullTakServerConfig: Record<string, string> = { count: streamCount.toString() };
-
-            for (let i = 0; i < streamCount; i++) {
-              fullTakServerConfig[`description${i}`] = preferences[`description${i}`]?.value || "";
-              fullTakServerConfig[`ipAddress${i}`] = preferences[`ipAddress${i}`]?.value || "";
-              fullTakServerConfig[`port${i}`] = preferences[`port${i}`]?.value || "";
-              fullTakServerConfig[`protocol${i}`] = preferences[`protocol${i}`]?.value || "";
-              fullTakServerConfig[`caLocation${i}`] = preferences[`caLocation${i}`]?.value || "";
-              fullTakServerConfig[`certPassword${i}`] = preferences[`certPassword${i}`]?.value || "";
-            }
+        const atakPreferences = Object.entries(preferences).reduce((acc, [key, pref]) => {
+          if (pref.enabled && pref.value && 
+              !key.startsWith('description') && !key.startsWith('ipAddress') && 
+              !key.startsWith('port') && !key.startsWith('protocol') && 
+              !key.startsWith('caLocation') && !key.startsWith('certPassword') &&
+              !key.startsWith('count') && key !== 'customFiles') {
+            acc[key] = pref.value;
+          }
+          return acc;
+        }, {} as Record<string, any>);
 
-            const atakPreferences = Object.entries(preferences).reduce((acc, [key, pref]) => {
-              if (pref.enabled && pref.value && 
-                  !key.startsWith('description') && !key.startsWith('ipAddress') && 
-                  !key.startsWith('port') && !key.startsWith('protocol') && 
-                  !key.startsWith('caLocation') && !key.startsWith('certPassword') &&
-                  !key.startsWith('count') && key !== 'customFiles') {
-                acc[key] = pref.value;
-              }
-              return acc;
-            }, {} as Record<string, any>);
-
-            // Get the list of enabled custom files
-            let customFiles: string[] = [];
-            if (preferences.customFiles?.enabled && preferences.customFiles?.value) {
-              try {
-                console.log('[PackageGenerator] Raw custom files value:', preferences.customFiles.value);
-                customFiles = JSON.parse(preferences.customFiles.value);
-                if (!Array.isArray(customFiles)) {
-                  console.warn('[PackageGenerator] Custom files not an array, resetting to empty array');
-                  customFiles = [];
-                }
-                console.log('[PackageGenerator] Parsed custom files:', customFiles);
-              } catch (e) {
-                console.error('[PackageGenerator] Failed to parse custom files:', e);
-              }
-            } else {
-              console.log('[PackageGenerator] No custom files to process:', {
-                enabled: preferences.customFiles?.enabled,
-                hasValue: !!preferences.customFiles?.value
-              });
+        // Get the list of enabled custom files
+        let customFiles: string[] = [];
+        if (preferences.customFiles?.enabled && preferences.customFiles?.value) {
+          try {
+            customFiles = JSON.parse(preferences.customFiles.value);
+            if (!Array.isArray(customFiles)) {
+              console.warn('[PackageGenerator] Custom files not an array, resetting to empty array');
+              customFiles = [];
             }
+          } catch (e) {
+            console.error('[PackageGenerator] Failed to parse custom files:', e);
+          }
+        }
 
-            const requestBody = {
-              takServerConfig: fullTakServerConfig,
-              atakPreferences,
-              clientCert: cert.value,
-              zipFileName: bulkFileNames[cert.value] || cert.label,
-              customFiles,
-              enrollment: false
-            };
-            console.log('[PackageGenerator] Sending request:', requestBody);
-
-            const response = await fetch('/api/datapackage/generate', {
-              method: 'POST',
-              headers: {
-                'Content-Type': 'application/json',
-              },
-              body: JSON.stringify(requestBody)
-            });
+        const requestBody = {
+          takServerConfig: fullTakServerConfig,
+          atakPreferences,
+          packages: selectedCerts.map(cert => ({
+            clientCert: cert.value,
+            zipFileName: bulkFileNames[cert.value] || cert.label
+          })),
+          customFiles
+        };
 
-            if (!response.ok) {
-              const errorData = await response.json();
-              throw new Error(errorData.detail || 'Failed to generate package');
-            }
+        try {
+          const response = await fetch('/api/datapackage/generate-bulk', {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(requestBody)
+          });
 
-            const data = await response.json();
-            if (!data.success) {
-              throw new Error(data.message || 'Failed to generate package');
-            }
+          const data = await response.json();
+          if (!response.ok) {
+            throw new Error(data.detail || 'Failed to generate packages');
+          }
 
-            successCount++;
-          } catch (error) {
+          for (const result of data.results.filter((r: { success: boolean }) => !r.success)) {
             toast({
               variant: "destructive",
-              title: `Generation Failed for ${cert.label}`,
-              description: error instanceof Error ? error.message : 'Failed to generate package'
+              title: `Generation Failed for ${result.clientCert}`,
+              description: result.error || 'Failed to generate package'
             });
           }
-        }
 
-        if (successCount > 0) {
+          if (data.succeeded > 0) {
+            toast({
+              variant: "success",
+              title: "Packages Generated",
+              description: `Successfully created ${data.succeeded} of ${totalCerts} package${totalCerts > 1 ? 's' : ''}`
+            });
+          }
+        } catch (error) {
           toast({
-            variant: "success",
-            title: "Packages Generated",
-            description: `Successfully created ${successCount} of ${totalCerts} package${totalCerts > 1 ? 's' : ''}`
+            variant: "destructive",
+            title: "Generation Failed",
+            description: error instanceof Error ? error.message : 'Failed to generate packages'
           });
         }
       }
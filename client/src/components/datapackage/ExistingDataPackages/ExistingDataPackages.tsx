@@ -150,10 +150,19 @@ const ExistingDataPackages: React.FC<ExistingDataPackagesProps> = ({
       const packagesToDownload = filename ? [filename] : Array.from(selectedPackages);
       setDownloadingPackages(new Set(packagesToDownload));
 
+      // Several packages are fetched as a single streamed archive
+      const downloads = packagesToDownload.length > 1
+        ? [{
+            name: 'datapackages.zip',
+            url: `/api/datapackage/download-archive?${packagesToDownload.map(p => `files=${encodeURIComponent(p)}`).join('&')}`,
+            packages: packagesToDownload
+          }]
+        : packagesToDownload.map(p => ({ name: p, url: `/api/datapackage/download/${p}`, packages: [p] }));
+
       let successCount = 0;
-      for (const pkg of packagesToDownload) {
+      for (const { name: pkg, url: downloadUrl, packages: included } of downloads) {
         try {
-          const response = await fetch(`/api/datapackage/download/${pkg}`);
+          const response = await fetch(downloadUrl);
           
           if (!response.ok) {
             const errorData = await response.json();
@@ -171,10 +180,10 @@ const ExistingDataPackages: React.FC<ExistingDataPackagesProps> = ({
 
             if (filePath) {
               await window.pywebview.api.write_binary_file(filePath, new Uint8Array(buffer));
-              successCount++;
-              setDownloadSuccess(prev => ({ ...prev, [pkg]: true }));
+              successCount += included.length;
+              setDownloadSuccess(prev => ({ ...prev, ...Object.fromEntries(included.map(p => [p, true])) }));
               setTimeout(() => {
-                setDownloadSuccess(prev => ({ ...prev, [pkg]: false }));
+                setDownloadSuccess(prev => ({ ...prev, ...Object.fromEntries(included.map(p => [p, false])) }));
               }, 1000);
             }
           } else {
@@ -186,7 +195,7 @@ const ExistingDataPackages: React.FC<ExistingDataPackagesProps> = ({
             link.click();
             document.body.removeChild(link);
             window.URL.revokeObjectURL(url);
-            successCount++;
+            successCount += included.length;
           }
         } catch (error) {
           const errorMessage = error instanceof Error ? error.message : `Failed to download ${pkg}`;
@@ -198,7 +207,7 @@ const ExistingDataPackages: React.FC<ExistingDataPackagesProps> = ({
         } finally {
           setDownloadingPackages(prev => {
             const next = new Set(prev);
-            next.delete(pkg);
+            included.forEach(p => next.delete(p));
             return next;
           });
         }
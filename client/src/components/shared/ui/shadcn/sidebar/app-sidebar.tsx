@@ -22,6 +22,7 @@ import {
   SidebarFooter,
   SidebarHeader,
 } from "@/components/shared/ui/shadcn/sidebar/sidebar"
+import { openLiveSource } from "@/lib/liveChannel"
 
 interface ServerState {
   isInstalled: boolean;
@@ -110,7 +111,7 @@ export function TakServerProvider({ children }: { children: React.ReactNode }) {
     fetchStatus();
 
     // Setup SSE with reconnection logic
-    const serverStatus = new EventSource('/api/takserver/server-status-stream');
+    const serverStatus = openLiveSource('server-status');
 
     // Handle connection open
     serverStatus.onopen = () => {
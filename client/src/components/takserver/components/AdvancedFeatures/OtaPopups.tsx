@@ -10,6 +10,7 @@ import {
 } from "../../../shared/ui/shadcn/dialog";
 import { Progress } from "../../../shared/ui/shadcn/progress";
 import { ScrollArea } from "../../../shared/ui/shadcn/scroll-area";
+import { openLiveSource } from "@/lib/liveChannel";
 
 interface TerminalLine {
   message: string;
@@ -61,7 +62,7 @@ const OtaPopups: React.FC<OtaPopupsProps> = ({
     setShowConfigureComplete(false);
     setIsConfigurationComplete(false);
 
-    const configureStatus = new EventSource('/api/ota/status-stream');
+    const configureStatus = openLiveSource('ota-status');
     configureStatus.addEventListener('ota-status', (event) => {
       try {
         const data = JSON.parse(event.data);
@@ -111,7 +112,7 @@ const OtaPopups: React.FC<OtaPopupsProps> = ({
     setShowUpdateComplete(false);
     setIsUpdateComplete(false);
 
-    const updateStatus = new EventSource('/api/ota/status-stream');
+    const updateStatus = openLiveSource('ota-status');
     updateStatus.addEventListener('ota-status', (event) => {
       try {
         const data = JSON.parse(event.data);
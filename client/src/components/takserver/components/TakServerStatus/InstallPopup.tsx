@@ -3,6 +3,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription, Di
 import { Progress } from '../../../shared/ui/shadcn/progress';
 import { ScrollArea } from '../../../shared/ui/shadcn/scroll-area';
 import { Button } from '../../../shared/ui/shadcn/button';
+import { openLiveSource } from '@/lib/liveChannel';
 
 interface TerminalLine {
   message: string;
@@ -44,7 +45,7 @@ const InstallPopup: React.FC<InstallPopupProps> = ({
         setUploadCompleted(false);
       }
 
-      const installStatus = new EventSource('/api/takserver/install-status-stream');
+      const installStatus = openLiveSource('install-status');
       
       const handleInstallStatus = (event: MessageEvent) => {
         try {
@@ -3,6 +3,7 @@ import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogDescription, Di
 import { Progress } from '../../../shared/ui/shadcn/progress';
 import { ScrollArea } from '../../../shared/ui/shadcn/scroll-area';
 import { Button } from '../../../shared/ui/shadcn/button';
+import { openLiveSource } from '@/lib/liveChannel';
 
 interface TerminalLine {
   message: string;
@@ -40,7 +41,7 @@ const UninstallPopups: React.FC<UninstallPopupsProps> = ({
       setUninstallError(undefined);
       setIsUninstallationComplete(false);
 
-      const uninstallStatus = new EventSource('/api/takserver/uninstall-status-stream');
+      const uninstallStatus = openLiveSource('uninstall-status');
       
       const handleUninstallStatus = (event: MessageEvent) => {
         try {
@@ -0,0 +1,181 @@
+// One shared EventSource for every live feed in the app.
+//
+// The server multiplexes all subscribed topics over /api/live and sends
+// them in per-tick "batch" events. LiveSource mirrors the parts of the
+// EventSource API the components use, so a call site only swaps
+// `new EventSource(url)` for `openLiveSource(topic)`.
+
+type Listener = (event: MessageEvent) => void;
+
+interface LiveEntry {
+  topic: string;
+  event: string;
+  id: number;
+  data: unknown;
+}
+
+const LIVE_URL = '/api/live';
+
+class LiveChannel {
+  private source: EventSource | null = null;
+  private sessionId: string | null = null;
+  private sessionTopics = new Set<string>();
+  private subscribers = new Map<string, Set<LiveSource>>();
+  private pending: Promise<void> = Promise.resolve();
+
+  add(live: LiveSource) {
+    let sources = this.subscribers.get(live.topic);
+    if (!sources) {
+      sources = new Set();
+      this.subscribers.set(live.topic, sources);
+    }
+    sources.add(live);
+    if (this.source && this.source.readyState === EventSource.OPEN) {
+      // The shared connection is already up; signal it the way a new EventSource would
+      window.setTimeout(() => live.onopen?.(new Event('open')), 0);
+    }
+    this.connect();
+  }
+
+  remove(live: LiveSource) {
+    const sources = this.subscribers.get(live.topic);
+    if (!sources) return;
+    sources.delete(live);
+    if (sources.size === 0) {
+      this.subscribers.delete(live.topic);
+    }
+    if (this.subscribers.size === 0) {
+      this.source?.close();
+      this.source = null;
+      this.sessionId = null;
+      this.sessionTopics.clear();
+      return;
+    }
+    this.sync();
+  }
+
+  private connect() {
+    if (this.source && this.source.readyState !== EventSource.CLOSED) {
+      this.sync();
+      return;
+    }
+    const topics = Array.from(this.subscribers.keys());
+    const source = new EventSource(`${LIVE_URL}?topics=${encodeURIComponent(topics.join(','))}`);
+    this.source = source;
+
+    source.addEventListener('session', (event) => {
+      const session = JSON.parse((event as MessageEvent).data);
+      this.sessionId = session.session;
+      this.sessionTopics = new Set(session.topics);
+      // Topics may have changed while the browser was reconnecting
+      this.sync();
+    });
+
+    source.addEventListener('batch', (event) => {
+      const entries: LiveEntry[] = JSON.parse((event as MessageEvent).data);
+      entries.forEach((entry) => {
+        const sources = this.subscribers.get(entry.topic);
+        if (!sources || sources.size === 0) return;
+        const message = new MessageEvent(entry.event, {
+          data: JSON.stringify(entry.data),
+          lastEventId: String(entry.id)
+        });
+        sources.forEach((live) => live.dispatch(message));
+      });
+    });
+
+    source.onopen = (event) => {
+      this.forEachSource((live) => live.onopen?.(event));
+    };
+
+    source.onerror = (event) => {
+      this.sessionId = null;
+      this.forEachSource((live) => live.dispatchError(event));
+      if (source.readyState === EventSource.CLOSED && this.source === source) {
+        this.source = null;
+      }
+    };
+  }
+
+  private sync() {
+    const sessionId = this.sessionId;
+    if (!sessionId) return;
+    const wanted = new Set(this.subscribers.keys());
+    const subscribe = Array.from(wanted).filter((topic) => !this.sessionTopics.has(topic));
+    const unsubscribe = Array.from(this.sessionTopics).filter((topic) => !wanted.has(topic));
+    if (subscribe.length === 0 && unsubscribe.length === 0) return;
+    this.sessionTopics = wanted;
+
+    // Keep updates in order so a quick subscribe/unsubscribe pair cannot race
+    this.pending = this.pending.then(async () => {
+      try {
+        const response = await fetch(`${LIVE_URL}/${sessionId}`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ subscribe, unsubscribe })
+        });
+        if (!response.ok) {
+          throw new Error(`Live session update failed: ${response.status}`);
+        }
+      } catch (error) {
+        console.error('Failed to update live channel topics:', error);
+        // Start over with a fresh session carrying the full topic list
+        this.source?.close();
+        this.source = null;
+        this.sessionId = null;
+        if (this.subscribers.size > 0) this.connect();
+      }
+    });
+  }
+
+  private forEachSource(callback: (live: LiveSource) => void) {
+    this.subscribers.forEach((sources) => sources.forEach(callback));
+  }
+}
+
+const channel = new LiveChannel();
+
+export class LiveSource {
+  readonly topic: string;
+  onopen: ((event: Event) => void) | null = null;
+  onerror: ((event: Event) => void) | null = null;
+  private listeners = new Map<string, Set<Listener>>();
+  private closed = false;
+
+  constructor(topic: string) {
+    this.topic = topic;
+    channel.add(this);
+  }
+
+  addEventListener(type: string, listener: Listener) {
+    let listeners = this.listeners.get(type);
+    if (!listeners) {
+      listeners = new Set();
+      this.listeners.set(type, listeners);
+    }
+    listeners.add(listener);
+  }
+
+  removeEventListener(type: string, listener: Listener) {
+    this.listeners.get(type)?.delete(listener);
+  }
+
+  close() {
+    if (this.closed) return;
+    this.closed = true;
+    channel.remove(this);
+  }
+
+  dispatch(event: MessageEvent) {
+    this.listeners.get(event.type)?.forEach((listener) => listener(event));
+  }
+
+  dispatchError(event: Event) {
+    this.onerror?.(event);
+    this.listeners.get('error')?.forEach((listener) => listener(event as MessageEvent));
+  }
+}
+
+export function openLiveSource(topic: string): LiveSource {
+  return new LiveSource(topic);
+}
@@ -4,6 +4,7 @@ import { AnalyticsChart } from '../components/shared/ui/shadcn/charts/AnalyticsC
 import { Card, CardContent, CardHeader, CardTitle, CardDescription } from '../components/shared/ui/shadcn/card/card';
 import { ConnectedClientsCard } from '../components/dashboard/ConnectedClientsCard';
 import { useTakServer } from '../components/shared/ui/shadcn/sidebar/app-sidebar';
+import { LiveSource, openLiveSource } from '@/lib/liveChannel';
 
 interface SystemMetrics {
   totalCpu: number;
@@ -105,8 +106,8 @@ export const Dashboard: React.FC = () => {
 
   // Initialize SSE connections
   useEffect(() => {
-    let metricsEventSource: EventSource | null = null;
-    let dockerEventSource: EventSource | null = null;
+    let metricsEventSource: LiveSource | null = null;
+    let dockerEventSource: LiveSource | null = null;
 
     const setupSSEConnections = async () => {
       try {
@@ -148,7 +149,7 @@ export const Dashboard: React.FC = () => {
         metricsEventSource.close();
       }
 
-      metricsEventSource = new EventSource('/api/dashboard/monitoring/metrics-stream');
+      metricsEventSource = openLiveSource('system-metrics');
       
       metricsEventSource.addEventListener('system-metrics', (event) => {
         try {
@@ -186,7 +187,7 @@ export const Dashboard: React.FC = () => {
         dockerEventSource.close();
       }
 
-      dockerEventSource = new EventSource('/api/docker-manager/containers/status-stream');
+      dockerEventSource = openLiveSource('docker-status');
       
       dockerEventSource.addEventListener('docker_status', (event) => {
         try {
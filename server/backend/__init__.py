@@ -1,9 +1,8 @@
 # backend/__init__.py
 import os
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
 from backend.config.logging_config import configure_logging
+from backend.services.helpers.file_server import StaticBuildIndex
 from starlette.middleware.base import BaseHTTPMiddleware
 
 # Define middleware for large file uploads
@@ -14,19 +13,23 @@ class LargeRequestMiddleware(BaseHTTPMiddleware):
         response = await call_next(request)
         return response
 
-# Import routers (equivalent to blueprints)
-from backend.routes.dashboard_routes import dashboard
-from backend.routes.docker_manager_routes import dockermanager
-from backend.routes.data_package_route import datapackage
-from backend.routes.data_package_manager_routes import datapackage_manager
-from backend.routes.takserver_routes import takserver
-from backend.routes.ota_routes import ota
-from backend.routes.certmanager_routes import certmanager
-from backend.routes.advanced_features_routes import advanced_features
-from backend.routes.port_manager_routes import portmanager
-from backend.routes.takserver_api_routes import takserver_api
-
 def create_app():
+    # Import routers (equivalent to blueprints) here rather than at module level:
+    # process pool workers import backend.services modules and must not build
+    # every router and its service singletons along the way
+    from backend.routes.dashboard_routes import dashboard
+    from backend.routes.docker_manager_routes import dockermanager
+    from backend.routes.data_package_route import datapackage
+    from backend.routes.data_package_manager_routes import datapackage_manager
+    from backend.routes.takserver_routes import takserver
+    from backend.routes.ota_routes import ota
+    from backend.routes.certmanager_routes import certmanager
+    from backend.routes.advanced_features_routes import advanced_features
+    from backend.routes.port_manager_routes import portmanager
+    from backend.routes.takserver_api_routes import takserver_api
+    from backend.routes.live_routes import live
+    from backend.routes.config_transaction_routes import configtransactions
+
     # Set up logging
     logger = configure_logging(__name__)
     logger.info("Creating FastAPI application")
@@ -59,28 +62,38 @@ def create_app():
     app.include_router(advanced_features, prefix='/api/advanced')
     app.include_router(portmanager, prefix='/api/port-manager')
     app.include_router(takserver_api, prefix='/api/takserver-api')
+    app.include_router(live, prefix='/api/live')
+    app.include_router(configtransactions, prefix='/api/config-transactions')
     
     # Only serve static files in production mode AFTER API routes
     if not is_dev:
         client_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "client"))
         build_dir = os.path.join(client_dir, 'build')
-        app.mount("/static", StaticFiles(directory=build_dir), name="static")
+        static_index = StaticBuildIndex(build_dir)
         
         @app.get('/')
-        async def serve_root():
-            return FileResponse(os.path.join(build_dir, 'index.html'))
+        async def serve_root(request: Request):
+            return static_index.respond(request, static_index.get('index.html'))
         
         @app.get('/{full_path:path}')
-        async def serve_react(full_path: str):
+        async def serve_react(request: Request, full_path: str):
             # Don't intercept API routes
             if full_path.startswith('api/'):
                 raise HTTPException(status_code=404, detail="API route not found")
             
-            file_path = os.path.join(build_dir, full_path)
-            if os.path.exists(file_path) and os.path.isfile(file_path):
-                return FileResponse(file_path)
-            logger.debug(f"File not found: {file_path}")  # Changed from error to debug level
-            return FileResponse(os.path.join(build_dir, 'index.html'))
+            # The build is indexed once at startup, so lookups never touch the disk
+            asset = static_index.get(full_path)
+            if asset is None and full_path.startswith('static/'):
+                # What the old /static mount of the build directory served
+                asset = static_index.get(full_path[len('static/'):])
+            if asset is None:
+                logger.debug(f"File not found: {full_path}")  # Changed from error to debug level
+                if full_path.startswith(static_index.immutable_prefixes):
+                    # A missing bundle (e.g. an old hash after a redeploy) must not come back as HTML
+                    raise HTTPException(status_code=404, detail="File not found")
+                # Anything else is a client-side route
+                asset = static_index.get('index.html')
+            return static_index.respond(request, asset)
 
     logger.info(f"FastAPI application created in {'development' if is_dev else 'production'} mode")
     return app
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from ..services.scripts.takserver.core_config import CoreConfigManager
+from ..services.scripts.takserver.core_config import CoreConfigManager, CURRENT_CONFIG
+from ..services.helpers.xml_schema import format_errors
 from ..services.scripts.system.log_manager import LogManager
 from sse_starlette.sse import EventSourceResponse
-import os
 from backend.config.logging_config import configure_logging
 
 # Setup logging
@@ -71,7 +72,7 @@ async def update_core_config(xml_content: XMLContent):
             
         logger.info("Updating CoreConfig.xml")
         # Validate and write the config
-        if core_config_manager.write_config(xml_content.content):
+        if await run_in_threadpool(core_config_manager.write_config, xml_content.content):
             logger.info("CoreConfig.xml updated successfully")
             return {"message": "Configuration updated successfully"}
         logger.error("Failed to update CoreConfig.xml")
@@ -89,9 +90,12 @@ async def validate_config(xml_content: XMLContent):
             raise HTTPException(status_code=400, detail="No content provided")
             
         logger.debug("Validating XML content")
-        if core_config_manager.validate_xml(xml_content.content):
-            logger.debug("XML content is valid")
-            return {"valid": True}
+        errors = await run_in_threadpool(core_config_manager.check_xml, xml_content.content)
+        if errors:
+            logger.debug(f"XML content has {len(errors)} validation errors")
+            return {"valid": False, "error": format_errors(errors), "errors": errors}
+        logger.debug("XML content is valid")
+        return {"valid": True}
     except Exception as e:
         logger.warning(f"XML validation failed: {str(e)}")
         return {"valid": False, "error": str(e)}
@@ -102,7 +106,7 @@ async def get_backups():
     try:
         logger.debug("Getting list of CoreConfig backups")
         backups = core_config_manager.get_backups()
-        return {"backups": backups}
+        return {"backups": backups, "usage": core_config_manager.backup_store.usage()}
     except Exception as e:
         logger.error(f"Error getting CoreConfig backups: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -124,7 +128,7 @@ async def restore_backup(backup: BackupRestore):
     """Restore from a backup"""
     try:
         logger.info(f"Restoring CoreConfig from backup: {backup.backup_id}")
-        if core_config_manager.restore_backup(backup.backup_id):
+        if await run_in_threadpool(core_config_manager.restore_backup, backup.backup_id):
             logger.info("CoreConfig restored successfully")
             return {"message": "Configuration restored successfully"}
         logger.error(f"Failed to restore CoreConfig from backup: {backup.backup_id}")
@@ -147,19 +151,30 @@ async def delete_backup(backup_id: str):
         logger.error(f"Error deleting CoreConfig backup: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@advanced_features.get("/core-config/backups/diff")
+async def diff_backups(from_id: str, to_id: str = CURRENT_CONFIG):
+    """Structural diff between two backups; to_id defaults to the live configuration"""
+    for backup_id in (from_id, to_id):
+        if backup_id != CURRENT_CONFIG and not core_config_manager.backup_store.has(backup_id):
+            raise HTTPException(status_code=404, detail=f"Backup not found: {backup_id}")
+    try:
+        logger.debug(f"Diffing CoreConfig {from_id} against {to_id}")
+        changes = await run_in_threadpool(core_config_manager.diff_backups, from_id, to_id)
+        return {"from": from_id, "to": to_id, "changes": changes}
+    except Exception as e:
+        logger.error(f"Error diffing CoreConfig backups: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @advanced_features.get("/core-config/backups/{backup_id}/content")
 async def get_backup_content(backup_id: str):
     """Get the content of a specific backup"""
+    if not core_config_manager.backup_store.has(backup_id):
+        logger.warning(f"CoreConfig backup not found: {backup_id}")
+        raise HTTPException(status_code=404, detail="Backup not found")
     try:
         logger.debug(f"Getting content of CoreConfig backup: {backup_id}")
-        backup_path = os.path.join(core_config_manager.backups_dir, backup_id)
-        if not os.path.exists(backup_path):
-            logger.warning(f"CoreConfig backup not found: {backup_id}")
-            raise HTTPException(status_code=404, detail="Backup not found")
-            
-        with open(backup_path, 'r') as file:
-            content = file.read()
+        content = await run_in_threadpool(core_config_manager.get_backup_content, backup_id)
         return {"content": content}
     except Exception as e:
         logger.error(f"Error getting CoreConfig backup content: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,12 +1,17 @@
 # ============================================================================
 # Imports
 # ============================================================================
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse, JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Dict, Any
+import hashlib
 from backend.services.scripts.cert_manager.certmanager import CertManager
 from backend.services.scripts.cert_manager.cert_xml_editor import CertConfigManager
+from backend.services.scripts.cert_manager.cert_inventory import CertInventory
+from backend.services.helpers.zip_stream import stream_files_as_zip
+from backend.services.helpers.file_server import serve_file, etag_matches
 from backend.config.logging_config import configure_logging
 
 # Configure logger
@@ -18,6 +23,7 @@ logger = configure_logging(__name__)
 certmanager = APIRouter()
 cert_manager = CertManager()
 cert_config_manager = CertConfigManager()
+cert_inventory = CertInventory()
 
 # ============================================================================
 # Pydantic Models
@@ -58,20 +64,67 @@ class CertConfigRequest(BaseModel):
 class PasswordHashRequest(BaseModel):
     password: str
 
+class GroupMembershipChange(BaseModel):
+    identifier: str
+    groups: Optional[List[str]] = None
+    add: List[str] = Field(default_factory=list)
+    remove: List[str] = Field(default_factory=list)
+
+class BulkGroupRequest(BaseModel):
+    changes: List[GroupMembershipChange]
+    dry_run: bool = False
+
 # ============================================================================
 # Routes
 # ============================================================================
 @certmanager.get('/certificates')
-async def get_certificates():
-    """Get all registered certificates"""
+async def get_certificates(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    sort: str = Query('identifier', pattern='^(identifier|role)$'),
+    order: str = Query('asc', pattern='^(asc|desc)$'),
+    group: Optional[str] = None,
+    role: Optional[str] = None,
+    prefix: Optional[str] = None
+):
+    """Get registered certificates, optionally paged, sorted and filtered.
+
+    Without a limit every matching certificate is returned. Responses carry
+    an ETag derived from the auth file version and the query, so unchanged
+    pages are answered with 304 Not Modified.
+    """
     try:
-        certificates = await cert_manager.get_registered_certificates()
-        return {
-            'success': True,
-            'certificates': certificates
-        }
+        def make_etag(version: str) -> str:
+            return '"' + hashlib.sha1(f"{version}?{request.url.query}".encode()).hexdigest() + '"'
+
+        document = await run_in_threadpool(cert_manager.get_user_document)
+        etag = make_etag(document.version)
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+        page = await cert_manager.get_certificates_page(
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            order=order,
+            group=group,
+            role=role,
+            prefix=prefix
+        )
+        return JSONResponse(
+            {
+                'success': True,
+                'certificates': page['certificates'],
+                'total': page['total'],
+                'nextCursor': page['nextCursor']
+            },
+            headers={'ETag': make_etag(page['version']), 'Cache-Control': 'no-cache'}
+        )
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error retrieving certificates: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -146,7 +199,7 @@ async def delete_certificates(data: DeleteRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 @certmanager.post('/certificates/download')
-async def download_certificates(data: DownloadRequest):
+async def download_certificates(request: Request, data: DownloadRequest):
     """Download certificates - supports both browser and pywebview"""
     try:
         if not data.usernames:
@@ -158,29 +211,29 @@ async def download_certificates(data: DownloadRequest):
             if not result.get('success'):
                 raise HTTPException(status_code=404, detail=result.get('message', "Certificate not found"))
             
-            # Return as bytes directly
-            return StreamingResponse(
-                iter([result['data']]),  # Keep as bytes iterator
-                media_type='application/octet-stream',
-                headers={'Content-Disposition': f'attachment; filename="{result["filename"]}"'}
+            # Served straight from the certs directory with ETag and Range support
+            return serve_file(
+                request,
+                result['path'],
+                filename=result['filename'],
+                media_type='application/octet-stream'
             )
 
-        # Handle batch downloads
+        # Handle batch downloads - stream all certificates into one ZIP
         result = await cert_manager.download_batch(data.usernames)
         if not result.get('success'):
             raise HTTPException(status_code=404, detail=result.get('message'))
-        
-        # Return first successful certificate
-        for cert_result in result.get('results', []):
-            if cert_result.get('status') == 'completed' and cert_result.get('data'):
-                return StreamingResponse(
-                    iter([cert_result['data']]),
-                    media_type='application/octet-stream',
-                    headers={
-                        'Content-Disposition': f'attachment; filename="{cert_result["filename"]}"'
-                    }
-                )
-        raise HTTPException(status_code=404, detail="No certificates were successfully downloaded")
+
+        headers = {'Content-Disposition': f'attachment; filename="{result["filename"]}"'}
+        if result.get('missing'):
+            headers['X-Missing-Certificates'] = ','.join(result['missing'])
+
+        # p12 files are already compressed, so store them as-is
+        return StreamingResponse(
+            stream_files_as_zip(result['files']),
+            media_type='application/zip',
+            headers=headers
+        )
 
     except HTTPException:
         raise
@@ -229,4 +282,79 @@ async def generate_password_hash(request: PasswordHashRequest):
         return {"success": True, "hash": hashed}
     except Exception as e:
         logger.error(f"Password hash generation error: {str(e)}")
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
+
+@certmanager.post("/certificates/groups/bulk")
+async def bulk_update_groups(request: BulkGroupRequest) -> Dict[str, Any]:
+    """Apply group membership changes for many users in a single file rewrite"""
+    if not request.changes:
+        raise HTTPException(status_code=400, detail="Changes list is empty")
+    try:
+        result = await run_in_threadpool(
+            cert_config_manager.bulk_update_groups,
+            [change.model_dump() for change in request.changes],
+            request.dry_run
+        )
+        return {"success": True, **result}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error applying bulk group changes: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Certificate Inventory Routes
+@certmanager.on_event("shutdown")
+async def stop_cert_inventory():
+    cert_inventory.stop()
+
+@certmanager.get("/inventory")
+async def get_inventory_summary() -> Dict[str, Any]:
+    """Get certificate counts, expiry totals and users missing certificates"""
+    try:
+        return {"success": True, "summary": await cert_inventory.summary()}
+    except Exception as e:
+        logger.error(f"Error reading certificate inventory: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@certmanager.get("/inventory/expiring")
+async def get_expiring_certificates(
+    days: int = Query(30, ge=0),
+    include_expired: bool = False
+) -> Dict[str, Any]:
+    """Get certificates expiring within the given number of days, soonest first"""
+    try:
+        certificates = await cert_inventory.expiring_within(days, include_expired=include_expired)
+        return {"success": True, "certificates": certificates}
+    except Exception as e:
+        logger.error(f"Error querying expiring certificates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@certmanager.get("/inventory/users-without-certs")
+async def get_users_without_certs() -> Dict[str, Any]:
+    """Get registered certificate users whose certificate file is missing"""
+    try:
+        return {"success": True, "users": await cert_inventory.users_without_certs()}
+    except Exception as e:
+        logger.error(f"Error querying users without certificates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@certmanager.get("/inventory/unregistered-certs")
+async def get_unregistered_certs() -> Dict[str, Any]:
+    """Get certificate files that no registered user references"""
+    try:
+        return {"success": True, "certificates": await cert_inventory.certs_without_users()}
+    except Exception as e:
+        logger.error(f"Error querying unregistered certificates: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@certmanager.get("/inventory/{identifier}")
+async def get_certificate_details(identifier: str) -> Dict[str, Any]:
+    """Get parsed certificate metadata for a single identifier"""
+    try:
+        certificate = await cert_inventory.get_certificate(identifier)
+    except Exception as e:
+        logger.error(f"Error reading certificate details: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+    if certificate is None:
+        raise HTTPException(status_code=404, detail=f"Certificate {identifier} not found")
+    return {"success": True, "certificate": certificate}
@@ -0,0 +1,184 @@
+# backend/routes/config_transaction_routes.py
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from backend.services.scripts.takserver.config_transaction import (
+    config_transactions, ConfigTransaction, TransactionConflict, TARGETS,
+    ACTION_NONE, ACTION_RECREATE
+)
+from backend.services.scripts.takserver.check_status import TakServerStatus
+from backend.services.scripts.takserver.server_state import get_server_state
+from backend.routes.takserver_routes import operation_context
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Router setup
+configtransactions = APIRouter()
+
+# Request Models
+class StagedFileRequest(BaseModel):
+    content: str
+
+class PortMapping(BaseModel):
+    host_port: int
+    container_port: Optional[int] = None
+
+    def mapping(self) -> str:
+        return f"{self.host_port}:{self.container_port or self.host_port}"
+
+class StagedPortsRequest(BaseModel):
+    add: List[PortMapping] = []
+    remove: List[PortMapping] = []
+
+class CommitRequest(BaseModel):
+    apply: bool = True
+
+def _transaction(transaction_id: str) -> ConfigTransaction:
+    try:
+        return config_transactions.get(transaction_id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def _check_target(target: str) -> None:
+    if target not in TARGETS:
+        raise HTTPException(status_code=400, detail=f"Unknown configuration file: {target}")
+
+async def apply_restart_plan(plan: Dict[str, Any]) -> bool:
+    """Carry out a restart plan; False when nothing had to run or the server is stopped."""
+    if plan["action"] == ACTION_NONE or not get_server_state().snapshot()["isRunning"]:
+        return False
+    status_checker = TakServerStatus()
+    if plan["action"] == ACTION_RECREATE:
+        await status_checker.recreate_services(plan["services"] or None, remove_orphans=plan["removeOrphans"])
+    else:
+        await status_checker.restart_services(plan["services"])
+    return True
+
+@configtransactions.post('')
+async def open_transaction():
+    """Start a configuration transaction"""
+    return config_transactions.open().summary()
+
+@configtransactions.get('/pending')
+async def get_pending_restart():
+    """Restart still needed by commits that did not apply their plan"""
+    return config_transactions.pending()
+
+@configtransactions.post('/pending/apply')
+async def apply_pending_restart():
+    """Apply every deferred restart at once"""
+    try:
+        async with operation_context():
+            plan = config_transactions.take_pending()
+            try:
+                applied = await apply_restart_plan(plan)
+            except Exception:
+                # Keep it pending so the restart can be retried
+                config_transactions.defer(plan)
+                raise
+        return {"plan": plan, "applied": applied}
+    except Exception as e:
+        logger.error(f"Failed to apply pending restart: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@configtransactions.get('/{transaction_id}')
+async def get_transaction(transaction_id: str):
+    """Staged files, their validation result and the restart the commit would need"""
+    transaction = _transaction(transaction_id)
+    try:
+        validation = await run_in_threadpool(transaction.validate)
+        plan = await run_in_threadpool(transaction.plan) if validation["valid"] else None
+        return {**transaction.summary(), "validation": validation, "plan": plan}
+    except Exception as e:
+        logger.error(f"Failed to inspect transaction {transaction_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@configtransactions.get('/{transaction_id}/files/{target}')
+async def get_staged_file(transaction_id: str, target: str):
+    """Staged content of a file, or its content on disk when not staged"""
+    transaction = _transaction(transaction_id)
+    _check_target(target)
+    try:
+        content = await run_in_threadpool(transaction.current, target)
+        return {"target": target, "staged": target in transaction.staged, "content": content}
+    except Exception as e:
+        logger.error(f"Failed to read {target} for transaction {transaction_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@configtransactions.put('/{transaction_id}/files/{target}')
+async def stage_file(transaction_id: str, target: str, request: StagedFileRequest):
+    """Stage the full new content of a configuration file"""
+    transaction = _transaction(transaction_id)
+    _check_target(target)
+    try:
+        await run_in_threadpool(transaction.stage, target, request.content)
+        return transaction.summary()
+    except Exception as e:
+        logger.error(f"Failed to stage {target} for transaction {transaction_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@configtransactions.delete('/{transaction_id}/files/{target}')
+async def unstage_file(transaction_id: str, target: str):
+    """Drop a staged file from the transaction"""
+    transaction = _transaction(transaction_id)
+    _check_target(target)
+    transaction.unstage(target)
+    return transaction.summary()
+
+@configtransactions.post('/{transaction_id}/ports')
+async def stage_ports(transaction_id: str, request: StagedPortsRequest):
+    """Stage takserver port mapping changes in docker-compose.yml"""
+    transaction = _transaction(transaction_id)
+    try:
+        await run_in_threadpool(
+            transaction.stage_ports,
+            [port.mapping() for port in request.add],
+            [port.mapping() for port in request.remove]
+        )
+        return transaction.summary()
+    except Exception as e:
+        logger.error(f"Failed to stage port changes for transaction {transaction_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@configtransactions.post('/{transaction_id}/commit')
+async def commit_transaction(transaction_id: str, request: CommitRequest = CommitRequest()):
+    """Validate and write all staged files at once, then run the smallest restart they need.
+
+    Returns:
+        - 200: {files, warnings, plan: {action, services, removeOrphans, reasons}, applied[, restartError][, pending]}
+        - 400: validation errors per file
+        - 409: a staged file was changed on disk after it was staged
+    """
+    transaction = _transaction(transaction_id)
+    try:
+        async with operation_context():
+            result = await run_in_threadpool(transaction.commit)
+            config_transactions.close(transaction_id)
+            result["applied"] = False
+            if request.apply:
+                try:
+                    result["applied"] = await apply_restart_plan(result["plan"])
+                except Exception as e:
+                    # The files are committed either way; report the restart separately
+                    logger.error(f"Restart after transaction {transaction_id} failed: {str(e)}")
+                    result["restartError"] = str(e)
+            if not result["applied"]:
+                result["pending"] = config_transactions.defer(result["plan"])
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=e.args[0])
+    except TransactionConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Failed to commit transaction {transaction_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@configtransactions.delete('/{transaction_id}')
+async def discard_transaction(transaction_id: str):
+    """Discard a transaction and everything staged in it"""
+    _transaction(transaction_id)
+    config_transactions.close(transaction_id)
+    return {"id": transaction_id, "discarded": True}
@@ -1,28 +1,59 @@
 # backend/routes/dashboard_routes.py
 
-from fastapi import APIRouter, HTTPException
-from sse_starlette.sse import EventSourceResponse
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
 from ..services.scripts.system.system_monitor import SystemMonitor
+from backend.services.helpers.event_bus import event_bus
+from backend.services.helpers.live_hub import live_hub
+from backend.services.helpers.probe_scheduler import Probe, probe_scheduler
 from backend.config.logging_config import configure_logging
 
 logger = configure_logging(__name__)
 
 dashboard = APIRouter()
 
-# Global state for SSE events
-_latest_metrics: dict = {}
+system_monitor = SystemMonitor()
 
-def emit_metrics_event(data: dict):
-    """Update latest metrics state"""
-    global _latest_metrics
-    _latest_metrics = data
+METRICS_TOPIC = 'system-metrics'
+METRICS_MIN_INTERVAL = 2
+METRICS_MAX_INTERVAL = 10
 
-system_monitor = SystemMonitor(emit_event=emit_metrics_event)
+async def poll_metrics():
+    """Metrics probe; parked by the scheduler while nobody is watching."""
+    try:
+        metrics = await asyncio.to_thread(system_monitor.get_system_metrics)
+        return metrics or None
+    except Exception as e:
+        logger.error(f"Error generating metrics: {str(e)}")
+        return {"error": str(e)}
+
+def metrics_key(metrics: dict):
+    """Treat readings within a percent / megabyte of the last as unchanged."""
+    if "error" in metrics:
+        return metrics["error"]
+    network = metrics.get("network", {})
+    return (
+        round(metrics.get("totalCpu", 0)),
+        round(metrics.get("totalMemory", 0)),
+        round(network.get("upload", 0)),
+        round(network.get("download", 0))
+    )
+
+probe_scheduler.register(Probe(
+    METRICS_TOPIC,
+    poll_metrics,
+    min_interval=METRICS_MIN_INTERVAL,
+    max_interval=METRICS_MAX_INTERVAL,
+    on_result=lambda metrics: event_bus.publish_nowait(METRICS_TOPIC, metrics),
+    wanted=lambda: live_hub.has_viewers(METRICS_TOPIC),
+    key=metrics_key
+))
+live_hub.register(METRICS_TOPIC, 'system-metrics', probe=METRICS_TOPIC)
 
 @dashboard.get('/monitoring/metrics-stream')
-async def metrics_stream():
+async def metrics_stream(request: Request):
     """SSE endpoint for system metrics."""
-    return EventSourceResponse(system_monitor.metrics_generator())
+    return live_hub.topic_response(METRICS_TOPIC, request)
 
 @dashboard.post('/monitoring/start')
 async def start_all_monitoring():
@@ -1,10 +1,17 @@
 # backend/routes/data_package_manager_routes.py
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
-from typing import List
+import os
+import re
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool
+from datetime import datetime
+from typing import List, Optional
 from pydantic import BaseModel
 from backend.services.scripts.data_package_config.data_package_manager import DataPackageManager
+from backend.services.helpers.zip_stream import StoredZipArchive
+from backend.services.helpers.file_server import serve_file
 from backend.config.logging_config import configure_logging
 
 logger = configure_logging(__name__)
@@ -17,30 +24,58 @@ package_manager = DataPackageManager()
 class DeleteRequest(BaseModel):
     filenames: List[str]
 
+@datapackage_manager.on_event("startup")
+async def reconcile_package_catalog():
+    """Pick up packages added or removed while the server was down"""
+    try:
+        await package_manager.reconcile()
+    except Exception as e:
+        logger.error(f"Package catalog reconcile failed: {str(e)}")
+
 @datapackage_manager.get('/list')
-async def list_packages():
-    """Get all available data packages"""
+async def list_packages(
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    sort: str = Query('createdAt', pattern='^(createdAt|fileName|size)$'),
+    order: str = Query('desc', pattern='^(asc|desc)$'),
+    search: Optional[str] = None,
+    certificate: Optional[str] = None,
+    customFile: Optional[str] = None,
+    createdAfter: Optional[datetime] = None,
+    createdBefore: Optional[datetime] = None
+):
+    """Get data packages, newest first; pass limit to page with nextCursor"""
     try:
-        packages = await package_manager.get_packages()
+        page = await package_manager.get_packages(
+            cursor=cursor,
+            limit=limit,
+            sort=sort,
+            order=order,
+            search=search,
+            certificate=certificate,
+            custom_file=customFile,
+            created_after=createdAfter,
+            created_before=createdBefore
+        )
         return {
             'success': True,
-            'packages': packages
+            'packages': page['packages'],
+            'total': page['total'],
+            'nextCursor': page['nextCursor']
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         error_message = str(e)
         logger.error(f"Error getting packages: {error_message}")
         raise HTTPException(status_code=500, detail=error_message)
 
 @datapackage_manager.get('/download/{filename}')
-async def download_package(filename: str):
+async def download_package(request: Request, filename: str):
     """Download a specific data package"""
     try:
         file_path = package_manager.get_package_path(filename)
-        return FileResponse(
-            file_path,
-            filename=filename,
-            media_type='application/zip'
-        )
+        return serve_file(request, file_path, filename=filename, media_type='application/zip')
     except FileNotFoundError as e:
         logger.error(f"Package not found: {filename}")
         raise HTTPException(status_code=404, detail=str(e))
@@ -49,6 +84,74 @@ async def download_package(filename: str):
         logger.error(f"Error downloading package {filename}: {error_msg}")
         raise HTTPException(status_code=500, detail=error_msg)
 
+def _parse_range(header: str, size: int):
+    """Parse a single 'bytes=' range into inclusive (start, end), or None when unsatisfiable."""
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return None
+    return start, end
+
+@datapackage_manager.get('/download-archive')
+async def download_packages_archive(request: Request, files: List[str] = Query(...)):
+    """Stream several packages as one uncompressed ZIP, resumable with HTTP Range"""
+    try:
+        # Repeated names would give the archive duplicate entries; packages are looked up by basename
+        files = list(dict.fromkeys(os.path.basename(f) for f in files))
+        file_paths = await package_manager.download_batch(files)
+        archive = await asyncio.to_thread(
+            StoredZipArchive, [(path, os.path.basename(path)) for path in file_paths]
+        )
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error preparing package archive: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'ETag': archive.etag,
+        'Content-Disposition': 'attachment; filename="datapackages.zip"'
+    }
+    start, end = 0, archive.size - 1
+    status_code = 200
+
+    range_header = request.headers.get('range')
+    if_range = request.headers.get('if-range')
+    if range_header and (not if_range or if_range == archive.etag):
+        byte_range = _parse_range(range_header, archive.size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, 'Content-Range': f'bytes */{archive.size}'})
+        start, end = byte_range
+        status_code = 206
+        headers['Content-Range'] = f'bytes {start}-{end}/{archive.size}'
+    headers['Content-Length'] = str(end - start + 1)
+
+    async def stream():
+        chunks = archive.iter_range(start, end)
+        try:
+            async for chunk in iterate_in_threadpool(chunks):
+                yield chunk
+        except asyncio.CancelledError:
+            logger.info(f"Package archive download from byte {start} ended by client disconnect")
+            raise
+        finally:
+            # Worker threads are not abandoned on cancel, so the generator is idle here
+            chunks.close()
+
+    return StreamingResponse(stream(), status_code=status_code, headers=headers, media_type='application/zip')
+
 @datapackage_manager.delete('/delete/{filename}')
 async def delete_package(filename: str):
     """Delete a specific data package"""
@@ -76,18 +179,3 @@ async def delete_packages(request: DeleteRequest):
         error_message = str(e)
         logger.error(f"Error deleting packages: {error_message}")
         raise HTTPException(status_code=500, detail=error_message)
-
-@datapackage_manager.post('/download')
-async def download_packages(request: DeleteRequest):
-    """Download multiple data packages"""
-    try:
-        file_paths = await package_manager.download_batch(request.filenames)
-        return {
-            'success': True,
-            'file_paths': file_paths,
-            'message': f'Ready to download {len(file_paths)} packages'
-        }
-    except Exception as e:
-        error_message = str(e)
-        logger.error(f"Error downloading packages: {error_message}")
-        raise HTTPException(status_code=500, detail=error_message) 
\ No newline at end of file
@@ -1,17 +1,29 @@
 # backend/routes/data_package_route.py
 
 from fastapi import APIRouter, HTTPException, Request, File, UploadFile
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, ValidationError, Field
 from typing import Dict, Any, List, Optional
-from backend.services.scripts.data_package_config.data_package import DataPackage
+from backend.services.scripts.data_package_config.data_package import DataPackage, CLIENT_CERT_TOKEN
 from backend.config.logging_config import configure_logging
+from backend.services.helpers.event_bus import event_bus
+from backend.services.helpers.live_hub import live_hub
+import os
 import json
+import asyncio
 
 logger = configure_logging(__name__)
 
 # Router setup
 datapackage = APIRouter()
 
+# Event bus topic for bulk generation progress
+BULK_TOPIC = 'bulk-generation'
+
+live_hub.register(BULK_TOPIC, 'bulk-generation')
+
+# Only one bulk job runs at a time; each already uses every worker it can
+_bulk_lock = asyncio.Lock()
+
 # Pydantic Models
 class TakServerConfig(BaseModel):
     count: str
@@ -30,6 +42,57 @@ class DataPackageRequest(BaseModel):
     customFiles: List[str]  # List of filenames to include
     enrollment: Optional[bool] = False  # Add enrollment flag with default False
 
+class BulkPackageTarget(BaseModel):
+    clientCert: str
+    zipFileName: Optional[str] = None  # Defaults to the certificate name
+
+class BulkDataPackageRequest(BaseModel):
+    takServerConfig: TakServerConfig
+    atakPreferences: Dict[str, Any]
+    packages: List[BulkPackageTarget] = Field(..., min_length=1)
+    customFiles: List[str]
+
+class CustomFileLinkRequest(BaseModel):
+    filename: str
+    sha256: str = Field(..., pattern=r'^[0-9a-fA-F]{64}$')
+
+def build_preferences(raw_config: Dict[str, Any], atak_preferences: Dict[str, Any], zip_file_name: str,
+                      custom_files: List[str], client_cert: Optional[str], enrollment: bool) -> Dict[str, Any]:
+    """Flatten a request's stream config and ATAK preferences into DataPackage input"""
+    preferences = {
+        'count': raw_config['count'],
+    }
+
+    # Add configuration for each stream
+    stream_count = int(raw_config['count'])
+    for i in range(stream_count):
+        preferences[f'description{i}'] = raw_config.get(f'description{i}', '')
+        preferences[f'ipAddress{i}'] = raw_config.get(f'ipAddress{i}', '')
+        preferences[f'port{i}'] = raw_config.get(f'port{i}', '')
+        preferences[f'protocol{i}'] = raw_config.get(f'protocol{i}', '')
+        preferences[f'caLocation{i}'] = raw_config.get(f'caLocation{i}', '')
+        preferences[f'certPassword{i}'] = raw_config.get(f'certPassword{i}', '')
+
+        # Only add client cert if not in enrollment mode
+        if not enrollment and client_cert:
+            preferences[f'certificateLocation{i}'] = client_cert
+            preferences[f'clientPassword{i}'] = raw_config.get(f'certPassword{i}', '')
+
+        preferences[f'caPassword{i}'] = raw_config.get(f'certPassword{i}', '')
+
+    # Special fields for file naming
+    preferences['#zip_file_name'] = zip_file_name
+
+    # Add ATAK preferences
+    preferences.update(atak_preferences)
+
+    # Add custom files list
+    preferences['customFiles'] = custom_files
+
+    # Add enrollment flag
+    preferences['enrollment'] = enrollment
+    return preferences
+
 @datapackage.post('/generate')
 async def generate_package(request: Request, data: DataPackageRequest):
     """Generate a data package with the given preferences"""
@@ -42,39 +105,14 @@ async def generate_package(request: Request, data: DataPackageRequest):
         data_package = DataPackage()
         
         # Prepare preferences for package generation
-        preferences = {
-            'count': data.takServerConfig.count,
-        }
-
-        # Add configuration for each stream
-        stream_count = int(data.takServerConfig.count)
-        for i in range(stream_count):
-            raw_config = raw_data['takServerConfig']
-            preferences[f'description{i}'] = raw_config.get(f'description{i}', '')
-            preferences[f'ipAddress{i}'] = raw_config.get(f'ipAddress{i}', '')
-            preferences[f'port{i}'] = raw_config.get(f'port{i}', '')
-            preferences[f'protocol{i}'] = raw_config.get(f'protocol{i}', '')
-            preferences[f'caLocation{i}'] = raw_config.get(f'caLocation{i}', '')
-            preferences[f'certPassword{i}'] = raw_config.get(f'certPassword{i}', '')
-            
-            # Only add client cert if not in enrollment mode
-            if not data.enrollment and data.clientCert:
-                preferences[f'certificateLocation{i}'] = data.clientCert
-                preferences[f'clientPassword{i}'] = raw_config.get(f'certPassword{i}', '')
-            
-            preferences[f'caPassword{i}'] = raw_config.get(f'certPassword{i}', '')
-
-        # Special fields for file naming
-        preferences['#zip_file_name'] = data.zipFileName
-        
-        # Add ATAK preferences
-        preferences.update(data.atakPreferences)
-
-        # Add custom files list
-        preferences['customFiles'] = data.customFiles
-
-        # Add enrollment flag
-        preferences['enrollment'] = data.enrollment
+        preferences = build_preferences(
+            raw_data['takServerConfig'],
+            data.atakPreferences,
+            data.zipFileName,
+            data.customFiles,
+            data.clientCert,
+            data.enrollment
+        )
 
         # Execute package generation
         result = await data_package.main(preferences)
@@ -97,6 +135,51 @@ async def generate_package(request: Request, data: DataPackageRequest):
         logger.error(f"[generate_package] Unhandled error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@datapackage.get('/bulk-status-stream')
+async def bulk_status_stream(request: Request):
+    """SSE endpoint for bulk package generation progress."""
+    return event_bus.sse_response(BULK_TOPIC, "bulk-generation", request)
+
+@datapackage.post('/generate-bulk')
+async def generate_bulk_packages(request: Request, data: BulkDataPackageRequest):
+    """Generate one data package per client certificate from a shared template"""
+    if _bulk_lock.locked():
+        raise HTTPException(status_code=409, detail="A bulk generation job is already running")
+
+    async with _bulk_lock:
+        try:
+            raw_data = await request.json()
+            preferences = build_preferences(
+                raw_data['takServerConfig'],
+                data.atakPreferences,
+                'bulk',
+                data.customFiles,
+                CLIENT_CERT_TOKEN,
+                False
+            )
+            packages = [
+                (target.clientCert, target.zipFileName or os.path.splitext(os.path.basename(target.clientCert))[0])
+                for target in data.packages
+            ]
+
+            result = await DataPackage().generate_bulk(preferences, packages, emit=event_bus.publisher(BULK_TOPIC))
+            return {
+                'success': result['failed'] == 0,
+                'message': f"Generated {result['succeeded']} of {result['total']} packages",
+                **result
+            }
+
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"[generate_bulk_packages] Unhandled error: {str(e)}")
+            await event_bus.publish(BULK_TOPIC, {
+                'status': 'error',
+                'message': str(e),
+                'isInProgress': False
+            })
+            raise HTTPException(status_code=500, detail=str(e))
+
 @datapackage.get('/certificate-files')
 async def get_certificate_files():
     """Get available certificate files"""
@@ -130,14 +213,49 @@ async def upload_custom_file(file: UploadFile = File(...)):
         data_package = DataPackage()
         
         # Save the file
-        await data_package.save_custom_file(file)
+        entry = await data_package.save_custom_file(file)
         
         logger.info(f"Custom file saved successfully: {file.filename}")
-        return {'success': True, 'filename': file.filename, 'message': 'File uploaded successfully'}
+        return {
+            'success': True,
+            'filename': entry['name'],
+            'sha256': entry['sha256'],
+            'deduplicated': entry['deduplicated'],
+            'message': 'File uploaded successfully'
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"[upload_custom_file] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@datapackage.post('/custom-files/link')
+async def link_custom_file(data: CustomFileLinkRequest):
+    """Register a custom file by content hash, skipping the upload if the content is already stored"""
+    try:
+        data_package = DataPackage()
+        entry = await data_package.link_custom_file(data.filename, data.sha256)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="Content not stored; upload the file instead")
+        return {'success': True, 'filename': entry['name'], 'sha256': entry['sha256'], 'deduplicated': True}
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"[link_custom_file] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@datapackage.get('/custom-files/usage')
+async def get_custom_files_usage():
+    """Report logical versus stored size of the custom files"""
+    try:
+        data_package = DataPackage()
+        return {'success': True, **data_package.custom_files_usage()}
+    except Exception as e:
+        logger.error(f"[get_custom_files_usage] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @datapackage.delete('/custom-files/{filename}')
 async def delete_custom_file(filename: str):
     """Delete a custom file from the server"""
@@ -145,6 +263,8 @@ async def delete_custom_file(filename: str):
         data_package = DataPackage()
         await data_package.delete_custom_file(filename)
         return {'success': True}
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"[delete_custom_file] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
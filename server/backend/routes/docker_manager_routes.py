@@ -1,14 +1,16 @@
 # backend/routes/docker_manager_routes.py
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import JSONResponse
-from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 from pydantic import BaseModel
 from typing import Dict, Any
+import asyncio
 import docker
 from backend.services.scripts.docker.docker_manager import DockerManager
+from backend.services.helpers.event_bus import event_bus
+from backend.services.helpers.live_hub import live_hub
+from backend.services.helpers.probe_scheduler import Probe, probe_scheduler
 from backend.config.logging_config import configure_logging
-import json
 
 logger = configure_logging(__name__)
 
@@ -22,13 +24,34 @@ class ContainerResponse(BaseModel):
     status: str
     message: str
 
+DOCKER_STATUS_TOPIC = 'docker-status'
+DOCKER_STATUS_MIN_INTERVAL = 5
+DOCKER_STATUS_MAX_INTERVAL = 30
+
+async def poll_container_status():
+    """Container status probe; parked by the scheduler while nobody is watching."""
+    try:
+        return await asyncio.to_thread(docker_manager.get_container_status)
+    except Exception as e:
+        logger.error(f"Failed to get container status: {str(e)}")
+        return None
+
+probe_scheduler.register(Probe(
+    DOCKER_STATUS_TOPIC,
+    poll_container_status,
+    min_interval=DOCKER_STATUS_MIN_INTERVAL,
+    max_interval=DOCKER_STATUS_MAX_INTERVAL,
+    on_result=lambda status: event_bus.publish_nowait(DOCKER_STATUS_TOPIC, status),
+    wanted=lambda: live_hub.has_viewers(DOCKER_STATUS_TOPIC),
+    # The timestamp changes every poll; only the containers matter
+    key=lambda status: status['containers']
+))
+live_hub.register(DOCKER_STATUS_TOPIC, 'docker_status', probe=DOCKER_STATUS_TOPIC)
+
 @dockermanager.get('/containers/status-stream')
-async def container_status_stream():
+async def container_status_stream(request: Request):
     """SSE endpoint for container status updates"""
-    async def event_generator():
-        async for status in docker_manager.status_generator():
-            yield ServerSentEvent(json.dumps(status), event='docker_status')
-    return EventSourceResponse(event_generator())
+    return live_hub.topic_response(DOCKER_STATUS_TOPIC, request)
 
 @dockermanager.post('/containers/updates/start', response_model=ContainerResponse)
 async def start_container_updates():
@@ -51,6 +74,7 @@ async def start_container(container_name: str):
     """Start a Docker container"""
     try:
         await docker_manager.start_container(container_name)
+        probe_scheduler.wake(DOCKER_STATUS_TOPIC)
         return ContainerResponse(
             status='success',
             message='Container started successfully'
@@ -63,6 +87,7 @@ async def stop_container(container_name: str):
     """Stop a Docker container"""
     try:
         await docker_manager.stop_container(container_name)
+        probe_scheduler.wake(DOCKER_STATUS_TOPIC)
         return ContainerResponse(
             status='success',
             message='Container stopped successfully'
@@ -77,6 +102,7 @@ async def restart_container(container_id: str):
         client = docker.from_env()
         container = client.containers.get(container_id)
         container.restart()
+        probe_scheduler.wake(DOCKER_STATUS_TOPIC)
         return ContainerResponse(
             status='success',
             message='Container restarted successfully'
@@ -0,0 +1,60 @@
+# backend/routes/live_routes.py
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import List, Optional
+from backend.services.helpers.live_hub import live_hub
+from backend.services.helpers.probe_scheduler import probe_scheduler
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Router setup
+live = APIRouter()
+
+# Request Models
+class LiveTopicsRequest(BaseModel):
+    subscribe: List[str] = []
+    unsubscribe: List[str] = []
+
+@live.get('')
+async def live_stream(topics: Optional[str] = None):
+    """Multiplexed SSE stream carrying every requested live topic.
+
+    The first event names the session, which can then change its topics
+    without reconnecting. Without a topics list every feed is sent.
+    """
+    requested = [topic for topic in topics.split(',') if topic] if topics else live_hub.topics()
+    try:
+        return live_hub.sse_response(requested)
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+
+@live.get('/topics')
+async def live_topics():
+    """List the feeds available on the live channel"""
+    return {"topics": live_hub.topics()}
+
+@live.get('/probes')
+async def live_probes():
+    """Current interval and next run of every background probe"""
+    return {"probes": probe_scheduler.status()}
+
+@live.post('/{session_id}')
+async def update_live_session(session_id: str, request: LiveTopicsRequest):
+    """Subscribe or unsubscribe topics on an open live session"""
+    try:
+        topics = live_hub.update(session_id, request.subscribe, request.unsubscribe)
+        return {"session": session_id, "topics": topics}
+    except KeyError as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@live.on_event("startup")
+async def start_probe_scheduler():
+    probe_scheduler.start()
+
+@live.on_event("shutdown")
+async def stop_probe_scheduler():
+    probe_scheduler.stop()
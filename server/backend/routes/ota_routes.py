@@ -1,12 +1,13 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Response
-from sse_starlette.sse import EventSourceResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Response, Request
 from backend.services.scripts.ota.ota_updates import OTAUpdate
-from typing import Dict, Any, AsyncGenerator
-import json
+from backend.services.scripts.ota.snapshots import get_plugin_snapshots, DEFAULT_KEEP
+from typing import Dict, Any
 import asyncio
 import os
 from backend.config.logging_config import configure_logging
 from backend.services.helpers.directories import DirectoryHelper
+from backend.services.helpers.event_bus import event_bus
+from backend.services.helpers.live_hub import live_hub
 
 # Configure logging using centralized config
 logger = configure_logging(__name__)
@@ -14,56 +15,15 @@ logger = configure_logging(__name__)
 # Create router
 ota = APIRouter()
 
-# Event queue for OTA operations
-ota_queue = asyncio.Queue()
+# Event bus topic for OTA operations
+OTA_TOPIC = 'ota-status'
 
-# Track last events to prevent duplicates
-_last_events = {
-    'ota-status': None
-}
-
-async def create_sse_response(queue: asyncio.Queue, event_type: str):
-    """Generic SSE response generator for any queue."""
-    async def generate():
-        try:
-            while True:
-                try:
-                    event = await asyncio.wait_for(queue.get(), timeout=60)
-                    if isinstance(event, dict):
-                        # For terminal output, always send it
-                        if event.get('type') == 'terminal':
-                            yield {
-                                "event": event_type,
-                                "data": json.dumps(event)
-                            }
-                            continue
-
-                        # For other events, check for changes
-                        event_str = json.dumps(event, sort_keys=True)
-                        if _last_events[event_type] != event_str:
-                            _last_events[event_type] = event_str
-                            yield {
-                                "event": event_type,
-                                "data": json.dumps(event)
-                            }
-                    else:
-                        # For non-dict events, always send them
-                        yield {
-                            "event": event_type,
-                            "data": json.dumps(event)
-                        }
-                except asyncio.TimeoutError:
-                    yield {"event": "ping", "data": ""}
-                except asyncio.CancelledError:
-                    break
-        except asyncio.CancelledError:
-            pass
-    return EventSourceResponse(generate())
+live_hub.register(OTA_TOPIC, 'ota-status')
 
 @ota.get('/status-stream')
-async def ota_status_stream():
+async def ota_status_stream(request: Request):
     """SSE endpoint for OTA status updates."""
-    return await create_sse_response(ota_queue, "ota-status")
+    return event_bus.sse_response(OTA_TOPIC, "ota-status", request)
 
 @ota.post("/configure")
 async def configure_ota(file: UploadFile = File(...)):
@@ -77,7 +37,7 @@ async def configure_ota(file: UploadFile = File(...)):
         logger.debug(f"Saving uploaded file to: {file_path}")
         
         # Emit file received event
-        await ota_queue.put({
+        await event_bus.publish(OTA_TOPIC, {
             "status": "uploading", 
             "progress": 100,
             "message": "File upload complete, starting configuration",
@@ -97,7 +57,7 @@ async def configure_ota(file: UploadFile = File(...)):
 
         # Create OTA updater with SSE event emitter
         async def emit_event(data: Dict[str, Any]):
-            await ota_queue.put(data)
+            await event_bus.publish(OTA_TOPIC, data)
             logger.debug(f"Emitted OTA status event: {data}")
 
         logger.debug("Creating OTA updater")
@@ -123,8 +83,12 @@ async def configure_ota(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @ota.post("/update")
-async def update_ota(file: UploadFile = File(...)):
-    """Update OTA with uploaded file"""
+async def update_ota(file: UploadFile = File(...), incremental: bool = True):
+    """Update OTA with uploaded file.
+
+    Incremental updates only write plugins that were added or changed and
+    need no TAKServer restart; pass incremental=false for a full rebuild.
+    """
     logger.debug("Starting OTA update")
     logger.info(f"Received file: {file.filename}")
     try:
@@ -134,7 +98,7 @@ async def update_ota(file: UploadFile = File(...)):
         logger.debug(f"Saving uploaded file to: {file_path}")
         
         # Emit file received event
-        await ota_queue.put({
+        await event_bus.publish(OTA_TOPIC, {
             "status": "uploading", 
             "progress": 100,
             "message": "File upload complete, starting update",
@@ -154,14 +118,14 @@ async def update_ota(file: UploadFile = File(...)):
 
         # Create OTA updater with SSE event emitter
         async def emit_event(data: Dict[str, Any]):
-            await ota_queue.put(data)
+            await event_bus.publish(OTA_TOPIC, data)
             logger.debug(f"Emitted OTA status event: {data}")
 
         logger.debug("Creating OTA updater")
         ota_updater = OTAUpdate(file_path, emit_event=emit_event)
 
         logger.debug("Starting update process")
-        success = await ota_updater.update()
+        success = await ota_updater.update(incremental=incremental)
         logger.info(f"Update completed with success={success}")
         
         # Clean up uploaded file regardless of success
@@ -179,15 +143,53 @@ async def update_ota(file: UploadFile = File(...)):
         logger.error(f"Update error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _snapshots():
+    return get_plugin_snapshots(
+        DirectoryHelper.get_ota_snapshots_directory(),
+        DirectoryHelper.get_plugins_directory()
+    )
+
+@ota.get("/snapshots")
+async def list_snapshots():
+    """List OTA repository snapshots, newest first."""
+    try:
+        return {"snapshots": await asyncio.to_thread(_snapshots().list)}
+    except Exception as e:
+        logger.error(f"Error listing OTA snapshots: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@ota.post("/snapshots/{snapshot_id}/activate")
+async def activate_snapshot(snapshot_id: str):
+    """Serve a snapshot; activating an older one is a rollback."""
+    try:
+        await asyncio.to_thread(_snapshots().activate, snapshot_id)
+        return {"success": True, "active": snapshot_id}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error activating OTA snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@ota.post("/snapshots/gc")
+async def garbage_collect_snapshots(keep: int = DEFAULT_KEEP):
+    """Delete old snapshots, keeping the newest `keep` and the active one."""
+    if keep < 0:
+        raise HTTPException(status_code=400, detail="keep must not be negative")
+    try:
+        removed = await asyncio.to_thread(_snapshots().garbage_collect, keep)
+        return {"success": True, "removed": removed}
+    except Exception as e:
+        logger.error(f"Error collecting OTA snapshots: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @ota.get("/status")
 async def get_ota_status():
     """Get current OTA status"""
-    status = _last_events.get('ota-status')
+    status = event_bus.latest(OTA_TOPIC)
     if status:
-        try:
-            return json.loads(status)
-        except:
-            pass
+        return status
     return {
         "status": "idle",
         "message": "No OTA operation in progress",
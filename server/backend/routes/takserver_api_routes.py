@@ -1,22 +1,53 @@
-from fastapi import APIRouter, HTTPException
-from backend.services.scripts.takserver.connected_clients import ConnectedClients
+from fastapi import APIRouter, HTTPException, Request
+from typing import Optional
+from backend.services.scripts.takserver.connected_clients import ConnectedClients, ConnectedClientsMonitor
+from backend.services.scripts.takserver.session_history import get_session_history
+from backend.services.scripts.takserver.server_state import get_server_state
+from backend.services.helpers.event_bus import event_bus
+from backend.services.helpers.live_hub import live_hub
+from backend.services.helpers.probe_scheduler import Probe, probe_scheduler
+from backend.routes.docker_manager_routes import DOCKER_STATUS_TOPIC
 from backend.config.logging_config import configure_logging
-from sse_starlette.sse import EventSourceResponse
-import asyncio
 import json
+import time
+import asyncio
 
 logger = configure_logging(__name__)
 
 takserver_api = APIRouter()
 
-# Create a queue for connected clients events
-connected_clients_queue = asyncio.Queue()
+# Live topic for connected clients: a compact roster snapshot followed by deltas
+CONNECTED_CLIENTS_TOPIC = 'connected-clients'
+CONNECTED_CLIENTS_MIN_INTERVAL = 1
+CONNECTED_CLIENTS_MAX_INTERVAL = 5
+
+# Roster sampling for the session history while nobody is watching the live feed
+HISTORY_SAMPLE_INTERVAL = 15
+DEFAULT_HISTORY_WINDOW_MS = 24 * 3600 * 1000
+
+state_task: Optional[asyncio.Task] = None
 
-# Track the monitoring task
-connected_clients_monitor = None
-connected_clients_instance = None
-# Track active connections
-active_connections = 0
+connected_clients_monitor: Optional[ConnectedClientsMonitor] = None
+
+async def poll_connected_clients():
+    """Roster probe: fast while the live feed has viewers, a history sample otherwise."""
+    global connected_clients_monitor
+    if connected_clients_monitor is None:
+        connected_clients_monitor = ConnectedClientsMonitor(history=get_session_history())
+    return await connected_clients_monitor.poll()
+
+event_bus.set_snapshot_topic(CONNECTED_CLIENTS_TOPIC)
+probe_scheduler.register(Probe(
+    CONNECTED_CLIENTS_TOPIC,
+    poll_connected_clients,
+    min_interval=CONNECTED_CLIENTS_MIN_INTERVAL,
+    max_interval=CONNECTED_CLIENTS_MAX_INTERVAL,
+    on_result=lambda event: event_bus.publish_nowait(CONNECTED_CLIENTS_TOPIC, event),
+    wanted=lambda: live_hub.has_viewers(CONNECTED_CLIENTS_TOPIC),
+    # Without viewers the roster is still sampled for the session history
+    idle_interval=HISTORY_SAMPLE_INTERVAL
+))
+live_hub.register(CONNECTED_CLIENTS_TOPIC, 'connected_clients', probe=CONNECTED_CLIENTS_TOPIC)
 
 @takserver_api.get('/connected-clients')
 async def get_connected_clients():
@@ -30,85 +61,63 @@ async def get_connected_clients():
     return json.loads(result)
 
 @takserver_api.get('/connected-clients-stream')
-async def connected_clients_stream():
+async def connected_clients_stream(request: Request):
     """Server-Sent Events (SSE) stream for connected clients.
     
-    Provides real-time updates when clients connect or disconnect from the TAK Server.
-    Updates are only sent when there are changes to avoid unnecessary traffic.
+    Starts with the latest roster snapshot ({type: "snapshot", fields, rows})
+    and the deltas published since, then sends {type: "delta", added,
+    removed, updated} as clients change. A fresh snapshot follows at least
+    every 30 seconds. Without subscribers the roster is polled only
+    every HISTORY_SAMPLE_INTERVAL seconds for the session history.
     """
-    global connected_clients_monitor, connected_clients_instance, active_connections
-    
-    # Increment active connections counter
-    active_connections += 1
-    logger.debug(f"New client connected to SSE stream. Active connections: {active_connections}")
-    
-    # Start the monitoring task if it's not already running
-    if connected_clients_monitor is None or connected_clients_monitor.done():
-        logger.info("Starting new connected clients monitoring task")
-        connected_clients_instance = ConnectedClients()
-        connected_clients_monitor = asyncio.create_task(
-            connected_clients_instance.start_monitoring(connected_clients_queue)
-        )
-    
-    async def event_generator():
+    return live_hub.topic_response(CONNECTED_CLIENTS_TOPIC, request)
+
+async def wake_on_server_state():
+    """Re-poll clients and containers as soon as the TAK Server starts or stops."""
+    server_state = get_server_state()
+    while True:
         try:
-            while True:
-                event = await connected_clients_queue.get()
-                if event["event"] == "ping":
-                    # Send an empty ping event to keep the connection alive
-                    yield {"event": "ping", "data": ""}
-                else:
-                    # Send the actual event data
-                    yield {
-                        "event": event["event"],
-                        "data": event["data"]
-                    }
+            await server_state.wait_for_change()
+            probe_scheduler.wake(CONNECTED_CLIENTS_TOPIC)
+            probe_scheduler.wake(DOCKER_STATUS_TOPIC)
         except asyncio.CancelledError:
-            logger.info("Client disconnected from connected clients stream")
-            raise
-        finally:
-            # Decrement active connections counter when client disconnects
-            global active_connections
-            active_connections -= 1
-            logger.debug(f"Client disconnected from SSE stream. Active connections: {active_connections}")
-            
-            # If no more active connections, stop the monitoring task
-            if active_connections <= 0:
-                await stop_monitoring()
-    
-    return EventSourceResponse(event_generator())
+            break
 
-@takserver_api.post('/connected-clients-stream/stop')
-async def stop_connected_clients_stream():
-    """Stop the connected clients monitoring task."""
-    await stop_monitoring()
-    return {"status": "success", "message": "Monitoring stopped"}
+@takserver_api.on_event("startup")
+async def start_state_wakeups():
+    global state_task
+    state_task = asyncio.create_task(wake_on_server_state())
 
-async def stop_monitoring():
-    """Stop the monitoring task if there are no active connections."""
-    global connected_clients_monitor, connected_clients_instance, active_connections
-    
-    # Reset active connections counter to ensure we don't have negative values
-    if active_connections <= 0:
-        active_connections = 0
-        
-        if connected_clients_instance:
-            logger.info("Stopping connected clients monitoring task")
-            connected_clients_instance.stop_monitoring()
-            connected_clients_instance = None
-        
-        if connected_clients_monitor and not connected_clients_monitor.done():
-            logger.info("Cancelling connected clients monitoring task")
-            connected_clients_monitor.cancel()
-            try:
-                await connected_clients_monitor
-            except asyncio.CancelledError:
-                pass
-            connected_clients_monitor = None
-            
-            logger.info("Connected clients monitoring stopped")
-
-# Cleanup on shutdown
 @takserver_api.on_event("shutdown")
-async def shutdown_event():
-    await stop_monitoring()
+async def stop_state_wakeups():
+    if state_task:
+        state_task.cancel()
+
+def _history_window(start: Optional[int], end: Optional[int]) -> tuple:
+    end = end if end is not None else int(time.time() * 1000)
+    start = start if start is not None else end - DEFAULT_HISTORY_WINDOW_MS
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    return start, end
+
+@takserver_api.get('/connected-clients/history')
+async def get_session_history_range(start: Optional[int] = None, end: Optional[int] = None):
+    """Client sessions that overlap [start, end] (ms since epoch, default last 24 hours)."""
+    start, end = _history_window(start, end)
+    try:
+        sessions = get_session_history().connected_between(start, end)
+        return {"status": "success", "start": start, "end": end, "sessions": sessions}
+    except Exception as e:
+        logger.error(f"Failed to query session history: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@takserver_api.get('/connected-clients/churn')
+async def get_session_churn(start: Optional[int] = None, end: Optional[int] = None):
+    """Client connects and disconnects per hour in [start, end] (ms since epoch)."""
+    start, end = _history_window(start, end)
+    try:
+        hours = get_session_history().churn_per_hour(start, end)
+        return {"status": "success", "start": start, "end": end, "hours": hours}
+    except Exception as e:
+        logger.error(f"Failed to compute client churn: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
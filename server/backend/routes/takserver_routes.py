@@ -1,16 +1,16 @@
-from fastapi import APIRouter, UploadFile, Form, HTTPException
+from fastapi import APIRouter, UploadFile, Form, HTTPException, Request
 from fastapi.responses import Response
-from sse_starlette.sse import EventSourceResponse
 from typing import Dict, Any
-import json
 import asyncio
 from backend.services.scripts.takserver.takserver_installer import TakServerInstaller
-from backend.services.scripts.takserver.check_status import TakServerStatus
+from backend.services.scripts.takserver.check_status import TakServerStatus, get_webui_readiness
+from backend.services.scripts.takserver.server_state import get_server_state
 from backend.services.scripts.takserver.takserver_uninstaller import TakServerUninstaller
 import os
 from backend.config.logging_config import configure_logging
-import time
 from backend.services.helpers.directories import DirectoryHelper
+from backend.services.helpers.event_bus import event_bus
+from backend.services.helpers.live_hub import live_hub
 import contextlib
 
 # Setup basic logging
@@ -18,76 +18,33 @@ logger = configure_logging(__name__)
 
 # Router setup
 takserver = APIRouter()
-status_checker = TakServerStatus()
 
-# Event queues for different operations
-install_queue = asyncio.Queue()
-uninstall_queue = asyncio.Queue()
-server_status_queue = asyncio.Queue()
+# Event bus topics for different operations
+INSTALL_TOPIC = 'install-status'
+UNINSTALL_TOPIC = 'uninstall-status'
+SERVER_STATUS_TOPIC = 'server-status'
 
-# Track last events to prevent duplicates
-_last_events = {
-    'install-status': None,
-    'uninstall-status': None,
-    'server-status': None
-}
+live_hub.register(INSTALL_TOPIC, 'install-status')
+live_hub.register(UNINSTALL_TOPIC, 'uninstall-status')
+live_hub.register(SERVER_STATUS_TOPIC, 'server-status')
 
-# Add global state tracking
-operation_in_progress = False
+server_state = get_server_state(emit_event=event_bus.publisher(SERVER_STATUS_TOPIC))
+
+# Serialize start/stop/restart operations
 operation_state_lock = asyncio.Lock()
 
 @contextlib.asynccontextmanager
 async def operation_context():
     """Context manager to track in-progress operations."""
-    global operation_in_progress
     async with operation_state_lock:
-        operation_in_progress = True
         try:
             yield
         finally:
-            operation_in_progress = False
-
-async def create_sse_response(queue: asyncio.Queue, event_type: str):
-    """Generic SSE response generator for any queue."""
-    async def generate():
-        try:
-            while True:
-                try:
-                    event = await asyncio.wait_for(queue.get(), timeout=60)
-                    if isinstance(event, dict):
-                        # For terminal output, always send it
-                        if event.get('type') == 'terminal':
-                            yield {
-                                "event": event_type,
-                                "data": json.dumps(event)
-                            }
-                            continue
-
-                        # For other events, check for changes
-                        event_str = json.dumps(event, sort_keys=True)
-                        if _last_events[event_type] != event_str:
-                            _last_events[event_type] = event_str
-                            yield {
-                                "event": event_type,
-                                "data": json.dumps(event)
-                            }
-                    else:
-                        # For non-dict events, always send them
-                        yield {
-                            "event": event_type,
-                            "data": json.dumps(event)
-                        }
-                except asyncio.TimeoutError:
-                    yield {"event": "ping", "data": ""}
-                except asyncio.CancelledError:
-                    break
-        except asyncio.CancelledError:
-            pass
-
-    return EventSourceResponse(generate())
+            # Resync right away rather than waiting on the next event
+            await server_state.refresh()
 
 @takserver.get('/install-status-stream')
-async def install_status_stream():
+async def install_status_stream(request: Request):
     """Server-Sent Events (SSE) stream for installation progress.
     
     API Endpoint:
@@ -101,13 +58,13 @@ async def install_status_stream():
     Client should:
         - Handle JSON messages for structured data
         - Display terminal messages as console output
-        - Reconnect on connection drop
+        - Reconnect on connection drop (Last-Event-ID replays missed events)
     """
     logger.debug("New install status stream connection established")
-    return await create_sse_response(install_queue, "install-status")
+    return event_bus.sse_response(INSTALL_TOPIC, "install-status", request)
 
 @takserver.get('/uninstall-status-stream')
-async def uninstall_status_stream():
+async def uninstall_status_stream(request: Request):
     """Server-Sent Events (SSE) stream for uninstallation progress.
     
     API Endpoint:
@@ -119,10 +76,10 @@ async def uninstall_status_stream():
         - ping: Empty keep-alive messages
     """
     logger.debug("New uninstall status stream connection established")
-    return await create_sse_response(uninstall_queue, "uninstall-status")
+    return event_bus.sse_response(UNINSTALL_TOPIC, "uninstall-status", request)
 
 @takserver.get('/server-status-stream')
-async def server_status_stream():
+async def server_status_stream(request: Request):
     """Real-time server status updates via SSE.
     
     API Endpoint:
@@ -144,82 +101,16 @@ async def server_status_stream():
     Note: Automatically pushes updates when status changes
     """
     logger.debug("New server status stream connection established")
-    return await create_sse_response(server_status_queue, "server-status")
-
-# Background service monitoring
-async def update_server_status():
-    """Background task that continuously monitors server status.
-    
-    Runs every 1 second to:
-    1. Check current installation status
-    2. Verify container health
-    3. Push updates to server-status-stream
-    4. Maintain SSE connections
-    
-    Handles:
-    - Installation detection
-    - Version tracking
-    - Container state changes
-    - Error recovery attempts
-    """
-    last_status = None
-    last_ping = time.time()
-    while True:
-        try:
-            if operation_in_progress:
-                # Send pings to maintain connection
-                if time.time() - last_ping > 30:  # 30 seconds ping interval
-                    await server_status_queue.put({"type": "ping"})
-                    last_ping = time.time()
-                await asyncio.sleep(0.5)
-                continue
-
-            # Force immediate status check after operations
-            status = await status_checker.get_status()
-            status_str = json.dumps(status, sort_keys=True)
-            
-            if status_str != last_status:
-                logger.info("Server status changed: %s", status)
-                event = {
-                    "type": "status",
-                    "data": status,
-                    "timestamp": int(time.time() * 1000)
-                }
-                await server_status_queue.put(event)
-                last_status = status_str
-                last_ping = time.time()  # Reset ping timer on status change
-            else:
-                # Send periodic pings to keep connection alive
-                if time.time() - last_ping > 30:  # 30 seconds ping interval
-                    await server_status_queue.put({"type": "ping"})
-                    last_ping = time.time()
+    return event_bus.sse_response(SERVER_STATUS_TOPIC, "server-status", request)
 
-            await asyncio.sleep(1)
-            
-        except Exception as e:
-            if os.path.exists(status_checker.directory_helper.get_docker_compose_directory()):
-                logger.error("Status monitoring error: %s", str(e), exc_info=True)
-            else:
-                logger.debug("Status check failed - no installation present")
-            
-            error_status = {
-                "type": "status",
-                "data": {
-                    "isInstalled": False,
-                    "isRunning": False,
-                    "version": None
-                },
-                "timestamp": int(time.time() * 1000)
-            }
-            error_status_str = json.dumps(error_status, sort_keys=True)
-            if error_status_str != last_status:
-                await server_status_queue.put(error_status)
-                last_status = error_status_str
-
-# Start the background task
+# Server state store: file watch + Docker events instead of a polling loop
 @takserver.on_event("startup")
 async def startup_event():
-    asyncio.create_task(update_server_status())
+    await server_state.start()
+
+@takserver.on_event("shutdown")
+async def shutdown_event():
+    server_state.stop()
 
 @takserver.post('/install-takserver')
 async def install_takserver(
@@ -270,7 +161,7 @@ async def install_takserver(
         logger.debug("Saving uploaded file to: %s", file_path)
         
         # Emit file received event
-        await install_queue.put({
+        await event_bus.publish(INSTALL_TOPIC, {
             "status": "uploading", 
             "progress": 100,
             "message": "File upload complete, starting installation",
@@ -289,7 +180,7 @@ async def install_takserver(
 
         async def emit_event(data: Dict[str, Any]):
             logger.debug("Installation progress update: %s", data.get('type', 'unknown_event'))
-            await install_queue.put(data)
+            await event_bus.publish(INSTALL_TOPIC, data)
 
         installer = TakServerInstaller(
             docker_zip_path=file_path,
@@ -344,7 +235,7 @@ async def uninstall_takserver():
     try:
         async def emit_event(data: Dict[str, Any]):
             logger.debug("Uninstallation progress update: %s", data.get('type', 'unknown_event'))
-            await uninstall_queue.put(data)
+            await event_bus.publish(UNINSTALL_TOPIC, data)
 
         uninstaller = TakServerUninstaller(emit_event=emit_event)
         success = await uninstaller.uninstall()
@@ -440,7 +331,7 @@ async def get_takserver_status():
     """
     try:
         logger.debug("Processing status check request")
-        status = await status_checker.get_status()
+        status = server_state.snapshot()
         logger.info("Status check completed - Installed: %s, Running: %s",
                    status['isInstalled'], status['isRunning'])
         return status
@@ -467,9 +358,8 @@ async def get_webui_status():
     Note: Checks for "Retention Application started" message in logs
     """
     try:
-        status_checker = TakServerStatus()
-        result = await status_checker.check_webui_availability()
-        return result
+        # Shared single-flight probe: concurrent requests await the same check
+        return await get_webui_readiness().check()
     except Exception as e:
         logger.error(f"TAK Server readiness check failed: {str(e)}", exc_info=True)
         return {
@@ -132,6 +132,14 @@ class DirectoryHelper:
             os.makedirs(packages_dir)
         return packages_dir
 
+    @staticmethod
+    def get_session_history_directory() -> str:
+        """Get the directory for connected client session history."""
+        history_dir = os.path.join(DirectoryHelper.get_base_directory(), "session_history")
+        if not os.path.exists(history_dir):
+            os.makedirs(history_dir)
+        return history_dir
+
     @staticmethod
     def get_webaccess_directory() -> str:
         """Get the webaccess directory for client certificates."""
@@ -170,10 +178,14 @@ class DirectoryHelper:
         return path
 
     @staticmethod
-    def get_generate_inf_script_path() -> str:
-        """Get the path for the generate-inf.sh script."""
-        script_path = '/opt/android-sdk/build-tools/33.0.0/generate-inf.sh'
-        return script_path
+    def get_plugins_directory() -> str:
+        """Get the OTA plugins directory (bind-mounted to /opt/tak/webcontent/plugins)."""
+        return os.path.join(DirectoryHelper.get_tak_directory(), "webcontent", "plugins")
+
+    @staticmethod
+    def get_ota_snapshots_directory() -> str:
+        """Get the directory holding versioned OTA plugin repository snapshots."""
+        return os.path.join(DirectoryHelper.get_tak_directory(), "ota-snapshots")
     
     @staticmethod
     def get_cert_directory() -> str:
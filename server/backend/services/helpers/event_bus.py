@@ -0,0 +1,210 @@
+# backend/services/helpers/event_bus.py
+
+import json
+import time
+import asyncio
+import itertools
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Tuple
+from fastapi import Request
+from sse_starlette.sse import EventSourceResponse
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+DEFAULT_BUFFER_SIZE = 1000
+PING_INTERVAL = 60
+# Event types appended to a stream that never become the topic's state
+TRANSIENT_TYPES = {'terminal', 'delta'}
+
+
+class _Topic:
+    """Ring buffer of (id, payload) for one stream plus a wakeup for its subscribers."""
+
+    def __init__(self, name: str, buffer_size: int, first_id: int):
+        self.name = name
+        self.buffer: Deque[Tuple[int, str]] = deque(maxlen=buffer_size)
+        self.next_id = first_id
+        self.last_state: Optional[str] = None
+        self.latest: Optional[Tuple[int, str]] = None
+        self.wakeup = asyncio.Event()
+        self.subscribers = 0
+        # Snapshot topics replay everything after the latest state to fresh subscribers
+        self.replay_from_state = False
+
+    def append(self, payload: str, is_state: bool) -> int:
+        event_id = self.next_id
+        self.next_id += 1
+        self.buffer.append((event_id, payload))
+        if is_state:
+            self.latest = (event_id, payload)
+        # Wake everyone waiting on this generation and start a new one
+        wakeup, self.wakeup = self.wakeup, asyncio.Event()
+        wakeup.set()
+        return event_id
+
+    def start_cursor(self) -> Tuple[Optional[Tuple[int, str]], int]:
+        """Initial (state, cursor) for a subscriber without a Last-Event-ID."""
+        if self.replay_from_state and self.latest is not None and self.buffer and self.latest[0] >= self.buffer[0][0]:
+            return self.latest, self.latest[0]
+        return self.latest, self.next_id - 1
+
+    def since(self, event_id: int):
+        """Buffered entries newer than event_id (ids in the buffer are contiguous)."""
+        if not self.buffer:
+            return []
+        start = max(0, event_id + 1 - self.buffer[0][0])
+        return list(itertools.islice(self.buffer, start, None))
+
+
+class EventBus:
+    """Broadcast pub/sub for the live SSE streams.
+
+    Every topic keeps a bounded ring buffer of serialized events with
+    monotonically increasing ids. Each subscriber reads the buffer from
+    its own cursor, so every open tab sees the full stream, memory stays
+    bounded with no viewer attached, and a reconnect carrying
+    Last-Event-ID is replayed whatever it missed while the buffer still
+    holds it.
+
+    Dict events other than TRANSIENT_TYPES are state snapshots:
+    consecutive duplicates are dropped at publish time, and a fresh
+    subscriber starts from the most recent one. On a snapshot topic
+    (snapshot + delta streams) it also receives the deltas published
+    after that snapshot.
+    """
+
+    def __init__(self, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        # Ids continue to grow across restarts, so stale Last-Event-IDs never look newer
+        self._first_id = int(time.time() * 1000)
+        self._topics: Dict[str, _Topic] = {}
+
+    def topic(self, name: str) -> _Topic:
+        topic = self._topics.get(name)
+        if topic is None:
+            topic = _Topic(name, self.buffer_size, self._first_id)
+            self._topics[name] = topic
+        return topic
+
+    def set_snapshot_topic(self, name: str) -> None:
+        """Mark a topic whose state events are snapshots followed by deltas."""
+        self.topic(name).replay_from_state = True
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+    def publish_nowait(self, name: str, event: Any) -> Optional[int]:
+        """Publish an event; returns its id, or None when it was dropped as a duplicate or ping."""
+        topic = self.topic(name)
+        is_state = False
+        if isinstance(event, dict):
+            if event.get('type') == 'ping':
+                # Keep-alives are produced per connection by the subscribers
+                return None
+            if event.get('type') not in TRANSIENT_TYPES:
+                state = json.dumps(event, sort_keys=True)
+                if state == topic.last_state:
+                    return None
+                topic.last_state = state
+                is_state = True
+        return topic.append(json.dumps(event), is_state)
+
+    async def publish(self, name: str, event: Any) -> Optional[int]:
+        return self.publish_nowait(name, event)
+
+    def publisher(self, name: str) -> Callable[[Any], Any]:
+        """Async callable for code that used to put() onto a queue."""
+        async def emit(event: Any) -> None:
+            self.publish_nowait(name, event)
+        return emit
+
+    def read(self, name: str, cursor: Optional[int]) -> Tuple[List[Tuple[int, str]], int]:
+        """Entries after cursor and the new cursor; a None cursor starts from the latest state."""
+        topic = self.topic(name)
+        if cursor is None or cursor >= topic.next_id:
+            latest, start = topic.start_cursor()
+            entries = ([latest] if latest is not None else []) + topic.since(start)
+            return entries, entries[-1][0] if entries else start
+        entries = topic.since(cursor)
+        return entries, entries[-1][0] if entries else cursor
+
+    def wakeup(self, name: str) -> asyncio.Event:
+        """Event set by the next publish on a topic."""
+        return self.topic(name).wakeup
+
+    def latest(self, name: str) -> Optional[Any]:
+        """The most recent state event on a topic."""
+        topic = self._topics.get(name)
+        if topic is None or topic.latest is None:
+            return None
+        return json.loads(topic.latest[1])
+
+    # ------------------------------------------------------------------
+    # Subscribing
+    # ------------------------------------------------------------------
+    async def subscribe(
+        self,
+        name: str,
+        last_event_id: Optional[int] = None,
+        ping_interval: float = PING_INTERVAL
+    ) -> AsyncIterator[Optional[Tuple[int, str]]]:
+        """Yield (id, payload) for every event after last_event_id; None marks an idle ping."""
+        topic = self.topic(name)
+        topic.subscribers += 1
+        try:
+            if last_event_id is None or last_event_id >= topic.next_id:
+                # Fresh viewer (or an id from before a restart): start from the current state
+                latest, cursor = topic.start_cursor()
+                if latest is not None:
+                    yield latest
+            else:
+                cursor = last_event_id
+                if topic.buffer and cursor + 1 < topic.buffer[0][0]:
+                    logger.debug(f"Subscriber to {name} missed {topic.buffer[0][0] - cursor - 1} events")
+
+            while True:
+                wakeup = topic.wakeup
+                entries = topic.since(cursor)
+                for entry in entries:
+                    cursor = entry[0]
+                    yield entry
+                if entries:
+                    continue
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=ping_interval)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            topic.subscribers -= 1
+
+    async def sse_events(self, name: str, event_type: str, last_event_id: Optional[int] = None) -> AsyncIterator[Dict[str, str]]:
+        """SSE messages for a topic, with the id field set for reconnects."""
+        async for entry in self.subscribe(name, last_event_id):
+            if entry is None:
+                yield {"event": "ping", "data": ""}
+            else:
+                yield {"id": str(entry[0]), "event": event_type, "data": entry[1]}
+
+    @staticmethod
+    def last_event_id(request: Optional[Request]) -> Optional[int]:
+        if request is None:
+            return None
+        header = request.headers.get('last-event-id')
+        return int(header) if header and header.isdigit() else None
+
+    def sse_response(self, name: str, event_type: str, request: Optional[Request] = None) -> EventSourceResponse:
+        """EventSourceResponse for a topic, honouring the Last-Event-ID reconnect header."""
+        last_event_id = self.last_event_id(request)
+
+        async def generate():
+            try:
+                async for message in self.sse_events(name, event_type, last_event_id):
+                    yield message
+            except asyncio.CancelledError:
+                pass
+
+        return EventSourceResponse(generate())
+
+
+event_bus = EventBus()
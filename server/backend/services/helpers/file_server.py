@@ -0,0 +1,195 @@
+# backend/services/helpers/file_server.py
+
+import os
+import gzip
+import shutil
+import tempfile
+import mimetypes
+import threading
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+from backend.config.logging_config import configure_logging
+
+# Setup logging
+logger = configure_logging(__name__)
+
+# Large reads keep per-chunk Python overhead negligible when the server cannot sendfile
+FILE_CHUNK_SIZE = 1024 * 1024
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# Content-Encoding tokens mapped to the sibling suffix that holds that encoding
+PRECOMPRESSED_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+# Text assets worth compressing ahead of time
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.css', '.html', '.json', '.svg', '.txt', '.map', '.webmanifest', '.xml', '.ico'}
+MIN_COMPRESS_SIZE = 1024
+
+
+class ChunkedFileResponse(FileResponse):
+    """FileResponse that reads 1MB blocks instead of Starlette's 64KB.
+
+    Starlette handles Range / If-Range itself and would hand the path to
+    the server when the ASGI 'http.response.pathsend' extension is offered.
+    The uvicorn this app ships with does not offer it, so file bodies are
+    read and sent by Python; the large blocks keep that overhead small.
+    """
+    chunk_size = FILE_CHUNK_SIZE
+
+
+def strong_etag(stat: os.stat_result) -> str:
+    """Strong validator from inode, size and nanosecond mtime."""
+    return '"%x-%x-%x"' % (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    return etag in [tag.strip().removeprefix('W/') for tag in header.split(',')]
+
+
+class StatIndex:
+    """Caches os.stat results and ETags per path.
+
+    Entries are revalidated with a single stat; the ETag string is only
+    rebuilt when the file actually changes.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Tuple[int, int, int], os.stat_result, str]] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, path: str) -> Tuple[os.stat_result, str]:
+        stat = os.stat(path)
+        key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        entry = self._entries.get(path)
+        if entry and entry[0] == key:
+            return entry[1], entry[2]
+        etag = strong_etag(stat)
+        with self._lock:
+            self._entries[path] = (key, stat, etag)
+        return stat, etag
+
+    def forget(self, path: str) -> None:
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+stat_index = StatIndex()
+
+
+def serve_file(
+    request: Request,
+    path: str,
+    filename: Optional[str] = None,
+    media_type: Optional[str] = None,
+    cache_control: str = REVALIDATE_CACHE
+) -> Response:
+    """Serve a file on disk with a strong ETag, 304s, Range support and zero-copy where available."""
+    stat, etag = stat_index.lookup(path)
+    headers = {'ETag': etag, 'Cache-Control': cache_control}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ChunkedFileResponse(
+        path,
+        filename=filename,
+        media_type=media_type,
+        stat_result=stat,
+        headers=headers
+    )
+
+
+class _StaticAsset:
+    __slots__ = ('path', 'stat', 'etag', 'media_type', 'cache_control', 'encodings')
+
+    def __init__(self, path: str, cache_control: str):
+        self.path = path
+        self.stat = os.stat(path)
+        self.etag = strong_etag(self.stat)
+        self.media_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.cache_control = cache_control
+        # Encoding token -> (path, stat, etag) of the precompressed sibling
+        self.encodings: Dict[str, Tuple[str, os.stat_result, str]] = {}
+
+
+class StaticBuildIndex:
+    """In-memory index of the React build, scanned once at startup.
+
+    Requests are answered from the index without touching the filesystem
+    for lookups. Fingerprinted files under assets/ are served as immutable;
+    everything else (index.html, service worker, manifest) is revalidated.
+    Text assets get a .gz sibling written once if the build did not ship
+    one, and existing .br/.gz siblings are preferred per Accept-Encoding.
+    """
+
+    def __init__(self, build_dir: str, immutable_prefixes: Tuple[str, ...] = ('assets/', 'static/')):
+        self.build_dir = build_dir
+        self.immutable_prefixes = immutable_prefixes
+        self.assets: Dict[str, _StaticAsset] = {}
+        self._scan()
+
+    def _scan(self) -> None:
+        suffixes = tuple(suffix for _, suffix in PRECOMPRESSED_SUFFIXES)
+        for root, _, files in os.walk(self.build_dir):
+            for name in files:
+                if name.endswith(suffixes):
+                    continue
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.build_dir).replace(os.sep, '/')
+                immutable = relative.startswith(self.immutable_prefixes)
+                asset = _StaticAsset(path, IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE)
+                self._precompress(asset)
+                for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+                    sibling = path + suffix
+                    if os.path.isfile(sibling):
+                        sibling_stat = os.stat(sibling)
+                        if sibling_stat.st_mtime_ns >= asset.stat.st_mtime_ns:
+                            asset.encodings[encoding] = (sibling, sibling_stat, strong_etag(sibling_stat))
+                self.assets[relative] = asset
+        logger.info(f"Indexed {len(self.assets)} static files from {self.build_dir}")
+
+    @staticmethod
+    def _precompress(asset: _StaticAsset) -> None:
+        ext = os.path.splitext(asset.path)[1].lower()
+        target = asset.path + '.gz'
+        if ext not in COMPRESSIBLE_EXTENSIONS or asset.stat.st_size < MIN_COMPRESS_SIZE:
+            return
+        if os.path.exists(target) and os.stat(target).st_mtime_ns >= asset.stat.st_mtime_ns:
+            return
+        temp_path = None
+        try:
+            # Compress beside the target and rename, so a crash never leaves a truncated .gz to be served
+            fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.gz', dir=os.path.dirname(target))
+            with os.fdopen(fd, 'wb') as raw, open(asset.path, 'rb') as src, \
+                    gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=9, mtime=0) as dest:
+                shutil.copyfileobj(src, dest, FILE_CHUNK_SIZE)
+            os.replace(temp_path, target)
+        except OSError as e:
+            # Read-only builds are served uncompressed
+            logger.debug(f"Could not precompress {asset.path}: {str(e)}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def get(self, relative: str) -> Optional[_StaticAsset]:
+        return self.assets.get(relative.lstrip('/'))
+
+    def respond(self, request: Request, asset: _StaticAsset) -> Response:
+        path, stat, etag = asset.path, asset.stat, asset.etag
+        headers = {'Cache-Control': asset.cache_control}
+        accepted = {token.split(';')[0].strip() for token in request.headers.get('accept-encoding', '').split(',')}
+        if asset.encodings:
+            headers['Vary'] = 'Accept-Encoding'
+            for encoding, _ in PRECOMPRESSED_SUFFIXES:
+                if encoding in asset.encodings and encoding in accepted:
+                    path, stat, etag = asset.encodings[encoding]
+                    headers['Content-Encoding'] = encoding
+                    break
+        headers['ETag'] = etag
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return ChunkedFileResponse(path, media_type=asset.media_type, stat_result=stat, headers=headers)
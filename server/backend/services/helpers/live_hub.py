@@ -0,0 +1,196 @@
+# backend/services/helpers/live_hub.py
+
+import json
+import uuid
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional, Set
+from fastapi import Request
+from sse_starlette.sse import EventSourceResponse
+from backend.services.helpers.event_bus import EventBus, event_bus, PING_INTERVAL
+from backend.services.helpers.probe_scheduler import ProbeScheduler, probe_scheduler
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+DEFAULT_TICK = 0.25
+SESSION_EVENT = 'session'
+BATCH_EVENT = 'batch'
+
+
+class _Feed:
+    """A registered live topic and, for polled feeds, the probe that fills it."""
+
+    def __init__(self, topic: str, event_type: str, probe: Optional[str]):
+        self.topic = topic
+        self.event_type = event_type
+        self.probe = probe
+        self.viewers = 0
+
+
+class _Session:
+    def __init__(self, session_id: str, topics: Set[str]):
+        self.id = session_id
+        self.topics = topics
+        self.cursors: Dict[str, Optional[int]] = {topic: None for topic in topics}
+        self.changed = asyncio.Event()
+
+
+class LiveHub:
+    """One SSE connection per browser tab carrying every live feed.
+
+    Feeds are event bus topics. Polled feeds (metrics, container status)
+    are probes on the shared ProbeScheduler; the hub counts viewers per
+    feed so a probe can park while nobody watches, and wakes it when the
+    first viewer attaches. Each session reads its topics from the bus
+    and, once per tick, sends everything new as one "batch" event. Payloads are the bus's already
+    serialized JSON, so an event is encoded once however many sessions
+    receive it.
+    """
+
+    def __init__(self, bus: EventBus = event_bus, tick: float = DEFAULT_TICK, scheduler: ProbeScheduler = probe_scheduler):
+        self.bus = bus
+        self.scheduler = scheduler
+        self.tick = tick
+        self._feeds: Dict[str, _Feed] = {}
+        self._sessions: Dict[str, _Session] = {}
+
+    # ------------------------------------------------------------------
+    # Feeds
+    # ------------------------------------------------------------------
+    def register(self, topic: str, event_type: str, probe: Optional[str] = None) -> None:
+        """Expose a bus topic; probe names the scheduler probe that publishes to it."""
+        self._feeds[topic] = _Feed(topic, event_type, probe)
+
+    def topics(self) -> List[str]:
+        return sorted(self._feeds)
+
+    def has_viewers(self, topic: str) -> bool:
+        """Whether any stream is currently subscribed to a feed."""
+        feed = self._feeds.get(topic)
+        return feed is not None and feed.viewers > 0
+
+    def _check(self, topics: List[str]) -> None:
+        unknown = [topic for topic in topics if topic not in self._feeds]
+        if unknown:
+            raise KeyError(f"Unknown live topic(s): {', '.join(unknown)}")
+
+    def _attach(self, topic: str) -> None:
+        feed = self._feeds[topic]
+        feed.viewers += 1
+        if feed.viewers == 1 and feed.probe is not None:
+            # Fresh data for the first viewer instead of waiting out a backed-off interval
+            self.scheduler.wake(feed.probe)
+            logger.debug(f"Woke probe {feed.probe} for {topic}")
+
+    def _detach(self, topic: str) -> None:
+        feed = self._feeds[topic]
+        feed.viewers = max(feed.viewers - 1, 0)
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+    def open_session(self, topics: List[str]) -> _Session:
+        self._check(topics)
+        session = _Session(uuid.uuid4().hex, set(topics))
+        for topic in session.topics:
+            self._attach(topic)
+        self._sessions[session.id] = session
+        return session
+
+    def close_session(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        for topic in session.topics:
+            self._detach(topic)
+
+    def update(self, session_id: str, subscribe: List[str], unsubscribe: List[str]) -> List[str]:
+        """Change a session's topics in place; returns the new topic list."""
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise LookupError(f"Live session {session_id} not found")
+        self._check(subscribe + unsubscribe)
+        for topic in unsubscribe:
+            if topic in session.topics:
+                session.topics.discard(topic)
+                session.cursors.pop(topic, None)
+                self._detach(topic)
+        for topic in subscribe:
+            if topic not in session.topics:
+                session.topics.add(topic)
+                session.cursors[topic] = None
+                self._attach(topic)
+        session.changed.set()
+        return sorted(session.topics)
+
+    def _collect(self, session: _Session) -> List[str]:
+        parts = []
+        for topic in sorted(session.topics):
+            entries, session.cursors[topic] = self.bus.read(topic, session.cursors[topic])
+            event_type = self._feeds[topic].event_type
+            for event_id, payload in entries:
+                # Splice the stored payload in rather than decoding and re-encoding it
+                parts.append(
+                    f'{{"topic":{json.dumps(topic)},"event":{json.dumps(event_type)},'
+                    f'"id":{event_id},"data":{payload}}}'
+                )
+        return parts
+
+    async def _wait(self, session: _Session) -> bool:
+        """Wait for new events or a topic change; False on an idle timeout."""
+        waiters = [asyncio.ensure_future(self.bus.wakeup(topic).wait()) for topic in session.topics]
+        waiters.append(asyncio.ensure_future(session.changed.wait()))
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=PING_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        session.changed.clear()
+        return bool(done)
+
+    async def stream(self, session: _Session) -> AsyncIterator[Dict[str, str]]:
+        yield {"event": SESSION_EVENT, "data": json.dumps({"session": session.id, "topics": sorted(session.topics)})}
+        while True:
+            parts = self._collect(session)
+            if parts:
+                yield {"event": BATCH_EVENT, "data": f"[{','.join(parts)}]"}
+                # Let a burst accumulate into the next batch
+                await asyncio.sleep(self.tick)
+                continue
+            if not await self._wait(session):
+                yield {"event": "ping", "data": ""}
+
+    def sse_response(self, topics: List[str]) -> EventSourceResponse:
+        """Multiplexed stream; raises KeyError for unknown topics."""
+        session = self.open_session(topics)
+
+        async def generate():
+            try:
+                async for message in self.stream(session):
+                    yield message
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self.close_session(session.id)
+
+        return EventSourceResponse(generate())
+
+    def topic_response(self, topic: str, request: Optional[Request] = None) -> EventSourceResponse:
+        """Single-topic stream for the legacy endpoints, sharing the feed's probe."""
+        feed = self._feeds[topic]
+        last_event_id = self.bus.last_event_id(request)
+
+        async def generate():
+            self._attach(topic)
+            try:
+                async for message in self.bus.sse_events(topic, feed.event_type, last_event_id):
+                    yield message
+            except asyncio.CancelledError:
+                pass
+            finally:
+                self._detach(topic)
+
+        return EventSourceResponse(generate())
+
+
+live_hub = LiveHub()
@@ -0,0 +1,202 @@
+# backend/services/helpers/probe_scheduler.py
+
+import math
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Due times are rounded up to this grid so probes share wakeups
+DEFAULT_TICK = 0.5
+BACKOFF_FACTOR = 2
+
+
+class Probe:
+    """A periodic check run by the ProbeScheduler.
+
+    run() returns the probe's result; None means nothing changed. A result
+    whose key() equals the previous one counts as unchanged. on_result is
+    called with every changed result.
+
+    The interval starts at min_interval, doubles after each unchanged
+    result up to max_interval and drops back to min_interval on a change
+    or a wake(). While wanted() is False the probe runs every
+    idle_interval seconds, or is parked until woken when idle_interval is
+    None.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], Awaitable[Any]],
+        min_interval: float,
+        max_interval: float,
+        on_result: Optional[Callable[[Any], Any]] = None,
+        wanted: Optional[Callable[[], bool]] = None,
+        idle_interval: Optional[float] = None,
+        key: Optional[Callable[[Any], Any]] = None
+    ):
+        self.name = name
+        self.run = run
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.on_result = on_result
+        self.wanted = wanted or (lambda: True)
+        self.idle_interval = idle_interval
+        self.key = key or (lambda result: result)
+        self.interval = min_interval
+        self.due: Optional[float] = 0.0
+        # Set by wake(); still set when the run finishes means the wake came mid-run
+        self.woken = False
+        self.task: Optional[asyncio.Task] = None
+        self.last_key: Any = None
+        self.runs = 0
+
+
+class ProbeScheduler:
+    """One loop driving every background probe.
+
+    Instead of a sleep loop per feed, probes are registered with their
+    interval bounds and the scheduler sleeps until the earliest due time.
+    Due times are rounded up to a shared tick, so probes that fall due
+    close together run in the same wakeup. A probe still running when it
+    falls due again is skipped rather than stacked.
+    """
+
+    def __init__(self, tick: float = DEFAULT_TICK):
+        self.tick = tick
+        self._probes: Dict[str, Probe] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def register(self, probe: Probe) -> Probe:
+        self._probes[probe.name] = probe
+        self._poke()
+        return probe
+
+    def wake(self, name: str) -> None:
+        """Run a probe on the next tick and reset it to its fastest interval."""
+        probe = self._probes.get(name)
+        if probe is None:
+            return
+        probe.interval = probe.min_interval
+        probe.due = 0.0
+        probe.woken = True
+        self._poke()
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        return {
+            name: {
+                "interval": probe.interval,
+                "dueIn": None if probe.due is None else max(round(probe.due - now, 2), 0),
+                "running": probe.task is not None and not probe.task.done(),
+                "runs": probe.runs
+            }
+            for name, probe in self._probes.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for probe in self._probes.values():
+            if probe.task and not probe.task.done():
+                probe.task.cancel()
+
+    def _poke(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _align(self, at: float) -> float:
+        return math.ceil(at / self.tick) * self.tick
+
+    def _schedule(self, probe: Probe, slot: float, changed: bool) -> None:
+        """Set the next due time, counted from the slot the run was scheduled for."""
+        if probe.woken:
+            # Woken while running: the result may predate whatever prompted the wake
+            probe.woken = False
+            probe.interval = probe.min_interval
+            probe.due = self._align(time.monotonic())
+            return
+        if not probe.wanted():
+            if probe.idle_interval is None:
+                # Parked until a subscriber wakes it
+                probe.due = None
+                return
+            probe.interval = probe.idle_interval
+        elif changed:
+            probe.interval = probe.min_interval
+        else:
+            probe.interval = min(max(probe.interval, probe.min_interval) * BACKOFF_FACTOR, probe.max_interval)
+        # A run that outlasted its interval goes again on the next tick
+        probe.due = self._align(max(slot + probe.interval, time.monotonic()))
+
+    async def _run(self, probe: Probe, slot: float) -> None:
+        changed = False
+        try:
+            probe.runs += 1
+            result = await probe.run()
+            if result is not None:
+                key = probe.key(result)
+                if key != probe.last_key:
+                    probe.last_key = key
+                    changed = True
+                    if probe.on_result:
+                        outcome = probe.on_result(result)
+                        if asyncio.iscoroutine(outcome):
+                            await outcome
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Probe {probe.name} failed: {str(e)}")
+        finally:
+            self._schedule(probe, slot, changed)
+            self._poke()
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                now = time.monotonic()
+                for probe in self._probes.values():
+                    if probe.due is None or probe.due > now:
+                        continue
+                    if probe.task is not None and not probe.task.done():
+                        continue
+                    if not probe.wanted() and probe.idle_interval is None:
+                        probe.due = None
+                        continue
+                    # Woken probes (due 0) count their interval from now
+                    slot = probe.due or now
+                    probe.woken = False
+                    probe.due = self._align(now + probe.interval)
+                    probe.task = asyncio.create_task(self._run(probe, slot))
+
+                pending = [probe.due for probe in self._probes.values() if probe.due is not None]
+                timeout = max(min(pending) - time.monotonic(), 0) if pending else None
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Probe scheduler error: {str(e)}")
+                await asyncio.sleep(self.tick)
+
+
+probe_scheduler = ProbeScheduler()
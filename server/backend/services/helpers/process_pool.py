@@ -0,0 +1,22 @@
+# backend/services/helpers/process_pool.py
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Upper bound on workers for CPU-bound batch jobs
+MAX_POOL_WORKERS = 8
+
+
+def process_pool(jobs: int, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    """Process pool sized for a batch of jobs, one worker per CPU at most.
+
+    Workers are spawned rather than forked, since the server process runs
+    threads (Docker clients, watchers) that a fork would copy mid-lock. A
+    spawned worker only imports app.py and the module of the function it
+    runs; backend/__init__.py defers the routers to create_app() so that
+    stays cheap. Functions submitted must live at module level.
+    """
+    workers = max(1, min(max_workers or os.cpu_count() or 1, MAX_POOL_WORKERS, jobs))
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
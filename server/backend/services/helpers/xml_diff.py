@@ -0,0 +1,84 @@
+# backend/services/helpers/xml_diff.py
+
+from lxml import etree
+from typing import Any, Dict, List, Optional, Tuple
+
+# Attributes that identify an element among same-tag siblings (e.g. <input _name="stdssl">)
+KEY_ATTRIBUTES = ("_name", "name", "id", "identifier")
+
+
+def _parse(content: bytes) -> etree._Element:
+    parser = etree.XMLParser(remove_blank_text=True, remove_comments=True, resolve_entities=False)
+    return etree.fromstring(content, parser)
+
+
+def _text(element: etree._Element) -> Optional[str]:
+    text = (element.text or "").strip()
+    return text or None
+
+
+def _step(element: etree._Element, position: int) -> Tuple[Any, str]:
+    """Match key and path segment of an element within its parent."""
+    tag = etree.QName(element).localname
+    for attribute in KEY_ATTRIBUTES:
+        value = element.get(attribute)
+        if value is not None:
+            return (tag, attribute, value), f"{tag}[@{attribute}='{value}']"
+    return (tag, position), f"{tag}[{position}]"
+
+
+def _children(element: etree._Element) -> Dict[Any, Tuple[str, etree._Element]]:
+    children, positions = {}, {}
+    for child in element:
+        if not isinstance(child.tag, str):
+            continue
+        tag = etree.QName(child).localname
+        positions[tag] = positions.get(tag, 0) + 1
+        key, step = _step(child, positions[tag])
+        children[key] = (step, child)
+    return children
+
+
+def _diff(old: etree._Element, new: etree._Element, path: str, changes: List[Dict[str, Any]]) -> None:
+    attributes = {
+        name: [old.get(name), new.get(name)]
+        for name in sorted(set(old.attrib) | set(new.attrib))
+        if old.get(name) != new.get(name)
+    }
+    change: Dict[str, Any] = {}
+    if attributes:
+        change["attributes"] = attributes
+    if _text(old) != _text(new):
+        change["text"] = [_text(old), _text(new)]
+    if change:
+        changes.append({"op": "changed", "path": path, **change})
+
+    old_children, new_children = _children(old), _children(new)
+    for key, (step, child) in old_children.items():
+        if key not in new_children:
+            changes.append({"op": "removed", "path": f"{path}/{step}", "xml": etree.tostring(child, encoding="unicode")})
+    for key, (step, child) in new_children.items():
+        if key in old_children:
+            _diff(old_children[key][1], child, f"{path}/{step}", changes)
+        else:
+            changes.append({"op": "added", "path": f"{path}/{step}", "xml": etree.tostring(child, encoding="unicode")})
+
+
+def diff_xml(old: bytes, new: bytes) -> List[Dict[str, Any]]:
+    """Structural differences between two XML documents.
+
+    Elements are matched by tag plus a key attribute (KEY_ATTRIBUTES) or,
+    failing that, their position among same-tag siblings, so reordering
+    keyed elements or reformatting the file produces no changes. Each
+    change has an op (added, removed, changed) and an XPath-like path;
+    changed elements list their [old, new] attribute values and text.
+    """
+    if old == new:
+        return []
+    old_root, new_root = _parse(old), _parse(new)
+    root = f"/{etree.QName(new_root).localname}"
+    if etree.QName(old_root).localname != etree.QName(new_root).localname:
+        return [{"op": "changed", "path": "/", "root": [etree.QName(old_root).localname, etree.QName(new_root).localname]}]
+    changes: List[Dict[str, Any]] = []
+    _diff(old_root, new_root, root, changes)
+    return changes
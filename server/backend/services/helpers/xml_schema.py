@@ -0,0 +1,57 @@
+# backend/services/helpers/xml_schema.py
+
+import os
+import threading
+from lxml import etree
+from typing import Any, Dict, List, Tuple
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# How many schema errors are reported for one document
+MAX_REPORTED_ERRORS = 20
+
+# Compiled XSDs keyed by path, recompiled only when the schema file changes
+_schema_cache: Dict[str, Tuple[int, etree.XMLSchema]] = {}
+_schema_lock = threading.Lock()
+_validate_lock = threading.Lock()
+
+def get_cached_schema(schema_path: str) -> etree.XMLSchema:
+    """Return the compiled schema for schema_path, compiling it at most once per mtime."""
+    mtime = os.stat(schema_path).st_mtime_ns
+    with _schema_lock:
+        cached = _schema_cache.get(schema_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        schema = etree.XMLSchema(etree.parse(schema_path))
+        _schema_cache[schema_path] = (mtime, schema)
+        logger.debug(f"Compiled schema: {schema_path}")
+        return schema
+
+def _error_entry(error) -> Dict[str, Any]:
+    return {"line": error.line, "column": error.column, "message": error.message}
+
+def schema_errors(content: str, schema_path: str) -> List[Dict[str, Any]]:
+    """Parse and validate an XML document in memory.
+
+    Returns the syntax or schema errors with their line and column; an
+    empty list means the document is valid.
+    """
+    try:
+        tree = etree.fromstring(content.encode("utf-8"), etree.XMLParser(resolve_entities=False))
+    except etree.XMLSyntaxError as e:
+        return [{"line": e.lineno, "column": e.offset, "message": e.msg}]
+    return tree_errors(tree, schema_path)
+
+def tree_errors(tree, schema_path: str) -> List[Dict[str, Any]]:
+    """Validate an already parsed element or tree; same result shape as schema_errors()."""
+    schema = get_cached_schema(schema_path)
+    # A compiled schema keeps its error log on the instance, so validations take turns
+    with _validate_lock:
+        if schema.validate(tree):
+            return []
+        return [_error_entry(error) for error in list(schema.error_log)[:MAX_REPORTED_ERRORS]]
+
+def format_errors(errors: List[Dict[str, Any]]) -> str:
+    """One-line summary of schema_errors() output."""
+    return "; ".join(f"{error['message']} (line {error['line']}, column {error['column']})" for error in errors)
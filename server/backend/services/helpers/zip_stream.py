@@ -0,0 +1,309 @@
+# backend/services/helpers/zip_stream.py
+
+import io
+import os
+import time
+import zlib
+import struct
+import hashlib
+import zipfile
+import threading
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple
+from backend.config.logging_config import configure_logging
+
+# Setup logging
+logger = configure_logging(__name__)
+
+# Read source files in 1MB blocks so memory stays flat regardless of member size
+CHUNK_SIZE = 1024 * 1024
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, non-seekable sink that collects bytes until they are drained.
+
+    Because it cannot seek, zipfile writes local headers followed by data
+    descriptors, which lets the archive be produced front to back.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class ZipStream:
+    """Build a ZIP archive incrementally and yield it as byte chunks."""
+
+    def __init__(self, compression: int = zipfile.ZIP_STORED, chunk_size: int = CHUNK_SIZE):
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self._sink = _ChunkBuffer()
+        self._zip = zipfile.ZipFile(self._sink, mode='w', compression=compression, allowZip64=True)
+
+    def add_file(self, source_path: str, arcname: str, compression: Optional[int] = None) -> Iterator[bytes]:
+        """Stream a file from disk into the archive."""
+        zinfo = zipfile.ZipInfo.from_file(source_path, arcname)
+        zinfo.compress_type = self.compression if compression is None else compression
+        with open(source_path, 'rb') as src, self._zip.open(zinfo, mode='w') as dest:
+            while True:
+                block = src.read(self.chunk_size)
+                if not block:
+                    break
+                dest.write(block)
+                yield self._sink.drain()
+        yield self._sink.drain()
+
+    def add_bytes(self, data: bytes, arcname: str, compression: Optional[int] = None) -> Iterator[bytes]:
+        """Write an in-memory member (e.g. generated XML) into the archive."""
+        zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime()[:6])
+        zinfo.compress_type = self.compression if compression is None else compression
+        zinfo.external_attr = 0o644 << 16
+        self._zip.writestr(zinfo, data)
+        yield self._sink.drain()
+
+    def close(self) -> Iterator[bytes]:
+        """Write the central directory and yield the remaining bytes."""
+        self._zip.close()
+        yield self._sink.drain()
+
+
+def stream_files_as_zip(
+    files: Iterable[Tuple[str, str]],
+    compression: int = zipfile.ZIP_STORED,
+    chunk_size: int = CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of (source_path, arcname) pairs chunk by chunk.
+
+    Files that disappear between selection and streaming are skipped rather
+    than aborting a response that has already started.
+    """
+    stream = ZipStream(compression=compression, chunk_size=chunk_size)
+    for source_path, arcname in files:
+        if not os.path.isfile(source_path):
+            logger.warning(f"Skipping missing file while streaming archive: {source_path}")
+            continue
+        for chunk in stream.add_file(source_path, arcname):
+            if chunk:
+                yield chunk
+    for chunk in stream.close():
+        if chunk:
+            yield chunk
+
+
+# ============================================================================
+# Seekable stored archives
+# ============================================================================
+_ZIP64_LIMIT = 0xFFFFFFFF
+_UTF8_FLAG = 0x800
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+# CRCs of files already streamed once, keyed by (path, size, mtime_ns), so a
+# resumed range does not have to re-read everything before it
+_crc_cache: 'OrderedDict[Tuple[str, int, int], int]' = OrderedDict()
+_CRC_CACHE_SIZE = 4096
+_crc_lock = threading.Lock()
+
+
+def _cached_crc(key: Tuple[str, int, int]) -> Optional[int]:
+    with _crc_lock:
+        crc = _crc_cache.get(key)
+        if crc is not None:
+            _crc_cache.move_to_end(key)
+        return crc
+
+
+def _store_crc(key: Tuple[str, int, int], crc: int) -> None:
+    with _crc_lock:
+        _crc_cache[key] = crc
+        _crc_cache.move_to_end(key)
+        while len(_crc_cache) > _CRC_CACHE_SIZE:
+            _crc_cache.popitem(last=False)
+
+
+def _dos_datetime(timestamp: float) -> Tuple[int, int]:
+    t = time.localtime(timestamp)
+    year = max(t.tm_year, 1980)
+    return (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2), ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+
+
+class _StoredEntry:
+    """Layout of one uncompressed member: local header, file data, data descriptor."""
+
+    def __init__(self, source_path: str, arcname: str, offset: int):
+        st = os.stat(source_path)
+        self.source_path = source_path
+        self.name = arcname.encode('utf-8')
+        self.size = st.st_size
+        self.key = (source_path, st.st_size, st.st_mtime_ns)
+        self.dos_time, self.dos_date = _dos_datetime(st.st_mtime)
+        self.offset = offset
+        self.zip64 = self.size >= _ZIP64_LIMIT
+
+        extra = struct.pack('<HHQQ', 0x0001, 16, self.size, self.size) if self.zip64 else b''
+        stored_size = _ZIP64_LIMIT if self.zip64 else self.size
+        self.local_header = struct.pack(
+            '<IHHHHHIIIHH', 0x04034b50, 45 if self.zip64 else 20, _UTF8_FLAG | _DATA_DESCRIPTOR_FLAG, 0,
+            self.dos_time, self.dos_date, 0, stored_size, stored_size, len(self.name), len(extra)
+        ) + self.name + extra
+        self.descriptor_length = 24 if self.zip64 else 16
+        zip64_fields = (2 if self.zip64 else 0) + (1 if offset >= _ZIP64_LIMIT else 0)
+        self.central_length = 46 + len(self.name) + (4 + 8 * zip64_fields if zip64_fields else 0)
+        self.data_offset = offset + len(self.local_header)
+        self.end = self.data_offset + self.size + self.descriptor_length
+
+    def crc(self) -> int:
+        """CRC-32 of the source, from the cache or by reading the file once."""
+        crc = _cached_crc(self.key)
+        if crc is None:
+            crc = 0
+            with open(self.source_path, 'rb') as f:
+                while True:
+                    block = f.read(CHUNK_SIZE)
+                    if not block:
+                        break
+                    crc = zlib.crc32(block, crc)
+            _store_crc(self.key, crc)
+        return crc
+
+    def descriptor(self, crc: int) -> bytes:
+        if self.zip64:
+            return struct.pack('<IIQQ', 0x08074b50, crc, self.size, self.size)
+        return struct.pack('<IIII', 0x08074b50, crc, self.size, self.size)
+
+    def central_record(self) -> bytes:
+        extra_fields = []
+        if self.zip64:
+            extra_fields += [self.size, self.size]
+        if self.offset >= _ZIP64_LIMIT:
+            extra_fields.append(self.offset)
+        extra = struct.pack(f'<HH{len(extra_fields)}Q', 0x0001, 8 * len(extra_fields), *extra_fields) if extra_fields else b''
+        stored_size = _ZIP64_LIMIT if self.zip64 else self.size
+        return struct.pack(
+            '<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | 45, 45 if extra_fields else 20,
+            _UTF8_FLAG | _DATA_DESCRIPTOR_FLAG, 0, self.dos_time, self.dos_date, self.crc(),
+            stored_size, stored_size, len(self.name), len(extra), 0, 0, 0,
+            (0o100644 << 16), min(self.offset, _ZIP64_LIMIT)
+        ) + self.name + extra
+
+
+class StoredZipArchive:
+    """An uncompressed ZIP of existing files whose byte layout is known up front.
+
+    Every header is derived from file names, sizes and mtimes, so the total
+    length is known before any data is read and any byte range can be
+    produced on its own. That is what lets a client resume a multi-gigabyte
+    download with an HTTP Range request. CRCs are only needed for the data
+    descriptors and central directory and are computed while streaming.
+    """
+
+    def __init__(self, files: Iterable[Tuple[str, str]], chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.entries: List[_StoredEntry] = []
+        offset = 0
+        for source_path, arcname in files:
+            entry = _StoredEntry(source_path, arcname, offset)
+            self.entries.append(entry)
+            offset = entry.end
+        self.central_offset = offset
+        self.central_size = sum(entry.central_length for entry in self.entries)
+        self.zip64_end = (
+            len(self.entries) >= 0xFFFF
+            or self.central_offset >= _ZIP64_LIMIT
+            or self.central_size >= _ZIP64_LIMIT
+        )
+        self.size = self.central_offset + self.central_size + (56 + 20 if self.zip64_end else 0) + 22
+
+    @property
+    def etag(self) -> str:
+        digest = hashlib.sha1()
+        for entry in self.entries:
+            digest.update(repr((entry.name, entry.key)).encode())
+        return '"' + digest.hexdigest() + '"'
+
+    def _end_records(self) -> bytes:
+        count = len(self.entries)
+        records = b''
+        if self.zip64_end:
+            zip64_offset = self.central_offset + self.central_size
+            records += struct.pack(
+                '<IQHHIIQQQQ', 0x06064b50, 44, 45, 45, 0, 0, count, count, self.central_size, self.central_offset
+            )
+            records += struct.pack('<IIQI', 0x07064b50, 0, zip64_offset, 1)
+        records += struct.pack(
+            '<IHHHHIIH', 0x06054b50, 0, 0, min(count, 0xFFFF), min(count, 0xFFFF),
+            min(self.central_size, _ZIP64_LIMIT), min(self.central_offset, _ZIP64_LIMIT), 0
+        )
+        return records
+
+    def _read_file(self, entry: _StoredEntry, start: int, stop: int) -> Iterator[bytes]:
+        """Yield entry data bytes [start, stop), computing the CRC when the whole file passes through."""
+        crc = 0 if start == 0 and _cached_crc(entry.key) is None else None
+        with open(entry.source_path, 'rb') as f:
+            f.seek(start)
+            position = start
+            while position < stop:
+                block = f.read(min(self.chunk_size, stop - position))
+                if not block:
+                    raise IOError(f"{entry.source_path} shrank while streaming")
+                if crc is not None:
+                    crc = zlib.crc32(block, crc)
+                position += len(block)
+                yield block
+        if crc is not None and stop == entry.size:
+            _store_crc(entry.key, crc)
+
+    def iter_range(self, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield archive bytes [start, end] inclusive."""
+        end = self.size - 1 if end is None else end
+        stop = end + 1
+
+        def clip(segment_start: int, data: bytes) -> bytes:
+            lo = max(start, segment_start) - segment_start
+            hi = min(stop, segment_start + len(data)) - segment_start
+            return data[lo:hi] if hi > lo else b''
+
+        for entry in self.entries:
+            if entry.end <= start:
+                continue
+            if entry.offset >= stop:
+                return
+            header = clip(entry.offset, entry.local_header)
+            if header:
+                yield header
+            data_start = max(start, entry.data_offset) - entry.data_offset
+            data_stop = min(stop, entry.data_offset + entry.size) - entry.data_offset
+            if data_stop > data_start:
+                yield from self._read_file(entry, data_start, data_stop)
+            descriptor_offset = entry.data_offset + entry.size
+            if descriptor_offset < stop and entry.end > start:
+                descriptor = clip(descriptor_offset, entry.descriptor(entry.crc()))
+                if descriptor:
+                    yield descriptor
+
+        if stop <= self.central_offset:
+            return
+        position = self.central_offset
+        for entry in self.entries:
+            # Records before the range are skipped without computing their CRC
+            if position + entry.central_length > start:
+                chunk = clip(position, entry.central_record())
+                if chunk:
+                    yield chunk
+            position += entry.central_length
+            if position >= stop:
+                return
+        chunk = clip(position, self._end_records())
+        if chunk:
+            yield chunk
@@ -0,0 +1,487 @@
+# ============================================================================
+# Imports
+# ============================================================================
+import os
+import time
+import base64
+import bisect
+import asyncio
+import hashlib
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Set, Tuple
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from backend.services.helpers.directories import DirectoryHelper
+from backend.services.helpers.process_pool import process_pool, MAX_POOL_WORKERS
+from backend.services.scripts.cert_manager.user_auth_file import get_user_auth_store
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Below this many changed files parsing inline is cheaper than starting workers
+PARALLEL_PARSE_THRESHOLD = 256
+# Coalesce bursts of filesystem events (e.g. makeCert.sh writing 6 files)
+WATCH_DEBOUNCE_SECONDS = 0.5
+
+_PEM_BEGIN = b"-----BEGIN CERTIFICATE-----"
+_PEM_END = b"-----END CERTIFICATE-----"
+
+# X.509 attribute type OIDs rendered in subject/issuer strings
+_NAME_OIDS = {
+    "2.5.4.3": "CN",
+    "2.5.4.6": "C",
+    "2.5.4.7": "L",
+    "2.5.4.8": "ST",
+    "2.5.4.10": "O",
+    "2.5.4.11": "OU",
+    "1.2.840.113549.1.9.1": "emailAddress",
+}
+
+# ============================================================================
+# DER / PEM Parsing (module level so worker processes can pickle it)
+# ============================================================================
+def _read_tlv(data: bytes, offset: int) -> Tuple[int, int, int]:
+    """Read a DER TLV at offset and return (tag, value_start, value_end)."""
+    tag = data[offset]
+    length = data[offset + 1]
+    offset += 2
+    if length & 0x80:
+        num_bytes = length & 0x7F
+        length = int.from_bytes(data[offset:offset + num_bytes], "big")
+        offset += num_bytes
+    return tag, offset, offset + length
+
+def _children(data: bytes, start: int, end: int) -> List[Tuple[int, int, int]]:
+    """List the TLVs contained in a constructed value."""
+    items = []
+    while start < end:
+        tag, value_start, value_end = _read_tlv(data, start)
+        items.append((tag, value_start, value_end))
+        start = value_end
+    return items
+
+def _decode_oid(value: bytes) -> str:
+    parts = [value[0] // 40, value[0] % 40]
+    current = 0
+    for byte in value[1:]:
+        current = (current << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            parts.append(current)
+            current = 0
+    return ".".join(str(part) for part in parts)
+
+def _decode_name(data: bytes, start: int, end: int) -> str:
+    """Render an X.509 Name as a comma separated RDN string."""
+    rdns = []
+    for _, set_start, set_end in _children(data, start, end):
+        for _, attr_start, attr_end in _children(data, set_start, set_end):
+            (_, oid_start, oid_end), (_, val_start, val_end) = _children(data, attr_start, attr_end)[:2]
+            oid = _decode_oid(data[oid_start:oid_end])
+            value = data[val_start:val_end].decode("utf-8", errors="replace")
+            rdns.append(f"{_NAME_OIDS.get(oid, oid)}={value}")
+    return ",".join(rdns)
+
+def _decode_time(tag: int, value: bytes) -> float:
+    """Decode UTCTime (0x17) or GeneralizedTime (0x18) to a UTC timestamp."""
+    text = value.decode("ascii").rstrip("Z")
+    if tag == 0x17:
+        year = int(text[:2])
+        text = f"{1900 + year if year >= 50 else 2000 + year}{text[2:]}"
+    return datetime.strptime(text[:14], "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc).timestamp()
+
+def parse_certificate_der(der: bytes) -> Dict[str, Any]:
+    """Extract subject, issuer, serial, validity and SHA-256 fingerprint from a DER certificate."""
+    _, cert_start, cert_end = _read_tlv(der, 0)
+    _, tbs_start, tbs_end = _read_tlv(der, cert_start)
+    fields = _children(der, tbs_start, tbs_end)
+
+    # Skip the optional explicit [0] version tag
+    if fields[0][0] == 0xA0:
+        fields = fields[1:]
+
+    serial = fields[0]
+    issuer = fields[2]
+    validity = _children(der, fields[3][1], fields[3][2])
+    subject = fields[4]
+
+    not_before = _decode_time(validity[0][0], der[validity[0][1]:validity[0][2]])
+    not_after = _decode_time(validity[1][0], der[validity[1][1]:validity[1][2]])
+    digest = hashlib.sha256(der).hexdigest().upper()
+
+    return {
+        "subject": _decode_name(der, subject[1], subject[2]),
+        "issuer": _decode_name(der, issuer[1], issuer[2]),
+        "serial": der[serial[1]:serial[2]].hex().upper(),
+        "notBefore": not_before,
+        "notAfter": not_after,
+        "fingerprint": ":".join(digest[i:i + 2] for i in range(0, len(digest), 2)),
+    }
+
+def parse_certificate_file(path: str) -> Optional[Dict[str, Any]]:
+    """Parse the first certificate of a PEM file, returning None if it holds none."""
+    try:
+        with open(path, "rb") as f:
+            content = f.read()
+        begin = content.find(_PEM_BEGIN)
+        end = content.find(_PEM_END, begin)
+        if begin == -1 or end == -1:
+            return None
+        der = base64.b64decode(b"".join(content[begin + len(_PEM_BEGIN):end].split()))
+        return parse_certificate_der(der)
+    except Exception as e:
+        logger.warning(f"Failed to parse certificate {path}: {str(e)}")
+        return None
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+# ============================================================================
+# Directory Watch
+# ============================================================================
+class _CertDirectoryHandler(FileSystemEventHandler):
+    """Forward certificate file changes from the watchdog thread to the inventory."""
+
+    def __init__(self, inventory: "CertInventory"):
+        self.inventory = inventory
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (getattr(event, "src_path", None), getattr(event, "dest_path", None)):
+            if path and (CertInventory.is_certificate_file(path) or path.endswith(".p12")):
+                self.inventory.mark_dirty(path)
+
+# ============================================================================
+# CertInventory Class
+# ============================================================================
+class CertInventory:
+    """In-memory index of the PEM certificates in certs/files.
+
+    The directory is scanned once and then kept current from a watchdog
+    observer, so only added, changed or removed files are re-parsed.
+    """
+
+    def __init__(self):
+        self.directory_helper = DirectoryHelper()
+        self._cert_dir: Optional[str] = None
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._by_fingerprint: Dict[str, str] = {}
+        self._identifiers: Set[str] = set()
+        # Identifiers with a .p12 beside their .pem, kept current from the directory watch
+        self._p12: Set[str] = set()
+        # Bumped whenever entries change; keys the users-without-certs cache
+        self._generation = 0
+        self._missing_users: Optional[Tuple[Any, int, List[Dict[str, Any]]]] = None
+        self._expiry_keys: List[float] = []
+        self._expiry_paths: List[str] = []
+        self._expiry_dirty = True
+        self._users: Dict[str, Dict[str, Any]] = {}
+        self._users_by_fingerprint: Dict[str, Dict[str, Any]] = {}
+        self._users_document = None
+        self._dirty: set = set()
+        self._dirty_lock = threading.Lock()
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._observer: Optional[Observer] = None
+        self._watch_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._last_scan: Optional[float] = None
+# ============================================================================
+# Lifecycle
+# ============================================================================
+    @staticmethod
+    def is_certificate_file(path: str) -> bool:
+        """Client and server certificates are the .pem files, minus the truststores."""
+        name = os.path.basename(path)
+        return name.endswith(".pem") and not name.endswith("-trusted.pem")
+
+    async def ensure_ready(self) -> None:
+        """Scan and start watching the certificate directory for the installed version."""
+        cert_dir = self.directory_helper.get_cert_directory()
+        if cert_dir == self._cert_dir and self._last_scan is not None:
+            await self._apply_pending()
+            return
+
+        async with self._lock:
+            if cert_dir == self._cert_dir and self._last_scan is not None:
+                return
+            self.stop()
+            self._reset(cert_dir)
+            await self._full_scan()
+            self._start_watch()
+
+    def _reset(self, cert_dir: str) -> None:
+        self._cert_dir = cert_dir
+        self._entries.clear()
+        self._stats.clear()
+        self._by_fingerprint.clear()
+        self._identifiers.clear()
+        self._p12.clear()
+        self._missing_users = None
+        self._expiry_keys, self._expiry_paths = [], []
+        self._expiry_dirty = True
+        self._users, self._users_by_fingerprint = {}, {}
+        self._users_document = None
+        self._last_scan = None
+
+    def _start_watch(self) -> None:
+        if not os.path.isdir(self._cert_dir):
+            logger.debug(f"Certificate directory not present, skipping watch: {self._cert_dir}")
+            return
+        self._loop = asyncio.get_running_loop()
+        self._dirty_event = asyncio.Event()
+        self._observer = Observer()
+        self._observer.schedule(_CertDirectoryHandler(self), self._cert_dir, recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        self._watch_task = asyncio.create_task(self._watch_loop())
+        logger.info(f"Watching certificate directory: {self._cert_dir}")
+
+    def stop(self) -> None:
+        """Stop the directory watch."""
+        if self._observer:
+            self._observer.stop()
+            self._observer = None
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+    def mark_dirty(self, path: str) -> None:
+        """Record a changed path; called from the watchdog thread."""
+        with self._dirty_lock:
+            self._dirty.add(path)
+        if self._loop and self._dirty_event:
+            self._loop.call_soon_threadsafe(self._dirty_event.set)
+
+    async def _watch_loop(self) -> None:
+        while True:
+            try:
+                await self._dirty_event.wait()
+                await asyncio.sleep(WATCH_DEBOUNCE_SECONDS)
+                self._dirty_event.clear()
+                await self._apply_pending()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error refreshing certificate inventory: {str(e)}")
+# ============================================================================
+# Indexing
+# ============================================================================
+    async def _full_scan(self) -> None:
+        """Index every certificate file, re-parsing only those whose stat changed."""
+        start = time.perf_counter()
+        current, p12 = await asyncio.get_running_loop().run_in_executor(None, self._scan_directory, self._cert_dir)
+        self._p12 = p12
+
+        for path in set(self._stats) - set(current):
+            self._remove(path)
+
+        changed = [
+            path for path, st in current.items()
+            if self._stats.get(path) != (st.st_mtime_ns, st.st_size)
+        ]
+        await self._parse_and_store(changed)
+        self._last_scan = time.time()
+        logger.info(
+            f"Indexed {len(self._entries)} certificates ({len(changed)} parsed) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    @classmethod
+    def _scan_directory(cls, cert_dir: str) -> Tuple[Dict[str, os.stat_result], Set[str]]:
+        """Stats of the certificate files and the identifiers that have a .p12."""
+        current, p12 = {}, set()
+        if os.path.isdir(cert_dir):
+            with os.scandir(cert_dir) as it:
+                for entry in it:
+                    if not entry.is_file():
+                        continue
+                    if cls.is_certificate_file(entry.name):
+                        current[entry.path] = entry.stat()
+                    elif entry.name.endswith(".p12"):
+                        p12.add(entry.name[:-len(".p12")])
+        return current, p12
+
+    async def _apply_pending(self) -> None:
+        """Re-index the files reported by the directory watch."""
+        with self._dirty_lock:
+            paths, self._dirty = self._dirty, set()
+        if not paths:
+            return
+
+        changed = []
+        for path in paths:
+            if path.endswith(".p12"):
+                identifier = os.path.basename(path)[:-len(".p12")]
+                if os.path.exists(path):
+                    self._p12.add(identifier)
+                else:
+                    self._p12.discard(identifier)
+                continue
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._remove(path)
+                continue
+            if self._stats.get(path) != (st.st_mtime_ns, st.st_size):
+                changed.append(path)
+        await self._parse_and_store(changed)
+        logger.debug(f"Certificate inventory refreshed for {len(paths)} changed files")
+
+    async def _parse_and_store(self, paths: List[str]) -> None:
+        if not paths:
+            return
+        loop = asyncio.get_running_loop()
+        if len(paths) < PARALLEL_PARSE_THRESHOLD:
+            results = await loop.run_in_executor(None, lambda: [parse_certificate_file(p) for p in paths])
+        else:
+            results = await loop.run_in_executor(None, self._parse_in_pool, paths)
+
+        for path, parsed in zip(paths, results):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                self._remove(path)
+                continue
+            self._remove(path)
+            self._stats[path] = (st.st_mtime_ns, st.st_size)
+            if parsed is None:
+                continue
+            identifier = os.path.basename(path)[:-len(".pem")]
+            parsed["identifier"] = identifier
+            parsed["path"] = path
+            self._entries[path] = parsed
+            self._by_fingerprint[parsed["fingerprint"]] = path
+            self._identifiers.add(identifier)
+        self._expiry_dirty = True
+        self._generation += 1
+
+    @staticmethod
+    def _parse_in_pool(paths: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Fan a large scan out across worker processes."""
+        workers = max(1, min(os.cpu_count() or 1, MAX_POOL_WORKERS))
+        chunksize = max(1, len(paths) // (workers * 4))
+        with process_pool(len(paths), workers) as pool:
+            return list(pool.map(parse_certificate_file, paths, chunksize=chunksize))
+
+    def _remove(self, path: str) -> None:
+        self._stats.pop(path, None)
+        entry = self._entries.pop(path, None)
+        if entry:
+            if self._by_fingerprint.get(entry["fingerprint"]) == path:
+                del self._by_fingerprint[entry["fingerprint"]]
+            self._identifiers.discard(entry["identifier"])
+            self._expiry_dirty = True
+            self._generation += 1
+
+    def _expiry_index(self) -> Tuple[List[float], List[str]]:
+        """notAfter timestamps and paths sorted by expiry, rebuilt lazily after changes."""
+        if self._expiry_dirty:
+            ordered = sorted((entry["notAfter"], path) for path, entry in self._entries.items())
+            self._expiry_keys = [not_after for not_after, _ in ordered]
+            self._expiry_paths = [path for _, path in ordered]
+            self._expiry_dirty = False
+        return self._expiry_keys, self._expiry_paths
+# ============================================================================
+# User Join
+# ============================================================================
+    def _load_users(self) -> Dict[str, Dict[str, Any]]:
+        """Read UserAuthenticationFile.xml users, rebuilding the join only when it changes."""
+        store = get_user_auth_store(self.directory_helper.get_tak_directory())
+        if not os.path.exists(store.config_path):
+            self._users, self._users_by_fingerprint, self._users_document = {}, {}, None
+            return self._users
+
+        document = store.current()
+        if document is self._users_document:
+            return self._users
+
+        users = {user['identifier']: user for user in document.list_users()}
+        self._users, self._users_document = users, document
+        self._users_by_fingerprint = {u['fingerprint']: u for u in users.values() if u['fingerprint']}
+        return users
+
+    def _serialize(self, path: str, users: Dict[str, Dict[str, Any]], now: float) -> Dict[str, Any]:
+        entry = self._entries[path]
+        # Users registered by fingerprint may not share the file name
+        user = users.get(entry["identifier"]) or self._users_by_fingerprint.get(entry["fingerprint"])
+        return {
+            'identifier': entry["identifier"],
+            'subject': entry["subject"],
+            'issuer': entry["issuer"],
+            'serial': entry["serial"],
+            'fingerprint': entry["fingerprint"],
+            'notBefore': _iso(entry["notBefore"]),
+            'notAfter': _iso(entry["notAfter"]),
+            'daysRemaining': int((entry["notAfter"] - now) // 86400),
+            'expired': entry["notAfter"] < now,
+            'hasP12': entry["identifier"] in self._p12,
+            'registered': user is not None,
+            'role': user['role'] if user else None,
+            'groups': user['groups'] if user else [],
+        }
+
+# ============================================================================
+# Queries
+# ============================================================================
+    async def get_certificate(self, identifier: str) -> Optional[Dict[str, Any]]:
+        await self.ensure_ready()
+        path = os.path.join(self._cert_dir, f"{identifier}.pem")
+        if path not in self._entries:
+            return None
+        return self._serialize(path, self._load_users(), time.time())
+
+    async def expiring_within(self, days: int, include_expired: bool = False) -> List[Dict[str, Any]]:
+        """Certificates whose notAfter falls within the next `days` days, soonest first."""
+        await self.ensure_ready()
+        now = time.time()
+        keys, paths = self._expiry_index()
+        lower = 0 if include_expired else bisect.bisect_left(keys, now)
+        upper = bisect.bisect_right(keys, now + days * 86400)
+        users = self._load_users()
+        return [self._serialize(path, users, now) for path in paths[lower:upper]]
+
+    async def users_without_certs(self) -> List[Dict[str, Any]]:
+        """Registered users with neither a matching certificate file nor fingerprint.
+
+        Enrollment (password) users have no certificate by design and are excluded.
+        """
+        await self.ensure_ready()
+        users = self._load_users()
+        cached = self._missing_users
+        if cached and cached[0] is self._users_document and cached[1] == self._generation:
+            return cached[2]
+        missing = [
+            user for user in users.values()
+            if user['fingerprint'] is not None
+            and user['identifier'] not in self._identifiers
+            and user['fingerprint'] not in self._by_fingerprint
+        ]
+        self._missing_users = (self._users_document, self._generation, missing)
+        return missing
+
+    async def certs_without_users(self) -> List[Dict[str, Any]]:
+        """Certificate files that are not registered in UserAuthenticationFile.xml."""
+        await self.ensure_ready()
+        users = self._load_users()
+        now = time.time()
+        return [
+            self._serialize(path, users, now) for path, entry in self._entries.items()
+            if entry["identifier"] not in users and entry["fingerprint"] not in self._users_by_fingerprint
+        ]
+
+    async def summary(self) -> Dict[str, Any]:
+        await self.ensure_ready()
+        now = time.time()
+        keys, _ = self._expiry_index()
+        expired = bisect.bisect_left(keys, now)
+        within_30 = bisect.bisect_right(keys, now + 30 * 86400) - expired
+        return {
+            'total': len(self._entries),
+            'expired': expired,
+            'expiringWithin30Days': within_30,
+            'usersWithoutCerts': len(await self.users_without_certs()),
+            'lastScan': self._last_scan,
+        }
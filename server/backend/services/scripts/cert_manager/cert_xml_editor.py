@@ -1,7 +1,7 @@
-import os
 from lxml import etree
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, List
 from backend.services.helpers.directories import DirectoryHelper
+from backend.services.scripts.cert_manager.user_auth_file import get_user_auth_store, UserAuthDocument
 from backend.config.logging_config import configure_logging
 import hashlib
 
@@ -21,10 +21,11 @@ class CertConfigManager:
         self.tak_path = self.directory_helper.get_tak_directory()  # Let it use the version from get_takserver_version()
         logger.debug(f"TAK Path: {self.tak_path}")  # Debugging path
         
-        self.config_path = os.path.join(self.tak_path, "UserAuthenticationFile.xml")
+        self.store = get_user_auth_store(self.tak_path)
+        self.config_path = self.store.config_path
         logger.debug(f"Config Path: {self.config_path}")  # Debugging path
         
-        self.schema_path = os.path.join(self.tak_path, "UserAuthenticationFile.xsd")
+        self.schema_path = self.store.schema_path
         logger.debug(f"Schema Path: {self.schema_path}")  # Debugging path
         
         self.namespace = {"ns": "http://bbn.com/marti/xml/bindings"}
@@ -34,19 +35,14 @@ class CertConfigManager:
         """Read the configuration for a specific certificate"""
         self._initialize_paths()  # Initialize paths before operation
         try:
-            parser = etree.XMLParser(remove_blank_text=True)
-            tree = etree.parse(self.config_path, parser)
-            root = tree.getroot()
+            # Look the user up in the cached, identifier-indexed document
+            content = self.store.current().user_xml(identifier)
             
-            # Find the user element with matching identifier
-            user_elem = root.find(f".//ns:User[@identifier='{identifier}']", self.namespace)
-            
-            if user_elem is None:
+            if content is None:
                 logger.error(f"Certificate with identifier {identifier} not found")
                 raise Exception(f"Certificate with identifier {identifier} not found")
             
-            # Convert element to string
-            return etree.tostring(user_elem, encoding='unicode', pretty_print=True)
+            return content
         except Exception as e:
             logger.error(f"Error reading certificate configuration: {str(e)}")
             raise Exception(f"Error reading certificate configuration: {str(e)}")
@@ -55,53 +51,24 @@ class CertConfigManager:
         """Validate certificate configuration XML against schema by validating the entire file with changes"""
         self._initialize_paths()  # Initialize paths before operation
         try:
-            # Load and parse schema
-            schema_doc = etree.parse(self.schema_path)
-            schema = etree.XMLSchema(schema_doc)
-            
-            # Parse the main config file with the schema namespace
-            parser = etree.XMLParser(remove_blank_text=True, schema=schema)
-            tree = etree.parse(self.config_path, parser)
-            root = tree.getroot()
-            
-            # Find the user element to update
-            user_elem = root.find(f".//ns:User[@identifier='{identifier}']", self.namespace)
-            if user_elem is None:
+            if identifier not in self.store.current():
                 logger.error(f"Certificate with identifier {identifier} not found")
                 return False, f"Certificate with identifier {identifier} not found"
             
             try:
-                # Parse the new certificate config
                 new_elem = etree.fromstring(config)
             except etree.XMLSyntaxError as e:
                 logger.error(f"Invalid XML format in new configuration: {str(e)}")
                 return False, f"Invalid XML format in new configuration: {str(e)}"
             
-            # Create a copy of the tree for validation
-            validation_tree = etree.ElementTree(root)
-            validation_root = validation_tree.getroot()
-            
-            # Find and replace the user element in the validation tree
-            validation_user = validation_root.find(f".//ns:User[@identifier='{identifier}']", self.namespace)
-            if validation_user is None:
-                logger.error("Invalid XML structure")
-                return False, "Invalid XML structure"
-            
-            # Replace the old element with the new one
-            parent = validation_user.getparent()
-            if parent is None:
-                logger.error("Invalid XML structure")
-                return False, "Invalid XML structure"
-            
-            parent.replace(validation_user, new_elem)
-            
+            # Validated through a draft so the cached document is untouched
             try:
-                # Validate against schema
-                schema.assertValid(validation_tree)
-                return True, ""
-            except etree.DocumentInvalid as e:
-                logger.error(f"Document invalid: {str(e)}")
-                return False, str(e)
+                is_valid, error_msg = self.store.validate_user(identifier, new_elem)
+            except KeyError:
+                return False, f"Certificate with identifier {identifier} not found"
+            if not is_valid:
+                logger.error(f"Document invalid: {error_msg}")
+            return is_valid, error_msg
             
         except etree.XMLSyntaxError as e:
             logger.error(f"XML Syntax Error: {str(e)}")
@@ -114,47 +81,92 @@ class CertConfigManager:
         """Update the configuration for a specific certificate"""
         self._initialize_paths()  # Initialize paths before operation
         try:
-            # Validate first with the complete file context
-            is_valid, error_msg = self.validate_cert_config(new_config, identifier)
-            if not is_valid:
-                logger.error(f"Invalid configuration: {error_msg}")
-                raise Exception(f"Invalid configuration: {error_msg}")
-            
-            # Parse the main config file
-            parser = etree.XMLParser(remove_blank_text=True)
-            tree = etree.parse(self.config_path, parser)
-            root = tree.getroot()
-            
-            # Find the user element to update
-            user_elem = root.find(f".//ns:User[@identifier='{identifier}']", self.namespace)
-            if user_elem is None:
-                logger.error(f"Certificate with identifier {identifier} not found")
-                raise Exception(f"Certificate with identifier {identifier} not found")
-            
             # Parse the new configuration
-            new_elem = etree.fromstring(new_config)
+            try:
+                new_elem = etree.fromstring(new_config)
+            except etree.XMLSyntaxError as e:
+                raise Exception(f"Invalid configuration: Invalid XML format in new configuration: {str(e)}")
             
             # Ensure the identifier hasn't been changed
             if new_elem.get('identifier') != identifier:
                 logger.error("Certificate identifier cannot be changed")
                 raise Exception("Certificate identifier cannot be changed")
             
-            # Replace the old element with the new one
-            parent = user_elem.getparent()
-            if parent is None:
-                logger.error("Invalid XML structure")
-                raise Exception("Invalid XML structure")
-            
-            parent.replace(user_elem, new_elem)
-            
-            # Write the updated configuration
-            tree.write(self.config_path, encoding='UTF-8', xml_declaration=True, pretty_print=True)
+            # Only this user is re-indexed; the file is validated once and atomically replaced
+            try:
+                self.store.replace_user(identifier, new_elem)
+            except KeyError:
+                raise Exception(f"Certificate with identifier {identifier} not found")
             return True
             
         except Exception as e:
             logger.error(f"Error updating certificate configuration: {str(e)}")
             raise Exception(f"Error updating certificate configuration: {str(e)}")
 
+    @staticmethod
+    def _group_diff(document: UserAuthDocument, change: Dict[str, Any]) -> Tuple[List[str], List[str], List[str]]:
+        """Return (desired, added, removed) groups for one membership change."""
+        current = document.user_groups(change['identifier'])
+
+        if change.get('groups') is not None:
+            desired = list(dict.fromkeys(change['groups']))
+        else:
+            removed = set(change.get('remove') or [])
+            desired = [group for group in current if group not in removed]
+            desired += [group for group in dict.fromkeys(change.get('add') or []) if group not in desired]
+
+        added = [group for group in desired if group not in current]
+        dropped = [group for group in current if group not in desired]
+        return desired, added, dropped
+
+    def bulk_update_groups(self, changes: List[Dict[str, Any]], dry_run: bool = False) -> Dict[str, Any]:
+        """Apply group membership changes for many users in one validated rewrite.
+
+        Each change names a user `identifier` and either the exact `groups`
+        it should belong to, or `add`/`remove` lists applied to its current
+        groups. The whole batch is rejected if any user is unknown or the
+        result does not validate, so the file is never partially updated.
+        """
+        self._initialize_paths()  # Initialize paths before operation
+        document = self.store.current()
+
+        unknown = [change['identifier'] for change in changes if change['identifier'] not in document]
+        if unknown:
+            logger.error(f"Unknown users in bulk group update: {', '.join(unknown)}")
+            raise ValueError(f"Unknown users: {', '.join(unknown)}")
+
+        diff = []
+        for change in changes:
+            _, added, dropped = self._group_diff(document, change)
+            if added or dropped:
+                diff.append({
+                    'identifier': change['identifier'],
+                    'added': added,
+                    'removed': dropped
+                })
+
+        result = {
+            'changed': len(diff),
+            'unchanged': len(changes) - len(diff),
+            'diff': diff,
+            'applied': False
+        }
+        if dry_run or not diff:
+            return result
+
+        # TAK Server reloads the file when it changes, so one rename means one reload
+        with self.store.edit() as draft:
+            for change in changes:
+                if change['identifier'] not in draft:
+                    raise ValueError(f"Unknown users: {change['identifier']}")
+                desired, added, dropped = self._group_diff(draft, change)
+                if added or dropped:
+                    draft.set_groups(change['identifier'], desired)
+
+        result['applied'] = True
+        logger.info(f"Applied group changes for {len(diff)} users in a single rewrite")
+        return result
+
     def generate_password_hash(self, password: str) -> str:
         """Generate SHA-256 hash for password with salt"""
         try:
@@ -2,13 +2,14 @@
 # Imports
 # ============================================================================
 import os
-import xml.etree.ElementTree as ET
+import json
+import base64
+from lxml import etree
 from backend.services.helpers.run_command import RunCommand
 from typing import Dict, Any, Optional
 from backend.config.logging_config import configure_logging
-import tempfile
 from backend.services.helpers.directories import DirectoryHelper
-import shutil
+from backend.services.scripts.cert_manager.user_auth_file import get_user_auth_store, UserAuthDocument
 logger = configure_logging(__name__)
 # ============================================================================
 # CertManager Class
@@ -49,44 +50,73 @@ class CertManager:
 # ============================================================================
 # Main Functions
 # ============================================================================
+    def get_user_document(self) -> UserAuthDocument:
+        """Get the cached, identifier-indexed UserAuthenticationFile.xml document."""
+        tak_dir = self.directory_helper.get_tak_directory()
+        store = get_user_auth_store(tak_dir)
+        if not os.path.exists(store.config_path):
+            logger.error(f"Authentication file not found at: {store.config_path}")
+            raise FileNotFoundError(f"Authentication file not found at: {store.config_path}")
+        return store.current()
+
+    async def user_exists(self, username: str) -> bool:
+        """Check whether a user is registered in UserAuthenticationFile.xml."""
+        return username in self.get_user_document()
+
     async def get_registered_certificates(self) -> list:
         """Parse UserAuthenticationFile.xml and return registered certificate information."""
         try:
-            tree = ET.parse(await self.get_auth_file_path())
-            root = tree.getroot()
-            
-            ns = {'ns': 'http://bbn.com/marti/xml/bindings'}
-            certificates = []
-            
-            for user in root.findall('.//ns:User', ns):
-                fingerprint = user.get('fingerprint')
-                cert_info = {
-                    'identifier': user.get('identifier'),
-                    'passwordHashed': user.get('passwordHashed', 'false').lower() == 'true',
-                    'role': user.get('role', ''),
-                    'groups': [],
-                    'fingerprint': fingerprint,  # Include fingerprint in the response
-                    'isEnrollment': fingerprint is None  # Flag as enrollment if no fingerprint
-                }
-                
-                for group in user.findall('.//ns:groupList', ns):
-                    if group.text:
-                        cert_info['groups'].append(group.text.strip())
-                
-                if not cert_info['groups']:
-                    cert_info['groups'].append('__ANON__')
-                
-                certificates.append(cert_info)
-            
-            return certificates
+            return self.get_user_document().list_users()
 
-        except ET.ParseError as e:
+        except FileNotFoundError:
+            raise
+        except etree.XMLSyntaxError as e:
             logger.error("Failed to parse UserAuthenticationFile.xml")
             raise Exception("Failed to parse UserAuthenticationFile.xml")
         except Exception as e:
             logger.error(f"Error reading certificates: {str(e)}")
             raise Exception(f"Error reading certificates: {str(e)}")
 
+    async def get_certificates_page(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        sort: str = 'identifier',
+        order: str = 'asc',
+        group: Optional[str] = None,
+        role: Optional[str] = None,
+        prefix: Optional[str] = None
+    ) -> dict:
+        """Return one sorted, filtered page of registered certificates."""
+        document = self.get_user_document()
+        page = document.page(
+            sort=sort,
+            descending=order == 'desc',
+            group=group,
+            role=role,
+            prefix=prefix,
+            after=self._decode_cursor(cursor) if cursor else None,
+            limit=limit
+        )
+        return {
+            'certificates': page['users'],
+            'total': page['total'],
+            'nextCursor': self._encode_cursor(page['next']) if page['next'] else None,
+            'version': document.version
+        }
+
+    @staticmethod
+    def _encode_cursor(position: tuple) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> tuple:
+        try:
+            value, identifier = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return str(value), str(identifier)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
     async def create_main(self, certificates: list) -> dict:
         """Create multiple certificates in a batch."""
         try:
@@ -200,8 +230,7 @@ class CertManager:
         """Delete a user and their certificates."""
         try:
             # First verify the user exists
-            certificates = await self.get_registered_certificates()
-            if not any(cert['identifier'] == username for cert in certificates):
+            if not await self.user_exists(username):
                 logger.error(f"User {username} not found for deletion.")
                 return False
 
@@ -218,13 +247,13 @@ class CertManager:
             total_certs = len(usernames)
             completed_certs = 0
 
-            # Get initial certificates list
-            certificates = await self.get_registered_certificates()
+            # Get initial user index
+            document = self.get_user_document()
             
             for username in usernames:
                 try:
                     # Verify user exists
-                    if not any(cert['identifier'] == username for cert in certificates):
+                    if username not in document:
                         logger.warning(f"User {username} not found for batch deletion.")
                         continue
 
@@ -251,8 +280,7 @@ class CertManager:
             logger.debug(f"Attempting to create client certificate for user: {username}")
             
             # Check if the user already exists
-            certificates = await self.get_registered_certificates()
-            if any(cert['identifier'] == username for cert in certificates):
+            if await self.user_exists(username):
                 logger.error(f"User {username} already exists.")
                 raise Exception(f"User {username} already exists.")
             
@@ -388,67 +416,28 @@ class CertManager:
 # Download Functions
 # ============================================================================
     async def download_single(self, username: str) -> dict:
-        """Get certificate files for a user"""
+        """Resolve the .p12 file for a user in the bind-mounted certs directory"""
         try:
-            container_name = self.get_container_name()
-            
             # First verify the user exists
-            certificates = await self.get_registered_certificates()
-            if not any(cert['identifier'] == username for cert in certificates):
+            if not await self.user_exists(username):
                 logger.error(f"User {username} not found for download.")
                 return {
                     'success': False,
                     'message': f"User {username} not found"
                 }
 
-            # Check if certificate exists in container
-            verify_command = ["docker", "exec", container_name, "bash", "-c", f"find /opt/tak/certs/files/ -name '{username}.p12' -type f"]
-            result = await self.run_command.run_command_async(
-                command=verify_command,
-                event_type="download",
-                ignore_errors=False
-            )
-
-            if not result.stdout:
+            p12_path = os.path.join(self.get_cert_directory(), f"{username}.p12")
+            if not os.path.isfile(p12_path):
                 logger.error(f"Certificate for user {username} not found.")
                 return {
                     'success': False,
                     'message': f"Certificate for user {username} not found"
                 }
 
-            # Copy file from container to temp location
-            temp_dir = tempfile.mkdtemp()
-            p12_path = os.path.join(temp_dir, f"{username}.p12")
-            
-            copy_command = ["docker", "cp", f"{container_name}:/opt/tak/certs/files/{username}.p12", p12_path]
-            result = await self.run_command.run_command_async(
-                command=copy_command,
-                event_type="download",
-                ignore_errors=False
-            )
-
-            if not result.success or not os.path.exists(p12_path):
-                logger.error(f"Failed to copy certificate for user {username}.")
-                return {
-                    'success': False,
-                    'message': f"Failed to copy certificate for user {username}"
-                }
-
-            # Return file data as bytes
-            with open(p12_path, 'rb') as f:
-                file_data = f.read()
-            
-            # Clean up temp file immediately
-            try:
-                os.remove(p12_path)
-                shutil.rmtree(temp_dir)
-            except Exception as e:
-                logger.warning(f"Temp file cleanup failed: {str(e)}")
-            
             return {
                 'success': True,
                 'filename': f"{username}.p12",
-                'data': file_data  # Keep as bytes
+                'path': p12_path
             }
 
         except Exception as e:
@@ -458,34 +447,55 @@ class CertManager:
                 'message': str(e)
             }
 
-    async def download_batch(self, usernames: list) -> bool:
-        """Download multiple certificates in a batch."""
+    async def download_batch(self, usernames: list) -> dict:
+        """Resolve the .p12 files for a batch download.
+
+        Certificates are read straight from the bind-mounted certs/files
+        directory instead of being copied out of the container one by one,
+        so the caller can stream them into a single archive.
+        """
         try:
-            total_certs = len(usernames)
-            completed_certs = 0
+            cert_dir = self.get_cert_directory()
 
-            # Get initial certificates list
-            certificates = await self.get_registered_certificates()
-            
+            # Get initial user index
+            registered = self.get_user_document()
+
+            files = []
+            missing = []
+            seen = set()
             for username in usernames:
-                try:
-                    # Verify user exists
-                    if not any(cert['identifier'] == username for cert in certificates):
-                        logger.warning(f"User {username} not found for batch download.")
-                        continue
+                if username in seen:
+                    continue
+                seen.add(username)
 
-                    # Download certificate
-                    result = await self.download_single(username)
-                    
-                    if result['success']:
-                        completed_certs += 1
+                # Verify user exists
+                if username not in registered:
+                    logger.warning(f"User {username} not found for batch download.")
+                    missing.append(username)
+                    continue
 
-                except Exception as e:
-                    logger.error(f"Error downloading certificate for user {username}: {str(e)}")
+                p12_path = os.path.join(cert_dir, f"{username}.p12")
+                if not os.path.isfile(p12_path):
+                    logger.warning(f"Certificate for user {username} not found.")
+                    missing.append(username)
                     continue
 
-            return completed_certs == total_certs
+                files.append((p12_path, f"{username}.p12"))
+
+            if not files:
+                return {
+                    'success': False,
+                    'message': "No certificates found for the requested users",
+                    'missing': missing
+                }
+
+            return {
+                'success': True,
+                'filename': "certificates.zip",
+                'files': files,
+                'missing': missing
+            }
 
         except Exception as e:
             logger.error(f"Error during batch download: {str(e)}")
-            raise Exception(f"Error during batch download: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Error during batch download: {str(e)}")
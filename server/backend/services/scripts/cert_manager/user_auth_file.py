@@ -0,0 +1,392 @@
+import os
+import copy
+import bisect
+import tempfile
+import threading
+import contextlib
+from lxml import etree
+from typing import Dict, Any, Optional, Tuple, List, Set, Iterator
+from backend.services.helpers.xml_schema import get_cached_schema, tree_errors, format_errors
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+AUTH_NS = "http://bbn.com/marti/xml/bindings"
+USER_TAG = f"{{{AUTH_NS}}}User"
+GROUP_TAG = f"{{{AUTH_NS}}}groupList"
+
+# Keys the certificates list can be sorted by
+SORT_KEYS = ('identifier', 'role')
+# Sorted views kept per snapshot, one per (sort, group, role, prefix) combination
+_MAX_SORTED_VIEWS = 64
+# Sorts after any character a prefix can be followed by
+_PREFIX_END = '\U0010ffff'
+
+def write_xml_atomic(tree: etree._ElementTree, path: str) -> None:
+    """Write an XML tree to a temp file beside path and rename it into place."""
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".xml", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            tree.write(f, encoding='UTF-8', xml_declaration=True, pretty_print=True)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            st = os.stat(path)
+            os.chmod(temp_path, st.st_mode & 0o7777)
+            try:
+                os.chown(temp_path, st.st_uid, st.st_gid)
+            except PermissionError:
+                pass
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def _stat_key(path: str) -> Tuple[int, int, int]:
+    st = os.stat(path)
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+# ============================================================================
+# Document Model
+# ============================================================================
+class UserAuthDocument:
+    """A parsed UserAuthenticationFile.xml indexed by identifier and by group.
+
+    Readers reach users only through the indexes, and a published User
+    element is never modified. The tree itself belongs to UserAuthStore,
+    which changes it only under its write lock. Edits go through a draft()
+    that shares this snapshot's elements and indexes, re-indexes just the
+    users it replaces and records the swaps for the store to apply.
+    """
+
+    def __init__(self, tree: etree._ElementTree):
+        self._tree = tree
+        self.version: Optional[str] = None
+        self._users: Dict[str, etree._Element] = {}
+        self._groups: Dict[str, Set[str]] = {}
+        # Groups whose member sets this document created, as opposed to shares with its parent
+        self._owned_groups: Set[str] = set()
+        self._sorted_views: Dict[Tuple, List[Tuple[str, str]]] = {}
+        # (old, new) User elements to swap in the tree, in order
+        self._replaced: List[Tuple[etree._Element, etree._Element]] = []
+        for user in tree.getroot().iter(USER_TAG):
+            self._index_user(user)
+
+    @staticmethod
+    def _user_groups(user: etree._Element) -> List[str]:
+        return [group.text.strip() for group in user.iterchildren(GROUP_TAG) if group.text]
+
+    def _members(self, group: str) -> Set[str]:
+        """The group's member set, copied first if it is still shared with the parent snapshot."""
+        members = self._groups.get(group)
+        if members is None or group not in self._owned_groups:
+            members = self._groups[group] = set(members or ())
+            self._owned_groups.add(group)
+        return members
+
+    def _index_user(self, user: etree._Element) -> None:
+        self._sorted_views.clear()
+        identifier = user.get('identifier')
+        self._users[identifier] = user
+        for group in self._user_groups(user):
+            self._members(group).add(identifier)
+
+    def _unindex_user(self, identifier: str) -> Optional[etree._Element]:
+        self._sorted_views.clear()
+        user = self._users.pop(identifier, None)
+        if user is not None:
+            for group in self._user_groups(user):
+                if group in self._groups:
+                    members = self._members(group)
+                    members.discard(identifier)
+                    if not members:
+                        del self._groups[group]
+                        self._owned_groups.discard(group)
+        return user
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __contains__(self, identifier: str) -> bool:
+        return identifier in self._users
+
+    def get_user(self, identifier: str) -> Optional[etree._Element]:
+        return self._users.get(identifier)
+
+    def identifiers(self) -> Iterator[str]:
+        return iter(self._users)
+
+    def groups(self) -> Dict[str, int]:
+        """Group names with their member counts."""
+        return {group: len(members) for group, members in self._groups.items()}
+
+    def user_groups(self, identifier: str) -> List[str]:
+        """The user's groupList entries as stored, without the __ANON__ default."""
+        return self._user_groups(self._users[identifier])
+
+    def users_in_group(self, group: str) -> Set[str]:
+        return set(self._groups.get(group, ()))
+
+    def user_info(self, identifier: str) -> Optional[Dict[str, Any]]:
+        """Describe a user in the shape returned by the certificates API."""
+        user = self._users.get(identifier)
+        if user is None:
+            return None
+        fingerprint = user.get('fingerprint')
+        return {
+            'identifier': identifier,
+            'passwordHashed': user.get('passwordHashed', 'false').lower() == 'true',
+            'role': user.get('role', ''),
+            'groups': self._user_groups(user) or ['__ANON__'],
+            'fingerprint': fingerprint,
+            'isEnrollment': fingerprint is None
+        }
+
+    def list_users(self) -> List[Dict[str, Any]]:
+        return [self.user_info(identifier) for identifier in self._users]
+
+    def user_xml(self, identifier: str) -> Optional[str]:
+        user = self._users.get(identifier)
+        if user is None:
+            return None
+        return etree.tostring(user, encoding='unicode', pretty_print=True)
+
+    def draft(self) -> "UserAuthDocument":
+        """Return an editable draft of this snapshot.
+
+        The draft copies the index dicts (not the tree or any element);
+        replace_user() and set_groups() then re-index only the users they
+        touch, so a single-user edit costs the same whatever the roster size.
+        """
+        draft = UserAuthDocument.__new__(UserAuthDocument)
+        draft._tree = self._tree
+        draft.version = None
+        draft._users = dict(self._users)
+        draft._groups = dict(self._groups)
+        draft._owned_groups = set()
+        draft._sorted_views = {}
+        draft._replaced = []
+        return draft
+
+    def _sort_value(self, identifier: str, sort: str) -> str:
+        if sort == 'role':
+            return self._users[identifier].get('role', '')
+        return identifier.lower()
+
+    def _sorted_view(self, sort: str, group: Optional[str], role: Optional[str], prefix: Optional[str]) -> List[Tuple[str, str]]:
+        """(sort value, identifier) pairs matching the filters, sorted and cached for this snapshot."""
+        key = (sort, group, role, prefix)
+        view = self._sorted_views.get(key)
+        if view is not None:
+            return view
+
+        if group is None:
+            identifiers = self._users.keys()
+        elif group == '__ANON__':
+            # Users without any groupList are reported as __ANON__
+            identifiers = self._groups.get(group, set()) | {
+                i for i, user in self._users.items() if user.find(GROUP_TAG) is None
+            }
+        else:
+            identifiers = self._groups.get(group, ())
+        if role is not None:
+            identifiers = [i for i in identifiers if self._users[i].get('role', '') == role]
+        if prefix:
+            identifiers = [i for i in identifiers if i.lower().startswith(prefix)]
+
+        view = sorted((self._sort_value(i, sort), i) for i in identifiers)
+        if len(self._sorted_views) >= _MAX_SORTED_VIEWS:
+            self._sorted_views.clear()
+        self._sorted_views[key] = view
+        return view
+
+    def page(
+        self,
+        sort: str = 'identifier',
+        descending: bool = False,
+        group: Optional[str] = None,
+        role: Optional[str] = None,
+        prefix: Optional[str] = None,
+        after: Optional[Tuple[str, str]] = None,
+        limit: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Return one page of users plus the (sort value, identifier) key to continue after.
+
+        Identifier prefixes are resolved by bisecting the sorted identifier
+        view, so the cost of a page depends on its size rather than the roster.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        prefix = prefix.lower() if prefix else None
+
+        if sort == 'identifier' and prefix:
+            view = self._sorted_view(sort, group, role, None)
+            lo = bisect.bisect_left(view, (prefix,))
+            hi = bisect.bisect_left(view, (prefix + _PREFIX_END,), lo)
+        else:
+            view = self._sorted_view(sort, group, role, prefix)
+            lo, hi = 0, len(view)
+        limit = hi - lo if limit is None else limit
+
+        if descending:
+            end = bisect.bisect_left(view, after, lo, hi) if after else hi
+            start = max(lo, end - limit)
+            entries = view[start:end][::-1]
+            has_more = start > lo
+        else:
+            start = bisect.bisect_right(view, after, lo, hi) if after else lo
+            end = min(hi, start + limit)
+            entries = view[start:end]
+            has_more = end < hi
+
+        return {
+            'users': [self.user_info(identifier) for _, identifier in entries],
+            'total': hi - lo,
+            'next': entries[-1] if entries and has_more else None
+        }
+
+    def replace_user(self, identifier: str, new_elem: etree._Element) -> None:
+        """Index new_elem in place of the user; the tree changes when the store commits."""
+        old = self._unindex_user(identifier)
+        if old is None:
+            raise KeyError(identifier)
+        self._index_user(new_elem)
+        self._replaced.append((old, new_elem))
+
+    def set_groups(self, identifier: str, groups: List[str]) -> None:
+        """Replace a user's groupList entries, keeping them where the schema expects."""
+        if identifier not in self._users:
+            raise KeyError(identifier)
+        # Published elements are read-only, so the change is made on a clone of this one user
+        user = copy.deepcopy(self._users[identifier])
+        group_elems = list(user.iterchildren(GROUP_TAG))
+        insert_at = user.index(group_elems[0]) if group_elems else 0
+        for elem in group_elems:
+            user.remove(elem)
+        for offset, group in enumerate(groups):
+            group_elem = etree.Element(GROUP_TAG)
+            group_elem.text = group
+            user.insert(insert_at + offset, group_elem)
+        self.replace_user(identifier, user)
+
+    def _apply(self) -> None:
+        for old, new in self._replaced:
+            old.getparent().replace(old, new)
+
+    def _revert(self) -> None:
+        for old, new in reversed(self._replaced):
+            new.getparent().replace(new, old)
+
+# ============================================================================
+# Store
+# ============================================================================
+class UserAuthStore:
+    """Process-wide cache of one UserAuthenticationFile.xml and its schema.
+
+    The file is re-parsed only when its inode, mtime or size changes (e.g.
+    after UserManager.jar edits it inside the container). Commits validate
+    the draft once, rename it into place and publish it as the new snapshot.
+    """
+
+    def __init__(self, config_path: str, schema_path: str):
+        self.config_path = config_path
+        self.schema_path = schema_path
+        self._document: Optional[UserAuthDocument] = None
+        self._stat: Optional[Tuple[int, int, int]] = None
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def current(self) -> UserAuthDocument:
+        """Return the latest snapshot, reloading it if the file changed on disk."""
+        stat = _stat_key(self.config_path)
+        document = self._document
+        if document is not None and stat == self._stat:
+            return document
+        with self._read_lock:
+            if self._document is not None and stat == self._stat:
+                return self._document
+            parser = etree.XMLParser(remove_blank_text=True)
+            document = UserAuthDocument(etree.parse(self.config_path, parser))
+            document.version = "%x-%x-%x" % stat
+            self._document, self._stat = document, stat
+            logger.debug(f"Loaded {len(document)} users from {self.config_path}")
+            return document
+
+    def schema(self) -> etree.XMLSchema:
+        return get_cached_schema(self.schema_path)
+
+    def _validate_tree(self, tree: etree._ElementTree) -> Tuple[bool, str]:
+        # Shares the schema's lock with schema_errors(): the error log lives on the compiled schema
+        errors = tree_errors(tree, self.schema_path)
+        if not errors:
+            return True, ""
+        # The first error is the root cause; later ones tend to follow from it
+        return False, format_errors(errors[:1])
+
+    def commit(self, draft: UserAuthDocument) -> None:
+        """Validate a draft, write it atomically and publish it as the current snapshot.
+
+        The caller holds the write lock. The draft's swaps are applied to the
+        tree for validation and writing, and undone if either fails.
+        """
+        draft._apply()
+        try:
+            is_valid, error = self._validate_tree(draft._tree)
+            if not is_valid:
+                raise ValueError(f"Resulting configuration is invalid: {error}")
+            write_xml_atomic(draft._tree, self.config_path)
+        except Exception:
+            draft._revert()
+            raise
+        draft._replaced = []
+        stat = _stat_key(self.config_path)
+        draft.version = "%x-%x-%x" % stat
+        with self._read_lock:
+            self._document, self._stat = draft, stat
+
+    def validate_user(self, identifier: str, new_elem: etree._Element) -> Tuple[bool, str]:
+        """Validate the current document as it would be with the user replaced by new_elem."""
+        with self._write_lock:
+            draft = self.current().draft()
+            draft.replace_user(identifier, new_elem)
+            draft._apply()
+            try:
+                return self._validate_tree(draft._tree)
+            finally:
+                draft._revert()
+
+    def replace_user(self, identifier: str, new_elem: etree._Element) -> None:
+        """Replace one user, re-indexing only that user, and commit the result."""
+        with self.edit() as draft:
+            draft.replace_user(identifier, new_elem)
+
+    @contextlib.contextmanager
+    def locked(self) -> Iterator[None]:
+        """Hold off edit() and replace_user() while the file is replaced outside the store."""
+        with self._write_lock:
+            yield
+
+    @contextlib.contextmanager
+    def edit(self) -> Iterator[UserAuthDocument]:
+        """Yield a draft of the current document and commit it if the block succeeds."""
+        with self._write_lock:
+            draft = self.current().draft()
+            yield draft
+            self.commit(draft)
+
+_stores: Dict[str, UserAuthStore] = {}
+_stores_lock = threading.Lock()
+
+def get_user_auth_store(tak_dir: str) -> UserAuthStore:
+    """Return the shared store for the UserAuthenticationFile.xml in tak_dir."""
+    with _stores_lock:
+        store = _stores.get(tak_dir)
+        if store is None:
+            store = UserAuthStore(
+                os.path.join(tak_dir, "UserAuthenticationFile.xml"),
+                os.path.join(tak_dir, "UserAuthenticationFile.xsd")
+            )
+            _stores[tak_dir] = store
+        return store
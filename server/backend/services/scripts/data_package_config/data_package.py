@@ -1,19 +1,32 @@
 import os
-import tempfile
-from typing import Dict, Any
+import uuid
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+from typing import Dict, Any, List, Tuple, Optional, Callable, Awaitable
 from backend.config.logging_config import configure_logging
 from backend.services.helpers.directories import DirectoryHelper
 from backend.services.helpers.run_command import RunCommand
+from backend.services.helpers.process_pool import process_pool
 from fastapi import UploadFile
 
 # Import modules
 from .modules.preferences import PreferencesManager
 from .modules.certificates import CertificateManager
 from .modules.custom_files import CustomFilesManager
-from .modules.package_creator import PackageCreator
+from .modules.package_creator import PackageCreator, write_package
 
 logger = configure_logging(__name__)
 
+# Stands in for the per-user client certificate while the shared template is rendered
+CLIENT_CERT_TOKEN = '@@client_cert@@'
+_PACKAGE_NAME_TOKEN = '@@package_name@@'
+_PACKAGE_UID_TOKEN = '@@package_uid@@'
+
+# Jobs smaller than this are written by threads; spawning workers would cost more than it saves
+BULK_PARALLEL_THRESHOLD = 16
+MAX_BULK_WORKERS = 8
+
 class DataPackage:
     def __init__(self):
         self.run_command = RunCommand()
@@ -29,47 +42,127 @@ class DataPackage:
     async def main(self, preferences_data) -> Dict[str, Any]:
         """Main method for data package creation"""
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                zip_name = preferences_data.get('#zip_file_name', 'data_package')
-                custom_files = preferences_data.get('customFiles', [])
-                logger.debug(f"[main] Processing custom files: {custom_files}")
-                
-                # Check if enrollment is enabled
-                enrollment_enabled = preferences_data.get('enrollment', False)
-                
-                # Extract certificate names
-                stream_count = int(preferences_data.get('count', 1))
-                ca_certs, client_certs = self.preferences_manager.extract_certificates(preferences_data, stream_count)
-                
-                # Generate configuration (without custom files in preferences)
-                clean_preferences = self.preferences_manager.clean_preferences_data(preferences_data)
-                if 'customFiles' in clean_preferences:
-                    logger.debug("[main] Removing customFiles from preferences")
-                    del clean_preferences['customFiles']  # Remove custom files from preferences
-                self.preferences_manager.generate_config_pref(clean_preferences, temp_dir)
-                
-                # Create manifest with custom files
-                manifest_path = self.package_creator.create_manifest_file(temp_dir, zip_name, ca_certs, client_certs, custom_files)
-                logger.debug(f"[main] Created manifest at: {manifest_path}")
-                
-                # Copy certificates if needed
-                if ca_certs or client_certs:
-                    await self.certificate_manager.copy_certificates_from_container(temp_dir, ca_certs, client_certs)
-                
-                # Copy custom files to root of temp directory
-                await self.custom_files_manager.copy_custom_files(temp_dir, custom_files)
-                
-                # Log directory contents before zipping
-                logger.debug(f"[main] Temp directory contents: {os.listdir(temp_dir)}")
-                
-                zip_path = await self.package_creator.create_zip_file(temp_dir, zip_name)
-                return {'status': 'success', 'path': zip_path}
+            zip_name = preferences_data.get('#zip_file_name', 'data_package')
+            custom_files = preferences_data.get('customFiles', [])
+            logger.debug(f"[main] Processing custom files: {custom_files}")
+            
+            # Extract certificate names
+            stream_count = int(preferences_data.get('count', 1))
+            ca_certs, client_certs = self.preferences_manager.extract_certificates(preferences_data, stream_count)
+            
+            # Generate configuration (without custom files in preferences)
+            clean_preferences = self.preferences_manager.clean_preferences_data(preferences_data)
+            if 'customFiles' in clean_preferences:
+                logger.debug("[main] Removing customFiles from preferences")
+                del clean_preferences['customFiles']  # Remove custom files from preferences
+            pref_xml = self.preferences_manager.render_config_pref(clean_preferences)
+            
+            # Create manifest with custom files
+            manifest_xml = self.package_creator.render_manifest(zip_name, ca_certs, client_certs, custom_files)
+            
+            # Certificates and custom files are read once, straight from their source paths
+            file_members = self.certificate_manager.resolve_certificates(ca_certs, client_certs)
+            file_members += self.custom_files_manager.resolve_custom_files(custom_files)
+            logger.debug(f"[main] Package members: {[arcname for _, arcname in file_members]}")
+            
+            zip_path = await self.package_creator.create_package(
+                zip_name,
+                [('MANIFEST/manifest.xml', manifest_xml), ('initial.pref', pref_xml)],
+                file_members
+            )
+            return {'status': 'success', 'path': zip_path}
 
         except Exception as e:
             logger.error(f"[main] Data package creation failed: {str(e)}")
             logger.error("Preferences data: %s", preferences_data)  # Log preferences data for debugging
             return {'error': str(e)}
 
+    async def generate_bulk(
+        self,
+        preferences_data,
+        packages: List[Tuple[str, str]],
+        emit: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+    ) -> Dict[str, Any]:
+        """Builds one package per (client cert, zip name) pair from a shared template.
+
+        The preferences, manifest, CA certificates and custom files are
+        resolved once; each package only substitutes its client certificate,
+        name and uid before being written by a bounded worker pool.
+        preferences_data must use CLIENT_CERT_TOKEN as the certificateLocation.
+        """
+        zip_paths = [self.package_creator.get_package_path(zip_name) for _, zip_name in packages]
+        if len(set(zip_paths)) != len(zip_paths):
+            raise ValueError("Package names must be unique")
+
+        custom_files = preferences_data.get('customFiles', [])
+        stream_count = int(preferences_data.get('count', 1))
+        ca_certs, _ = self.preferences_manager.extract_certificates(preferences_data, stream_count)
+
+        # Render the shared parts once
+        clean_preferences = self.preferences_manager.clean_preferences_data(preferences_data)
+        clean_preferences.pop('customFiles', None)
+        pref_template = self.preferences_manager.render_config_pref(clean_preferences)
+        manifest_template = self.package_creator.render_manifest(
+            _PACKAGE_NAME_TOKEN, ca_certs, [CLIENT_CERT_TOKEN], custom_files, package_uid=_PACKAGE_UID_TOKEN
+        )
+        shared_members = self.certificate_manager.resolve_certificates(ca_certs, [])
+        shared_members += self.custom_files_manager.resolve_custom_files(custom_files)
+
+        jobs = []
+        for (cert_location, _), zip_path in zip(packages, zip_paths):
+            client_cert = cert_location.replace('cert/', '')
+            package_name = os.path.basename(zip_path)[:-4]
+            manifest_xml = (manifest_template
+                .replace(_PACKAGE_UID_TOKEN, str(uuid.uuid4()))
+                .replace(_PACKAGE_NAME_TOKEN, escape(package_name, {'"': '&quot;'}))
+                .replace(CLIENT_CERT_TOKEN, escape(client_cert, {'"': '&quot;'})))
+            pref_xml = pref_template.replace(CLIENT_CERT_TOKEN, escape(cert_location))
+            jobs.append((client_cert, zip_path, [('MANIFEST/manifest.xml', manifest_xml), ('initial.pref', pref_xml)]))
+
+        total = len(jobs)
+        results = []
+
+        async def report(message):
+            if emit:
+                completed = len(results)
+                await emit({
+                    'status': 'in_progress' if completed < total else 'complete',
+                    'completed': completed,
+                    'failed': sum(1 for r in results if not r['success']),
+                    'total': total,
+                    'progress': int(completed / total * 100) if total else 100,
+                    'message': message,
+                    'isInProgress': completed < total
+                })
+
+        workers = max(1, min(os.cpu_count() or 1, MAX_BULK_WORKERS, total))
+        if total >= BULK_PARALLEL_THRESHOLD:
+            executor = process_pool(total, workers)
+        else:
+            executor = ThreadPoolExecutor(max_workers=workers)
+
+        async def build(client_cert, zip_path, generated_members):
+            try:
+                # Client certs are resolved per package so one missing cert only fails its own package
+                file_members = shared_members + self.certificate_manager.resolve_certificates([], [client_cert])
+                await asyncio.wrap_future(executor.submit(write_package, zip_path, generated_members, file_members))
+                self.package_creator.record_package(zip_path, generated_members, file_members)
+                result = {'clientCert': client_cert, 'success': True, 'path': zip_path}
+            except Exception as e:
+                logger.error(f"[generate_bulk] Package for {client_cert} failed: {str(e)}")
+                result = {'clientCert': client_cert, 'success': False, 'error': str(e)}
+            results.append(result)
+            await report(f"Generated {len(results)} of {total} packages")
+            return result
+
+        await report(f"Generating {total} packages")
+        with executor:
+            ordered = await asyncio.gather(*(build(*job) for job in jobs))
+
+        succeeded = sum(1 for r in ordered if r['success'])
+        logger.info(f"[generate_bulk] Generated {succeeded} of {total} packages")
+        return {'total': total, 'succeeded': succeeded, 'failed': total - succeeded, 'results': ordered}
+
     # Maintain the public API by exposing methods from managers
     
     # Certificate methods
@@ -89,5 +182,11 @@ class DataPackage:
     async def save_custom_file(self, file: UploadFile):
         return await self.custom_files_manager.save_custom_file(file)
         
+    async def link_custom_file(self, filename: str, sha256: str):
+        return await self.custom_files_manager.link_custom_file(filename, sha256)
+
+    def custom_files_usage(self) -> Dict[str, int]:
+        return self.custom_files_manager.get_store().usage()
+        
     async def delete_custom_file(self, filename: str):
         return await self.custom_files_manager.delete_custom_file(filename) 
\ No newline at end of file
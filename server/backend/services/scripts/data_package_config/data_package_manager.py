@@ -1,8 +1,9 @@
 import os
-from datetime import datetime
-from typing import List, Dict
+import asyncio
+from typing import List, Dict, Any
 from backend.config.logging_config import configure_logging
 from backend.services.helpers.directories import DirectoryHelper
+from backend.services.scripts.data_package_config.package_catalog import get_package_catalog
 
 logger = configure_logging(__name__)
 
@@ -10,45 +11,30 @@ class DataPackageManager:
     def __init__(self):
         self.directory_helper = DirectoryHelper()
         self.packages_dir = self.directory_helper.get_data_packages_directory()
+        self.catalog = get_package_catalog(self.packages_dir)
 
-    async def get_packages(self) -> List[Dict[str, str]]:
-        """List all data packages with their metadata."""
+    async def get_packages(self, **query) -> Dict[str, Any]:
+        """List data packages from the catalog, optionally filtered and paged."""
         try:
-            packages = []
-            for filename in os.listdir(self.packages_dir):
-                if not filename.endswith('.zip'):
-                    logger.error(f"Skipping non-zip file: {filename}")
-                    continue
-                
-                file_path = os.path.join(self.packages_dir, filename)
-                stat = os.stat(file_path)
-                
-                size_bytes = stat.st_size
-                for unit in ['B', 'KB', 'MB', 'GB']:
-                    if size_bytes < 1024:
-                        size = f"{size_bytes:.2f} {unit}"
-                        break
-                    size_bytes /= 1024
-                
-                packages.append({
-                    'fileName': filename,
-                    'createdAt': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'size': size
-                })
-            
-            return sorted(packages, key=lambda x: x['createdAt'], reverse=True)
-
+            # The catalog's SQLite queries and lock stay off the event loop
+            return await asyncio.to_thread(self.catalog.page, **query)
+        except ValueError:
+            raise
         except Exception as e:
             logger.error(f"Failed to list packages: {str(e)}")
             raise
 
+    async def reconcile(self) -> Dict[str, int]:
+        """Sync the catalog with packages added or removed outside the API."""
+        return await asyncio.to_thread(self.catalog.reconcile)
+
     def get_package_path(self, filename: str) -> str:
         """Validate and return full package path."""
         if not filename.endswith('.zip'):
             logger.error(f"Invalid package file extension for: {filename}")
             raise ValueError("Invalid package file extension")
             
-        file_path = os.path.join(self.packages_dir, filename)
+        file_path = os.path.join(self.packages_dir, os.path.basename(filename))
         if not os.path.exists(file_path):
             logger.error(f"Package {filename} not found at path: {file_path}")
             raise FileNotFoundError(f"Package {filename} not found")
@@ -58,8 +44,14 @@ class DataPackageManager:
     async def delete_package(self, filename: str) -> None:
         """Delete a single package file."""
         try:
-            file_path = self.get_package_path(filename)
+            try:
+                file_path = self.get_package_path(filename)
+            except FileNotFoundError:
+                # Already gone from disk; drop the stale catalog row too
+                self.catalog.remove(os.path.basename(filename))
+                raise
             os.remove(file_path)
+            self.catalog.remove(os.path.basename(file_path))
             
             if os.path.exists(file_path):
                 logger.error(f"Failed to delete {filename}, file still exists.")
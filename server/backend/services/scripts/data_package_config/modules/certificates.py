@@ -11,49 +11,20 @@ class CertificateManager:
         self.directory_helper = directory_helper if directory_helper else DirectoryHelper()
         self.run_command = RunCommand()
         
-    async def copy_certificates_from_container(self, temp_dir, ca_certs, client_certs):
-        """Copies certificates from the container to the temporary directory"""
+    def resolve_certificates(self, ca_certs, client_certs):
+        """Map certificate names to (source_path, zip entry) pairs in the bind-mounted certs directory"""
         try:
-            container_name = f"takserver-{self.directory_helper.get_takserver_version()}"
-            # Create cert directory in temp directory
-            cert_dir = os.path.join(temp_dir, 'cert')
-            os.makedirs(cert_dir, exist_ok=True)
-
-            # Only copy certificates if valid names are provided
-            if ca_certs:
-                for ca_cert in ca_certs:
-                    ca_cert_src = f"/opt/tak/certs/files/{ca_cert}"
-                    ca_cert_dest = os.path.join(cert_dir, ca_cert)
-                    copy_ca_cert_command = [
-                        'docker', 'cp', f"{container_name}:{ca_cert_src}", ca_cert_dest
-                    ]
-                    result = await self.run_command.run_command_async(
-                        command=copy_ca_cert_command,
-                        event_type="data-package",
-                    )
-                    if not result.success:
-                        logger.error(f"Failed to copy CA certificate {ca_cert}: {result.stderr}")
-                        raise Exception(f"Failed to copy CA certificate {ca_cert}: {result.stderr}")
-
-            if client_certs:
-                for client_cert in client_certs:
-                    client_cert_src = f"/opt/tak/certs/files/{client_cert}"
-                    client_cert_dest = os.path.join(cert_dir, client_cert)
-                    copy_client_cert_command = [
-                        'docker', 'cp', f"{container_name}:{client_cert_src}", client_cert_dest
-                    ]
-                    result = await self.run_command.run_command_async(
-                        command=copy_client_cert_command,
-                        event_type="data-package",
-                    )
-                    if not result.success:
-                        logger.error(f"Failed to copy client certificate {client_cert}: {result.stderr}")
-                        raise Exception(f"Failed to copy client certificate {client_cert}: {result.stderr}")
-
-            logger.debug(f"Copied all certificates to {cert_dir}")
+            cert_dir = self.directory_helper.get_cert_directory()
+            members = []
+            for cert_name in list(ca_certs or []) + list(client_certs or []):
+                source_path = os.path.join(cert_dir, os.path.basename(cert_name))
+                if not os.path.isfile(source_path):
+                    logger.error(f"Certificate {cert_name} not found at {source_path}")
+                    raise FileNotFoundError(f"Certificate {cert_name} not found")
+                members.append((source_path, f"cert/{cert_name}"))
+            return members
         except Exception as e:
-            logger.error(f"Certificate copy failed: {str(e)}")
-            logger.error("Temporary directory: %s", temp_dir)  # Log temp directory for debugging
+            logger.error(f"Certificate lookup failed: {str(e)}")
             logger.error("CA certificates: %s", ca_certs)  # Log CA certificates for debugging
             logger.error("Client certificates: %s", client_certs)  # Log client certificates for debugging
             raise Exception(f"Certificate transfer error: {str(e)}")
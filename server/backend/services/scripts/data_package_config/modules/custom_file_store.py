@@ -0,0 +1,225 @@
+import os
+import json
+import hashlib
+import datetime
+import tempfile
+import threading
+import mimetypes
+from typing import Dict, Any, Optional, List
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+CATALOG_NAME = '.catalog.json'
+BLOBS_DIR = '.blobs'
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read in 8MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_CHUNK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+class CustomFileStore:
+    """Content-addressed storage for data package custom files.
+
+    Blobs live under .blobs/<aa>/<sha256> and are shared by every name that
+    has the same content. The catalog maps each visible filename to its
+    hash and keeps a reference count per blob, so a blob is only removed
+    once the last name pointing at it is deleted.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.blobs_dir = os.path.join(root, BLOBS_DIR)
+        self.catalog_path = os.path.join(root, CATALOG_NAME)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._blobs: Dict[str, Dict[str, int]] = {}
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._load()
+        self._import_loose_files()
+
+    # ------------------------------------------------------------------
+    # Catalog persistence
+    # ------------------------------------------------------------------
+    def _load(self) -> None:
+        if not os.path.exists(self.catalog_path):
+            return
+        try:
+            with open(self.catalog_path, 'r') as f:
+                catalog = json.load(f)
+            self._files = catalog.get('files', {})
+            self._blobs = catalog.get('blobs', {})
+        except Exception as e:
+            logger.error(f"Failed to read custom file catalog, rebuilding: {str(e)}")
+            self._files, self._blobs = {}, {}
+
+    def _save(self) -> None:
+        fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=self.root)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'files': self._files, 'blobs': self._blobs}, f, indent=2, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.catalog_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _import_loose_files(self) -> None:
+        """Move files stored by name (before the blob store existed) into the store."""
+        imported = 0
+        for filename in os.listdir(self.root):
+            path = os.path.join(self.root, filename)
+            if filename.startswith('.upload-'):
+                # Left behind by an upload that never finished
+                os.remove(path)
+                continue
+            if filename.startswith('.') or not os.path.isfile(path):
+                continue
+            try:
+                self.add_file(path, filename, hash_file(path))
+                imported += 1
+            except Exception as e:
+                logger.error(f"Failed to import custom file {filename}: {str(e)}")
+        if imported:
+            logger.info(f"Imported {imported} custom files into the blob store")
+
+    # ------------------------------------------------------------------
+    # Blobs
+    # ------------------------------------------------------------------
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blobs_dir, sha256[:2], sha256)
+
+    def has_blob(self, sha256: str) -> bool:
+        return sha256 in self._blobs and os.path.isfile(self.blob_path(sha256))
+
+    def staging_path(self) -> str:
+        """Create a temp file on the store's filesystem so new blobs can be renamed into place."""
+        fd, path = tempfile.mkstemp(prefix='.upload-', dir=self.root)
+        os.close(fd)
+        return path
+
+    def _release(self, sha256: str) -> None:
+        blob = self._blobs.get(sha256)
+        if blob is None:
+            return
+        blob['refs'] -= 1
+        if blob['refs'] <= 0:
+            del self._blobs[sha256]
+            path = self.blob_path(sha256)
+            if os.path.exists(path):
+                os.remove(path)
+            logger.debug(f"Removed unreferenced blob {sha256}")
+
+    # ------------------------------------------------------------------
+    # Names
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _clean_name(filename: str) -> str:
+        name = os.path.basename(filename or '')
+        if not name or name.startswith('.'):
+            raise ValueError(f"Invalid custom file name: {filename}")
+        return name
+
+    def add_file(self, source_path: str, filename: str, sha256: str) -> Dict[str, Any]:
+        """Catalog source_path under filename and consume it.
+
+        The source is renamed into the blob store when its hash is new and
+        simply removed when the content is already stored.
+        """
+        name = self._clean_name(filename)
+        with self._lock:
+            if self.has_blob(sha256):
+                os.remove(source_path)
+                deduplicated = True
+            else:
+                target = self.blob_path(sha256)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(source_path, target)
+                os.chmod(target, 0o644)
+                refs = self._blobs.get(sha256, {}).get('refs', 0)
+                self._blobs[sha256] = {'size': os.path.getsize(target), 'refs': refs}
+                deduplicated = False
+            entry = self._link(name, sha256)
+            self._save()
+        logger.debug(f"Stored custom file {name} as {sha256} (deduplicated: {deduplicated})")
+        return {**entry, 'name': name, 'deduplicated': deduplicated}
+
+    def link(self, filename: str, sha256: str) -> Optional[Dict[str, Any]]:
+        """Point filename at content the store already holds; None if the hash is unknown."""
+        name = self._clean_name(filename)
+        with self._lock:
+            if not self.has_blob(sha256):
+                return None
+            entry = self._link(name, sha256)
+            self._save()
+        return {**entry, 'name': name, 'deduplicated': True}
+
+    def _link(self, name: str, sha256: str) -> Dict[str, Any]:
+        previous = self._files.get(name)
+        if previous and previous['sha256'] == sha256:
+            return previous
+        self._blobs[sha256]['refs'] += 1
+        if previous:
+            self._release(previous['sha256'])
+        mime_type, _ = mimetypes.guess_type(name)
+        entry = {
+            'sha256': sha256,
+            'size': self._blobs[sha256]['size'],
+            'type': mime_type or 'application/octet-stream',
+            'lastModified': datetime.datetime.now().isoformat()
+        }
+        self._files[name] = entry
+        return entry
+
+    def remove(self, filename: str) -> None:
+        name = os.path.basename(filename)
+        with self._lock:
+            entry = self._files.pop(name, None)
+            if entry is None:
+                raise FileNotFoundError(f"File {filename} not found")
+            self._release(entry['sha256'])
+            self._save()
+
+    def resolve(self, filename: str) -> Optional[str]:
+        """Path of the blob holding filename's content."""
+        entry = self._files.get(os.path.basename(filename))
+        if entry is None:
+            return None
+        path = self.blob_path(entry['sha256'])
+        return path if os.path.isfile(path) else None
+
+    def names(self) -> List[str]:
+        return sorted(self._files)
+
+    def list_files(self) -> List[Dict[str, Any]]:
+        return [{'name': name, **self._files[name]} for name in self.names()]
+
+    def usage(self) -> Dict[str, int]:
+        """Logical size of all names versus bytes actually stored."""
+        return {
+            'files': len(self._files),
+            'blobs': len(self._blobs),
+            'logicalBytes': sum(entry['size'] for entry in self._files.values()),
+            'storedBytes': sum(blob['size'] for blob in self._blobs.values())
+        }
+
+_stores: Dict[str, CustomFileStore] = {}
+_stores_lock = threading.Lock()
+
+def get_custom_file_store(root: str) -> CustomFileStore:
+    """Return the shared store for the custom files directory at root."""
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = CustomFileStore(root)
+            _stores[root] = store
+        return store
@@ -1,10 +1,10 @@
 import os
-import shutil
+import hashlib
+import asyncio
 import aiofiles
-import mimetypes
-import datetime
 from fastapi import UploadFile
 from backend.config.logging_config import configure_logging
+from .custom_file_store import get_custom_file_store
 
 logger = configure_logging(__name__)
 
@@ -18,79 +18,58 @@ class CustomFilesManager:
         os.makedirs(custom_dir, exist_ok=True)
         return custom_dir
 
-    async def copy_custom_files(self, temp_dir, custom_files):
-        """Copy custom files to temp directory at root level"""
-        try:
-            logger.debug(f"[copy_custom_files] Starting to copy files: {custom_files}")
-            custom_dir = self.get_custom_files_directory()
-            logger.debug(f"[copy_custom_files] Custom files directory: {custom_dir}")
-            
-            for filename in custom_files:
-                src = os.path.join(custom_dir, filename)
-                dest = os.path.join(temp_dir, os.path.basename(filename))
-                logger.debug(f"[copy_custom_files] Copying {src} -> {dest}")
-                
-                if os.path.exists(src):
-                    shutil.copy2(src, dest)
-                    logger.debug(f"[copy_custom_files] Successfully copied {filename}")
-                else:
-                    logger.warning(f"[copy_custom_files] File not found: {src}")
-        except Exception as e:
-            logger.error(f"[copy_custom_files] Failed to copy files: {str(e)}")
-            logger.error("Temporary directory: %s", temp_dir)  # Log temp directory for debugging
-            logger.error("Custom files: %s", custom_files)  # Log custom files for debugging
-            raise
+    def get_store(self):
+        """Get the content-addressed store behind the custom files directory"""
+        return get_custom_file_store(self.get_custom_files_directory())
+
+    def resolve_custom_files(self, custom_files):
+        """Map custom file names to (blob path, zip entry) pairs at the package root"""
+        store = self.get_store()
+        members = []
+        for filename in custom_files:
+            src = store.resolve(filename)
+            if src:
+                members.append((src, os.path.basename(filename)))
+            else:
+                logger.warning(f"[resolve_custom_files] File not found: {filename}")
+        return members
 
     async def list_custom_files(self) -> list:
         """List all uploaded custom files"""
-        custom_dir = self.get_custom_files_directory()
-        return [f for f in os.listdir(custom_dir) if os.path.isfile(os.path.join(custom_dir, f))]
+        return self.get_store().names()
 
     async def list_custom_files_with_metadata(self) -> list:
         """List all uploaded custom files with metadata"""
-        custom_dir = self.get_custom_files_directory()
-        files = []
-        
-        for filename in os.listdir(custom_dir):
-            file_path = os.path.join(custom_dir, filename)
-            if os.path.isfile(file_path):
-                try:
-                    stat = os.stat(file_path)
-                    mime_type, _ = mimetypes.guess_type(filename)
-                    
-                    files.append({
-                        'name': filename,
-                        'size': stat.st_size,
-                        'type': mime_type or 'application/octet-stream',
-                        'lastModified': datetime.datetime.fromtimestamp(stat.st_mtime).isoformat()
-                    })
-                except Exception as e:
-                    logger.error(f"Error getting metadata for {filename}: {str(e)}")
-                    continue
-                
-        return files
+        return self.get_store().list_files()
 
     async def save_custom_file(self, file: UploadFile):
-        """Save an uploaded custom file"""
-        custom_dir = self.get_custom_files_directory()
-        file_path = os.path.join(custom_dir, file.filename)
-        
-        async with aiofiles.open(file_path, 'wb') as f:
-            # Use larger chunks (8MB) for better performance with large files
-            chunk_size = 8 * 1024 * 1024  # 8MB chunks
-            while True:
-                chunk = await file.read(chunk_size)
-                if not chunk:
-                    break
-                await f.write(chunk)
+        """Save an uploaded custom file, hashing it as it is written"""
+        store = self.get_store()
+        digest = hashlib.sha256()
+        staging_path = store.staging_path()
+        try:
+            async with aiofiles.open(staging_path, 'wb') as f:
+                # Use larger chunks (8MB) for better performance with large files
+                chunk_size = 8 * 1024 * 1024  # 8MB chunks
+                while True:
+                    chunk = await file.read(chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    await f.write(chunk)
+            return await asyncio.to_thread(store.add_file, staging_path, file.filename, digest.hexdigest())
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+
+    async def link_custom_file(self, filename: str, sha256: str):
+        """Add a name for content already in the store without uploading it again"""
+        return await asyncio.to_thread(self.get_store().link, filename, sha256.lower())
 
     async def delete_custom_file(self, filename: str):
         """Delete a custom file from the server"""
-        custom_dir = self.get_custom_files_directory()
-        file_path = os.path.join(custom_dir, filename)
-        
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        else:
+        try:
+            await asyncio.to_thread(self.get_store().remove, filename)
+        except FileNotFoundError:
             logger.error(f"File {filename} not found for deletion")
-            raise FileNotFoundError(f"File {filename} not found") 
\ No newline at end of file
+            raise
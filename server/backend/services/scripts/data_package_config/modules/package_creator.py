@@ -1,23 +1,66 @@
 import os
 import uuid
-import shutil
+import time
+import zipfile
+import asyncio
 from backend.config.logging_config import configure_logging
+from backend.services.scripts.data_package_config.package_catalog import get_package_catalog
 
 logger = configure_logging(__name__)
 
+# Members that are already compressed gain nothing from deflate
+STORED_EXTENSIONS = {
+    '.zip', '.kmz', '.apk', '.jar', '.dpk', '.mbtiles',
+    '.p12', '.pfx', '.jks', '.bks',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.jp2', '.tif', '.tiff', '.ecw', '.sid',
+    '.mp3', '.mp4', '.m4a', '.mov', '.mkv', '.avi', '.ogg',
+    '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar', '.zst',
+}
+
+def choose_compression(filename: str) -> int:
+    """Pick ZIP_STORED for already-compressed content and ZIP_DEFLATED otherwise."""
+    ext = os.path.splitext(filename)[1].lower()
+    return zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+def write_package(zip_path, generated_members, file_members) -> str:
+    """Streams every member straight into the output ZIP.
+
+    Kept at module level so bulk generation can run it in worker processes.
+
+    Args:
+        zip_path: Final package path
+        generated_members: (arcname, text) pairs rendered in memory
+        file_members: (source_path, arcname) pairs read once from disk
+    """
+    # Build beside the final path and rename so readers never see a partial package
+    partial_path = os.path.join(os.path.dirname(zip_path), f".{os.path.basename(zip_path)}.partial")
+    try:
+        with zipfile.ZipFile(partial_path, 'w', allowZip64=True) as zf:
+            date_time = time.localtime()[:6]
+            for arcname, content in generated_members:
+                zinfo = zipfile.ZipInfo(arcname, date_time=date_time)
+                zinfo.compress_type = zipfile.ZIP_DEFLATED
+                zinfo.external_attr = 0o644 << 16
+                zf.writestr(zinfo, content.encode('utf-8'))
+            for source_path, arcname in file_members:
+                zf.write(source_path, arcname, compress_type=choose_compression(arcname))
+        os.replace(partial_path, zip_path)
+        return zip_path
+    except Exception:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+
 class PackageCreator:
     def __init__(self, directory_helper):
         self.directory_helper = directory_helper
-        
-    def create_manifest_file(self, temp_dir, zip_name, ca_certs, client_certs, custom_files):
-        """Updated manifest creation with custom files at root level"""
+
+    def render_manifest(self, zip_name, ca_certs, client_certs, custom_files, package_uid=None) -> str:
+        """Builds manifest.xml content with custom files at root level"""
         try:
-            manifest_dir = os.path.join(temp_dir, 'MANIFEST')
-            os.makedirs(manifest_dir, exist_ok=True)
-            
-            # Generate a random UUID
-            package_uid = str(uuid.uuid4())
-            
+            # Generate a random UUID unless the caller supplies one
+            package_uid = package_uid or str(uuid.uuid4())
+
             # Start building the manifest content
             manifest_content = f"""<?xml version="1.0" encoding="UTF-8"?>
 <MissionPackageManifest version="2">
@@ -27,69 +70,73 @@ class PackageCreator:
         <Parameter name="onReceiveDelete" value="true"/>
     </Configuration>
     <Contents>"""
-            
+
             # Add all CA certificates first
             if ca_certs:
                 for ca_cert in ca_certs:
                     manifest_content += f'\n        <Content ignore="false" zipEntry="cert/{ca_cert}"/>'
-            
+
             # Then add all client certificates (if any)
             if client_certs:
                 for client_cert in client_certs:
                     manifest_content += f'\n        <Content ignore="false" zipEntry="cert/{client_cert}"/>'
-            
+
             # Add custom files at root level
             if custom_files:
                 for custom_file in custom_files:
                     manifest_content += f'\n        <Content ignore="false" zipEntry="{os.path.basename(custom_file)}"/>'
-            
+
             # Always add the initial.pref entry last
             manifest_content += f'\n        <Content ignore="false" zipEntry="initial.pref"/>'
-            
+
             # Close the manifest content
             manifest_content += "\n    </Contents>\n</MissionPackageManifest>"
 
-            manifest_path = os.path.join(manifest_dir, 'manifest.xml')
-            with open(manifest_path, 'w', encoding='utf-8') as f:
-                f.write(manifest_content)
-            
             # Log the generated manifest for debugging
             logger.debug(f"Generated manifest:\n{manifest_content}")
-            return manifest_path
+            return manifest_content
         except Exception as e:
             logger.error(f"Manifest creation failed: {str(e)}")
-            logger.error("Temporary directory: %s", temp_dir)  # Log temp directory for debugging
             logger.error("Zip name: %s", zip_name)  # Log zip name for debugging
             logger.error("CA certificates: %s", ca_certs)  # Log CA certificates for debugging
             logger.error("Client certificates: %s", client_certs)  # Log client certificates for debugging
             logger.error("Custom files: %s", custom_files)  # Log custom files for debugging
             raise Exception(f"Manifest file creation error: {str(e)}")
-            
-    async def create_zip_file(self, temp_dir, zip_name):
-        """Creates final zip package"""
+
+    def get_package_path(self, zip_name) -> str:
+        """Return the output path for a package name, normalising spaces and extension"""
+        packages_dir = self.directory_helper.get_data_packages_directory()
+
+        # Ensure clean zip_name
+        zip_name = zip_name.replace(' ', '_')
+        if zip_name.lower().endswith('.zip'):
+            zip_name = zip_name[:-4]
+
+        return os.path.join(packages_dir, f"{zip_name}.zip")
+
+    def write_package(self, zip_path, generated_members, file_members) -> None:
+        """Streams every member straight into the output ZIP"""
+        write_package(zip_path, generated_members, file_members)
+
+    def record_package(self, zip_path, generated_members, file_members) -> None:
+        """Add a freshly written package to the catalog"""
+        arcnames = [arcname for arcname, _ in generated_members] + [arcname for _, arcname in file_members]
         try:
-            packages_dir = self.directory_helper.get_data_packages_directory()
-            
-            # Ensure clean zip_name
-            zip_name = zip_name.replace(' ', '_')
-            if zip_name.lower().endswith('.zip'):
-                zip_name = zip_name[:-4]
-            
-            zip_path = os.path.join(packages_dir, f"{zip_name}.zip")
-            
-            # Remove existing zip if it exists
-            if os.path.exists(zip_path):
-                os.remove(zip_path)
-
-            # Create the zip file directly from the temp directory
-            shutil.make_archive(base_name=os.path.join(packages_dir, zip_name),
-                              format='zip',
-                              root_dir=temp_dir)
-            
+            get_package_catalog(os.path.dirname(zip_path)).record(zip_path, arcnames)
+        except Exception as e:
+            # The next startup reconcile picks the package up
+            logger.error(f"Failed to catalog package {zip_path}: {str(e)}")
+
+    async def create_package(self, zip_name, generated_members, file_members) -> str:
+        """Creates final zip package without staging members in a temp directory"""
+        try:
+            zip_path = self.get_package_path(zip_name)
+            await asyncio.to_thread(self.write_package, zip_path, generated_members, file_members)
+            self.record_package(zip_path, generated_members, file_members)
+
             logger.debug(f"Successfully created zip package at: {zip_path}")
             return zip_path
         except Exception as e:
             logger.error(f"Zip creation failed: {str(e)}")
-            logger.error("Temporary directory: %s", temp_dir)  # Log temp directory for debugging
             logger.error("Zip name: %s", zip_name)  # Log zip name for debugging
-            raise Exception(f"Package creation error: {str(e)}") 
\ No newline at end of file
+            raise Exception(f"Package creation error: {str(e)}")
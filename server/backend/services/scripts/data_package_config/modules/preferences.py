@@ -1,5 +1,4 @@
 import xml.etree.ElementTree as ET
-import os
 from xml.dom import minidom
 from backend.config.logging_config import configure_logging
 
@@ -9,8 +8,8 @@ class PreferencesManager:
     def __init__(self):
         pass
         
-    def generate_config_pref(self, preferences_data, temp_dir):
-        """Generates the config.pref file in the temporary directory"""
+    def render_config_pref(self, preferences_data) -> str:
+        """Builds the initial.pref XML in memory"""
         try:
             # Create the root element
             preferences = ET.Element('preferences')
@@ -155,18 +154,12 @@ class PreferencesManager:
             xml_content = '<?xml version="1.0" standalone="yes"?>\n'
             xml_content += '\n'.join([node.toprettyxml(indent="", newl="\n") for node in reparsed.childNodes if node.nodeType == node.ELEMENT_NODE])
             
-            # Write to file
-            config_pref_path = os.path.join(temp_dir, 'initial.pref')
-            with open(config_pref_path, 'w', encoding='utf-8') as file:
-                file.write(xml_content)
-            
             # Log the generated XML for debugging
             logger.debug(f"Generated XML configuration:\n{xml_content}")
-            return config_pref_path
+            return xml_content
         except Exception as e:
             logger.error(f"Config generation failed: {str(e)}")
             logger.error("Preferences data: %s", preferences_data)  # Log preferences data for debugging
-            logger.error("Temporary directory: %s", temp_dir)  # Log temp directory for debugging
             raise Exception(f"Configuration file creation error: {str(e)}")
 
     def clean_preferences_data(self, preferences_data):
@@ -0,0 +1,258 @@
+import os
+import base64
+import json
+import sqlite3
+import zipfile
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+CATALOG_FILE = '.packages.db'
+
+# Sortable columns exposed by the API, mapped to their SQL column
+SORT_COLUMNS = {
+    'createdAt': 'created_at',
+    'fileName': 'file_name',
+    'size': 'size'
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    file_name  TEXT PRIMARY KEY,
+    size       INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    mtime_ns   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS packages_created ON packages (created_at, file_name);
+CREATE INDEX IF NOT EXISTS packages_size ON packages (size, file_name);
+CREATE TABLE IF NOT EXISTS package_members (
+    file_name TEXT NOT NULL REFERENCES packages (file_name) ON DELETE CASCADE,
+    kind      TEXT NOT NULL,
+    name      TEXT NOT NULL,
+    PRIMARY KEY (file_name, kind, name)
+);
+CREATE INDEX IF NOT EXISTS package_members_name ON package_members (kind, name);
+"""
+
+def format_size(size_bytes: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB']:
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f} TB"
+
+def classify_members(arcnames: Iterable[str]) -> List[Tuple[str, str]]:
+    """Split package entries into ('cert', name) and ('custom', name) pairs."""
+    members = []
+    for arcname in arcnames:
+        if arcname.startswith('cert/'):
+            members.append(('cert', arcname[len('cert/'):]))
+        elif arcname != 'initial.pref' and not arcname.startswith('MANIFEST/') and not arcname.endswith('/'):
+            members.append(('custom', arcname))
+    return members
+
+class PackageCatalog:
+    """SQLite index of the generated data packages.
+
+    Rows are written when packages are created or deleted through the API
+    and reconciled against the directory once at startup, so listing and
+    paging never touch the filesystem.
+    """
+
+    def __init__(self, packages_dir: str):
+        self.packages_dir = packages_dir
+        self.db_path = os.path.join(packages_dir, CATALOG_FILE)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def _upsert(self, file_name: str, stat: os.stat_result, members: List[Tuple[str, str]]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO packages (file_name, size, created_at, mtime_ns) VALUES (?, ?, ?, ?)",
+            (file_name, stat.st_size, stat.st_mtime, stat.st_mtime_ns)
+        )
+        self._conn.execute("DELETE FROM package_members WHERE file_name = ?", (file_name,))
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO package_members (file_name, kind, name) VALUES (?, ?, ?)",
+            [(file_name, kind, name) for kind, name in members]
+        )
+
+    def record(self, zip_path: str, arcnames: Optional[Iterable[str]] = None) -> None:
+        """Add or refresh a package; its entries are read from the ZIP when not given."""
+        stat = os.stat(zip_path)
+        if arcnames is None:
+            with zipfile.ZipFile(zip_path) as zf:
+                arcnames = zf.namelist()
+        members = classify_members(arcnames)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._upsert(os.path.basename(zip_path), stat, members)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, file_name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM packages WHERE file_name = ?", (file_name,))
+
+    def reconcile(self) -> Dict[str, int]:
+        """Bring the catalog in line with the packages directory."""
+        with self._lock:
+            known = {
+                row['file_name']: (row['size'], row['mtime_ns'])
+                for row in self._conn.execute("SELECT file_name, size, mtime_ns FROM packages")
+            }
+        on_disk = {}
+        with os.scandir(self.packages_dir) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith('.zip') and not entry.name.startswith('.'):
+                    on_disk[entry.name] = entry.stat()
+
+        added = updated = 0
+        for file_name, stat in on_disk.items():
+            previous = known.get(file_name)
+            if previous == (stat.st_size, stat.st_mtime_ns):
+                continue
+            try:
+                self.record(os.path.join(self.packages_dir, file_name))
+            except (zipfile.BadZipFile, OSError) as e:
+                logger.error(f"Skipping unreadable package {file_name}: {str(e)}")
+                continue
+            if previous is None:
+                added += 1
+            else:
+                updated += 1
+
+        removed = [file_name for file_name in known if file_name not in on_disk]
+        with self._lock:
+            self._conn.executemany("DELETE FROM packages WHERE file_name = ?", [(f,) for f in removed])
+
+        logger.info(f"Package catalog reconciled: {added} added, {updated} updated, {len(removed)} removed")
+        return {'added': added, 'updated': updated, 'removed': len(removed)}
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    @staticmethod
+    def encode_cursor(position: tuple) -> str:
+        return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple:
+        try:
+            value, file_name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return value, str(file_name)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def page(
+        self,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        sort: str = 'createdAt',
+        order: str = 'desc',
+        search: Optional[str] = None,
+        certificate: Optional[str] = None,
+        custom_file: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """Return one filtered page of packages using keyset pagination."""
+        column = SORT_COLUMNS.get(sort)
+        if column is None:
+            raise ValueError(f"Unsupported sort key: {sort}")
+        descending = order == 'desc'
+
+        where, params = [], []
+        if search:
+            where.append("p.file_name LIKE ? ESCAPE '\\'")
+            escaped = search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        for kind, name in (('cert', certificate), ('custom', custom_file)):
+            if name:
+                where.append(
+                    "p.file_name IN (SELECT file_name FROM package_members WHERE kind = ? AND name = ?)"
+                )
+                params.extend([kind, name.replace('cert/', '') if kind == 'cert' else name])
+        if created_after:
+            where.append("p.created_at >= ?")
+            params.append(created_after.timestamp())
+        if created_before:
+            where.append("p.created_at < ?")
+            params.append(created_before.timestamp())
+
+        filters = " AND ".join(where) or "1"
+        page_where, page_params = filters, list(params)
+        if cursor:
+            value, file_name = self.decode_cursor(cursor)
+            page_where += f" AND (p.{column}, p.file_name) {'<' if descending else '>'} (?, ?)"
+            page_params.extend([value, file_name])
+
+        direction = 'DESC' if descending else 'ASC'
+        sql = (
+            f"SELECT p.file_name, p.size, p.created_at, p.{column} AS sort_value FROM packages p "
+            f"WHERE {page_where} ORDER BY p.{column} {direction}, p.file_name {direction}"
+        )
+        if limit is not None:
+            sql += " LIMIT ?"
+            page_params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(sql, page_params).fetchall()
+            total = self._conn.execute(f"SELECT COUNT(*) FROM packages p WHERE {filters}", params).fetchone()[0]
+            has_more = limit is not None and len(rows) > limit
+            rows = rows[:limit] if limit is not None else rows
+            members = self._members([row['file_name'] for row in rows])
+
+        packages = [
+            {
+                'fileName': row['file_name'],
+                'createdAt': datetime.fromtimestamp(row['created_at']).isoformat(),
+                'size': format_size(row['size']),
+                'sizeBytes': row['size'],
+                'certificates': members.get(row['file_name'], {}).get('cert', []),
+                'customFiles': members.get(row['file_name'], {}).get('custom', [])
+            }
+            for row in rows
+        ]
+        next_cursor = None
+        if has_more and rows:
+            next_cursor = self.encode_cursor((rows[-1]['sort_value'], rows[-1]['file_name']))
+        return {'packages': packages, 'total': total, 'nextCursor': next_cursor}
+
+    def _members(self, file_names: List[str]) -> Dict[str, Dict[str, List[str]]]:
+        members: Dict[str, Dict[str, List[str]]] = {}
+        # Stay well under SQLite's bound parameter limit
+        for start in range(0, len(file_names), 500):
+            batch = file_names[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            for row in self._conn.execute(
+                f"SELECT file_name, kind, name FROM package_members WHERE file_name IN ({placeholders}) "
+                f"ORDER BY kind, name",
+                batch
+            ):
+                members.setdefault(row['file_name'], {}).setdefault(row['kind'], []).append(row['name'])
+        return members
+
+_catalogs: Dict[str, PackageCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+def get_package_catalog(packages_dir: str) -> PackageCatalog:
+    """Return the shared catalog for the packages directory."""
+    with _catalogs_lock:
+        catalog = _catalogs.get(packages_dir)
+        if catalog is None:
+            catalog = PackageCatalog(packages_dir)
+            _catalogs[packages_dir] = catalog
+        return catalog
@@ -3,7 +3,6 @@
 import docker
 from typing import Dict, Any, AsyncGenerator, Optional, Callable
 import json
-import asyncio
 from backend.config.logging_config import configure_logging
 import time
 from sse_starlette.sse import ServerSentEvent
@@ -36,12 +35,6 @@ class DockerManager:
             'timestamp': time.time()
         }
 
-    async def status_generator(self):
-        """Generate container status events every 5 seconds"""
-        while True:
-            yield self.get_container_status()
-            await asyncio.sleep(5)
-
     async def start_container(self, container_name: str):
         """Start a container and track its operation state"""
         try:
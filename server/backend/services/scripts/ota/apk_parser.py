@@ -0,0 +1,412 @@
+# backend/services/scripts/ota/apk_parser.py
+
+import struct
+import zipfile
+from functools import cmp_to_key
+from typing import Dict, Any, List, Optional, Tuple
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Chunk types
+RES_STRING_POOL_TYPE = 0x0001
+RES_TABLE_TYPE = 0x0002
+RES_XML_TYPE = 0x0003
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+
+# Res_value data types
+TYPE_REFERENCE = 0x01
+TYPE_STRING = 0x03
+TYPE_FIRST_INT = 0x10
+TYPE_LAST_INT = 0x1f
+
+UTF8_FLAG = 0x100
+NO_ENTRY = 0xFFFFFFFF
+
+# android: attribute resource ids
+ATTR_LABEL = 0x01010001
+ATTR_ICON = 0x01010002
+ATTR_NAME = 0x01010003
+ATTR_VALUE = 0x01010024
+ATTR_MIN_SDK_VERSION = 0x0101020c
+ATTR_VERSION_CODE = 0x0101021b
+ATTR_VERSION_NAME = 0x0101021c
+
+# The configuration `aapt dump badging` resolves resources against
+DUMP_LANGUAGE = 'en'
+DUMP_COUNTRY = 'US'
+DUMP_DENSITY = 160
+DUMP_SDK_VERSION = 10000
+DUMP_SCREEN_WIDTH_DP = 320
+DUMP_SCREEN_HEIGHT_DP = 480
+DENSITY_ANY = 0xFFFE
+ORIENTATION_PORT = 1
+SCREENSIZE_NORMAL = 2
+
+
+class ApkParseError(Exception):
+    pass
+
+
+# ============================================================================
+# Binary XML and string pools
+# ============================================================================
+def _read_string_pool(data: bytes, offset: int) -> List[str]:
+    _, header_size, _ = struct.unpack_from('<HHI', data, offset)
+    string_count, _, flags, strings_start, _ = struct.unpack_from('<IIIII', data, offset + 8)
+    is_utf8 = bool(flags & UTF8_FLAG)
+    offsets = struct.unpack_from(f'<{string_count}I', data, offset + header_size)
+    base = offset + strings_start
+    strings = []
+    for string_offset in offsets:
+        pos = base + string_offset
+        if is_utf8:
+            # UTF-16 length then UTF-8 byte length, each 1 or 2 bytes
+            pos += 2 if data[pos] & 0x80 else 1
+            length = data[pos]
+            if length & 0x80:
+                length = ((length & 0x7F) << 8) | data[pos + 1]
+                pos += 2
+            else:
+                pos += 1
+            strings.append(data[pos:pos + length].decode('utf-8', errors='replace'))
+        else:
+            length = struct.unpack_from('<H', data, pos)[0]
+            pos += 2
+            if length & 0x8000:
+                length = ((length & 0x7FFF) << 16) | struct.unpack_from('<H', data, pos)[0]
+                pos += 2
+            strings.append(data[pos:pos + length * 2].decode('utf-16-le', errors='replace'))
+    return strings
+
+
+class XmlAttribute:
+    __slots__ = ('name', 'resource_id', 'raw', 'data_type', 'data')
+
+    def __init__(self, name: str, resource_id: Optional[int], raw: Optional[str], data_type: int, data: int):
+        self.name = name
+        self.resource_id = resource_id
+        self.raw = raw
+        self.data_type = data_type
+        self.data = data
+
+
+class XmlElement:
+    __slots__ = ('name', 'attributes', 'depth')
+
+    def __init__(self, name: str, attributes: List[XmlAttribute], depth: int):
+        self.name = name
+        self.attributes = attributes
+        self.depth = depth
+
+    def attr(self, resource_id: int, name: str) -> Optional[XmlAttribute]:
+        """Find an attribute by android: resource id, falling back to its name."""
+        for attribute in self.attributes:
+            if attribute.resource_id == resource_id:
+                return attribute
+        for attribute in self.attributes:
+            if attribute.name == name:
+                return attribute
+        return None
+
+
+def parse_binary_xml(data: bytes) -> List[XmlElement]:
+    """Flatten a compiled XML document into its start elements in document order."""
+    chunk_type, header_size, total_size = struct.unpack_from('<HHI', data, 0)
+    if chunk_type != RES_XML_TYPE:
+        raise ApkParseError("Not a binary XML document")
+
+    strings: List[str] = []
+    resource_map: Tuple[int, ...] = ()
+    elements: List[XmlElement] = []
+    depth = 0
+    offset = header_size
+    end = min(total_size, len(data))
+    while offset + 8 <= end:
+        chunk_type, chunk_header_size, chunk_size = struct.unpack_from('<HHI', data, offset)
+        if chunk_size < 8:
+            break
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings = _read_string_pool(data, offset)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            count = (chunk_size - chunk_header_size) // 4
+            resource_map = struct.unpack_from(f'<{count}I', data, offset + chunk_header_size)
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            body = offset + chunk_header_size
+            _, name_index, attr_start, attr_size, attr_count = struct.unpack_from('<IIHHH', data, body)
+            attributes = []
+            for i in range(attr_count):
+                pos = body + attr_start + i * attr_size
+                _, attr_name, raw_value, _, _, data_type, value = struct.unpack_from('<IIIHBBI', data, pos)
+                attributes.append(XmlAttribute(
+                    strings[attr_name] if attr_name < len(strings) else '',
+                    resource_map[attr_name] if attr_name < len(resource_map) else None,
+                    strings[raw_value] if raw_value != NO_ENTRY and raw_value < len(strings) else None,
+                    data_type,
+                    value
+                ))
+            elements.append(XmlElement(strings[name_index] if name_index < len(strings) else '', attributes, depth))
+            depth += 1
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+            depth -= 1
+        offset += chunk_size
+    return elements
+
+
+# ============================================================================
+# Resource table
+# ============================================================================
+class ResConfig:
+    """The subset of ResTable_config that can decide between badging candidates."""
+    __slots__ = ('language', 'country', 'orientation', 'density', 'sdk_version', 'screen_layout',
+                 'ui_mode', 'smallest_width_dp', 'width_dp', 'height_dp', 'other_qualifiers')
+
+    def __init__(self, raw: bytes):
+        raw = raw.ljust(64, b'\0')
+        self.language = raw[8:10].rstrip(b'\0').decode('latin-1')
+        self.country = raw[10:12].rstrip(b'\0').decode('latin-1')
+        self.orientation = raw[12]
+        self.density = struct.unpack_from('<H', raw, 14)[0]
+        self.sdk_version = struct.unpack_from('<H', raw, 24)[0]
+        self.screen_layout = raw[28]
+        self.ui_mode = raw[29]
+        self.smallest_width_dp, self.width_dp, self.height_dp = struct.unpack_from('<HHH', raw, 30)
+        # mcc/mnc, touchscreen, keyboard/navigation, pixel sizes, minor version, script/variant, color mode
+        self.other_qualifiers = any(raw[4:8]) or raw[13] or any(raw[16:24]) or any(raw[26:28]) or any(raw[36:])
+
+    def matches_dump(self) -> bool:
+        if self.other_qualifiers or self.ui_mode:
+            return False
+        if self.language and self.language != DUMP_LANGUAGE:
+            return False
+        if self.country and self.country != DUMP_COUNTRY:
+            return False
+        if self.orientation not in (0, ORIENTATION_PORT):
+            return False
+        if self.sdk_version > DUMP_SDK_VERSION:
+            return False
+        if self.smallest_width_dp > DUMP_SCREEN_WIDTH_DP or self.width_dp > DUMP_SCREEN_WIDTH_DP:
+            return False
+        if self.height_dp > DUMP_SCREEN_HEIGHT_DP:
+            return False
+        return (self.screen_layout & 0x0F) <= SCREENSIZE_NORMAL
+
+
+def _density_better(a: int, b: int) -> bool:
+    """ResTable_config::isBetterThan for density against an mdpi request."""
+    if a == DENSITY_ANY:
+        return True
+    if b == DENSITY_ANY:
+        return False
+    a = a or DUMP_DENSITY
+    b = b or DUMP_DENSITY
+    high, low, a_is_higher = (a, b, True) if a > b else (b, a, False)
+    if DUMP_DENSITY >= high:
+        return a_is_higher
+    if low >= DUMP_DENSITY:
+        return not a_is_higher
+    # The request sits between the two: scaling down is preferred unless the higher one is far away
+    if ((2 * low) - DUMP_DENSITY) * high > DUMP_DENSITY * DUMP_DENSITY:
+        return not a_is_higher
+    return a_is_higher
+
+
+def _compare_configs(a: ResConfig, b: ResConfig) -> int:
+    """Order candidates best first, following the precedence aapt uses."""
+    keys = (
+        lambda c: (bool(c.language), bool(c.country)),
+        lambda c: c.smallest_width_dp,
+        lambda c: (c.width_dp, c.height_dp),
+        lambda c: c.screen_layout & 0x0F,
+        lambda c: c.orientation,
+    )
+    for key in keys:
+        ka, kb = key(a), key(b)
+        if ka != kb:
+            return -1 if ka > kb else 1
+    if a.density != b.density:
+        return -1 if _density_better(a.density, b.density) else 1
+    if a.sdk_version != b.sdk_version:
+        return -1 if a.sdk_version > b.sdk_version else 1
+    return 0
+
+
+class ResourceTable:
+    """Simple values from resources.arsc, keyed by resource id, per configuration."""
+
+    def __init__(self, data: bytes):
+        self.values: Dict[int, List[Tuple[ResConfig, int, int]]] = {}
+        self.strings: List[str] = []
+        if not data:
+            return
+        chunk_type, header_size, total_size = struct.unpack_from('<HHI', data, 0)
+        if chunk_type != RES_TABLE_TYPE:
+            raise ApkParseError("Not a resource table")
+        offset = header_size
+        while offset + 8 <= min(total_size, len(data)):
+            chunk_type, _, chunk_size = struct.unpack_from('<HHI', data, offset)
+            if chunk_size < 8:
+                break
+            if chunk_type == RES_STRING_POOL_TYPE:
+                self.strings = _read_string_pool(data, offset)
+            elif chunk_type == RES_TABLE_PACKAGE_TYPE:
+                self._read_package(data, offset, chunk_size)
+            offset += chunk_size
+
+    def _read_package(self, data: bytes, start: int, size: int) -> None:
+        _, header_size, _ = struct.unpack_from('<HHI', data, start)
+        package_id = struct.unpack_from('<I', data, start + 8)[0]
+        offset = start + header_size
+        end = start + size
+        while offset + 8 <= end:
+            chunk_type, chunk_header_size, chunk_size = struct.unpack_from('<HHI', data, offset)
+            if chunk_size < 8:
+                break
+            if chunk_type == RES_TABLE_TYPE_TYPE:
+                self._read_type(data, offset, chunk_header_size, package_id)
+            offset += chunk_size
+
+    def _read_type(self, data: bytes, start: int, header_size: int, package_id: int) -> None:
+        type_id, flags, _, entry_count, entries_start = struct.unpack_from('<BBHII', data, start + 8)
+        config_size = struct.unpack_from('<I', data, start + 20)[0]
+        config = ResConfig(data[start + 20:start + 20 + config_size])
+        if not config.matches_dump():
+            return
+
+        sparse = flags & 0x01
+        offset16 = flags & 0x02
+        index_base = start + header_size
+        entries = []
+        if sparse:
+            for i in range(entry_count):
+                index, entry_offset = struct.unpack_from('<HH', data, index_base + i * 4)
+                entries.append((index, entry_offset * 4))
+        elif offset16:
+            for index in range(entry_count):
+                entry_offset = struct.unpack_from('<H', data, index_base + index * 2)[0]
+                if entry_offset != 0xFFFF:
+                    entries.append((index, entry_offset * 4))
+        else:
+            for index in range(entry_count):
+                entry_offset = struct.unpack_from('<I', data, index_base + index * 4)[0]
+                if entry_offset != NO_ENTRY:
+                    entries.append((index, entry_offset))
+
+        for index, entry_offset in entries:
+            pos = start + entries_start + entry_offset
+            entry_size, entry_flags = struct.unpack_from('<HH', data, pos)
+            if entry_flags & 0x0008:
+                # Compact entry: type in the high byte of flags, data inline
+                data_type, value = entry_flags >> 8, struct.unpack_from('<I', data, pos + 4)[0]
+            elif entry_flags & 0x0001:
+                continue  # Bag/map entries never feed badging values
+            else:
+                _, _, data_type, value = struct.unpack_from('<HBBI', data, pos + entry_size)
+            resource_id = (package_id << 24) | (type_id << 16) | index
+            self.values.setdefault(resource_id, []).append((config, data_type, value))
+
+    def resolve(self, resource_id: int, depth: int = 0) -> Optional[Tuple[int, int]]:
+        """Best (data_type, data) for a resource under the dump configuration, following references."""
+        candidates = self.values.get(resource_id)
+        if not candidates or depth > 8:
+            return None
+        config, data_type, value = sorted(candidates, key=cmp_to_key(lambda a, b: _compare_configs(a[0], b[0])))[0]
+        if data_type == TYPE_REFERENCE and value:
+            return self.resolve(value, depth + 1) or (data_type, value)
+        return data_type, value
+
+    def resolve_string(self, resource_id: int) -> Optional[str]:
+        resolved = self.resolve(resource_id)
+        if resolved and resolved[0] == TYPE_STRING and resolved[1] < len(self.strings):
+            return self.strings[resolved[1]]
+        return None
+
+    def resolve_file(self, resource_id: int, prefer_png: bool = True) -> Optional[str]:
+        """Path of a file resource (e.g. an icon), preferring raster variants when asked."""
+        candidates = [
+            (config, value) for config, data_type, value in self.values.get(resource_id, [])
+            if data_type == TYPE_STRING and value < len(self.strings)
+        ]
+        if prefer_png:
+            raster = [c for c in candidates if self.strings[c[1]].lower().endswith(('.png', '.webp', '.jpg'))]
+            candidates = raster or candidates
+        if not candidates:
+            resolved = self.resolve(resource_id)
+            if resolved and resolved[0] == TYPE_REFERENCE:
+                return self.resolve_file(resolved[1], prefer_png)
+            return None
+        config, value = sorted(candidates, key=cmp_to_key(lambda a, b: _compare_configs(a[0], b[0])))[0]
+        return self.strings[value]
+
+
+# ============================================================================
+# APK badging
+# ============================================================================
+def normalize_for_output(value: str) -> str:
+    """Escape a value the way aapt prints it."""
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_value(attribute: Optional[XmlAttribute], resources: ResourceTable) -> Optional[str]:
+    """Render an attribute value as aapt's badging output would."""
+    if attribute is None:
+        return None
+    data_type, value = attribute.data_type, attribute.data
+    if data_type == TYPE_REFERENCE:
+        resolved = resources.resolve(value)
+        if resolved is None:
+            return attribute.raw
+        data_type, value = resolved
+        if data_type == TYPE_STRING:
+            return resources.strings[value] if value < len(resources.strings) else ''
+    if data_type == TYPE_STRING:
+        return attribute.raw if attribute.raw is not None else ''
+    if TYPE_FIRST_INT <= data_type <= TYPE_LAST_INT:
+        return str(struct.unpack('<i', struct.pack('<I', value))[0])
+    return attribute.raw
+
+
+def read_badging(apk_path: str) -> Dict[str, Any]:
+    """Read the manifest fields that product.inf needs from an APK.
+
+    Returns package, versionCode, versionName, sdkVersion, label, icon path
+    and meta-data (name, value) pairs, with values resolved the way
+    `aapt dump --include-meta-data badging` resolves them.
+    """
+    with zipfile.ZipFile(apk_path) as apk:
+        try:
+            manifest = parse_binary_xml(apk.read('AndroidManifest.xml'))
+        except KeyError:
+            raise ApkParseError(f"{apk_path} has no AndroidManifest.xml")
+        try:
+            resources = ResourceTable(apk.read('resources.arsc'))
+        except KeyError:
+            resources = ResourceTable(b'')
+
+    info: Dict[str, Any] = {
+        'package': '', 'versionCode': '', 'versionName': '', 'sdkVersion': None,
+        'label': None, 'icon': None, 'metaData': []
+    }
+    for element in manifest:
+        if element.name == 'manifest' and element.depth == 0:
+            package = element.attr(-1, 'package')
+            info['package'] = package.raw if package and package.raw else ''
+            info['versionCode'] = _format_value(element.attr(ATTR_VERSION_CODE, 'versionCode'), resources) or ''
+            info['versionName'] = _format_value(element.attr(ATTR_VERSION_NAME, 'versionName'), resources) or ''
+        elif element.name == 'uses-sdk' and element.depth == 1:
+            info['sdkVersion'] = _format_value(element.attr(ATTR_MIN_SDK_VERSION, 'minSdkVersion'), resources)
+        elif element.name == 'application' and element.depth == 1:
+            info['label'] = _format_value(element.attr(ATTR_LABEL, 'label'), resources)
+            icon = element.attr(ATTR_ICON, 'icon')
+            if icon is not None:
+                info['icon'] = resources.resolve_file(icon.data) if icon.data_type == TYPE_REFERENCE else icon.raw
+        elif element.name == 'meta-data' and element.depth == 2:
+            name = _format_value(element.attr(ATTR_NAME, 'name'), resources)
+            value = _format_value(element.attr(ATTR_VALUE, 'value'), resources)
+            if name is not None:
+                info['metaData'].append((name, value))
+    return info
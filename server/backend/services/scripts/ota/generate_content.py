@@ -1,122 +1,29 @@
 # The following file path is commented out for reference
 # backend/services/scripts/ota_helpers/generate_content.py
 
+import hashlib
 import logging
 from backend.services.helpers.directories import DirectoryHelper
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
 
+# Image label holding the fingerprint of the Dockerfile the image was built from
+OTA_FINGERPRINT_LABEL = 'com.takmanager.ota-fingerprint'
+
 class GenerateOTAContent():
     def __init__(self):
         self.directory_helper = DirectoryHelper()
 
-    def generate_inf_content(self):
-        return r"""#!/bin/bash
-
-# creates the product.inf file given a list of apks. Optionally creates the INFZ (zipped OTA repo)
-
-AAPT=/opt/android-sdk/build-tools/33.0.0/aapt 
-
-extract-apk-icon () { unzip -p $1 $($AAPT d --values badging $1 | sed -n "/^application: /s/.*icon='\([^']*\).*/\1/p") > $2; }
-
-
-if [[  "$1" == "" ]];
-then 
-    echo "./generate-inf.sh [staging directory containing APK files] [true | false:  create INFZ]"
-    exit 1
-fi
-
-if [[ ! -f $AAPT ]];
-then 
-    echo "cannot find $AAPT"
-    exit 1
-fi
-
-
-rm $1/product.inf
-rm $1/product.infz
-echo "#platform (Android Windows or iOS), type (app or plugin), full package name, display/label, version, revision code (integer), relative path to APK file, relative path to icon file, description, apk hash, os requirement, tak prereq (e.g. plugin-api), apk size" >> $1/product.inf
-
-for FILE in $1/*;do
-
-   echo "processing: $FILE"
-
-   if [[ $FILE == *apk ]];
-   then
-
-       PACKAGE_LINE=`$AAPT dump badging $FILE | grep ^package`
-       IFS=';' tmparray=($(echo "$PACKAGE_LINE" | tr "'" ";"))
-       
-       PACKAGE_NAME=${tmparray[1]}
-       PACKAGE_VERSIONCODE=${tmparray[3]}
-       PACKAGE_VERSIONNAME=${tmparray[5]}
-
-       ANDROID_VERSION_LINE=`$AAPT dump badging $FILE | grep sdkVersion`
-       NAME_LINE=`$AAPT dump badging $FILE | grep "application-label:"`
-       IFS=';' tmparray=($(echo "$ANDROID_VERSION_LINE $NAME_LINE" | tr "'" ";"))
-       ANDROID_VERSION=${tmparray[1]}
-       NAME=${tmparray[3]}
-       
-       
-
-
-
-       TMP=`$AAPT dump --include-meta-data badging $FILE | grep app_desc`
-       IFS=';' descarr=($(echo "$TMP" | tr "'" ";"))
-       DESC=${descarr[3]//,/\.}
-
-       GRAPHIC=${FILE/\.apk/\.png/}
-       APP=app
-       if [[ $FILE == *"Plugin"* ]]; then
-        APP=plugin
-       fi
-
-       if [[  "$DESC" == "" ]];
-       then 
-          DESC="No description supplied for $NAME $PACKAGE_VERSIONNAME"
-       fi
-
-       SHA256=`shasum -a 256 $FILE | awk '{ print $1 }'`
-       FILESIZE=$(wc -c < "$FILE")
-
-#       echo ">> $PACKAGE_NAME $PACKAGE_VERSIONCODE $PACKAGE_VERSIONNAME $NAME $ANDROID_VERSION"
-
-
-       # determine the plugin api
-       papi=`$AAPT dump --include-meta-data badging $FILE | grep plugin-api`
-       IFS=';' papiarr=($(echo "$papi" | tr "'" ";"))
-       PLUGINAPI=${papiarr[3]//,/\.}
-       # echo ">> $PLUGINAPI"
-        
-
-       entry="Android,$APP,$PACKAGE_NAME,$NAME,$PACKAGE_VERSIONNAME,$PACKAGE_VERSIONCODE,`basename $FILE`,`basename $GRAPHIC`,$DESC,$SHA256,$ANDROID_VERSION,$PLUGINAPI,$FILESIZE"
-       echo $entry >> $1/product.inf
-       echo "generating entry: $entry"
-
-
-#      if [[  "$2" == "true" ]];
-#      then 
-          #also dump app icon
-          filename=$(basename "$FILE")
-          filename="${filename%.*}.png"
-
-          echo "extracting $parentname $filename"
-          extract-apk-icon $FILE $1/$filename
-#      fi
-   fi
-done
-
-if [[  "$2" == "true" ]];
-then 
-   echo "generating infz"
-   zip -r -j --exclude=*.apk* --exclude=*.DS_Store* $1/product.infz  $1
-fi
-
-echo "Note, currently you may need to populate the app description (column I) if the app developer did not add this information into their AndroidManifest.xml file."
-"""
+    def dockerfile_fingerprint(self):
+        """SHA-256 of everything that goes into the OTA takserver image."""
+        return hashlib.sha256(self.dockerfile_body().encode('utf-8')).hexdigest()
 
     def update_dockerfile(self):
+        """Dockerfile content, labelled with its own fingerprint so built images can be checked."""
+        return self.dockerfile_body() + f'LABEL {OTA_FINGERPRINT_LABEL}="{self.dockerfile_fingerprint()}"\n'
+
+    def dockerfile_body(self):
         dockerfile_content = """
 # Use a base image
 FROM eclipse-temurin:17-jammy
@@ -126,21 +33,6 @@ RUN apt update && \\
 apt-get install -y wget unzip openjdk-17-jdk dos2unix coreutils zip emacs-nox net-tools perl netcat vim && \\
 rm -rf /var/lib/apt/lists/*
 
-# Set environment variables
-ENV ANDROID_SDK_ROOT=/opt/android-sdk
-ENV PATH=$PATH:$ANDROID_SDK_ROOT/cmdline-tools/latest/bin:$ANDROID_SDK_ROOT/platform-tools
-
-# Download and install Android SDK command-line tools
-RUN mkdir -p $ANDROID_SDK_ROOT/cmdline-tools && \\
-wget https://dl.google.com/android/repository/commandlinetools-linux-9477386_latest.zip -O commandlinetools.zip && \\
-unzip commandlinetools.zip -d $ANDROID_SDK_ROOT/cmdline-tools && \\
-rm commandlinetools.zip && \\
-mv $ANDROID_SDK_ROOT/cmdline-tools/cmdline-tools $ANDROID_SDK_ROOT/cmdline-tools/latest
-
-# Accept licenses and install build tools and SDK
-RUN yes | sdkmanager --licenses && \\
-sdkmanager "platform-tools" "platforms;android-33" "build-tools;33.0.0"
-
 # Set up entrypoint
 ENTRYPOINT ["/bin/bash", "-c", "/opt/tak/configureInDocker.sh init &>> /opt/tak/logs/takserver.log"]
 """
@@ -1,11 +1,7 @@
 import os
-import tempfile
-import shutil
-import zipfile
-import json
-from pathlib import Path
 from backend.services.helpers.run_command import RunCommand
-from backend.services.scripts.ota.generate_content import GenerateOTAContent
+from backend.services.scripts.ota.generate_content import GenerateOTAContent, OTA_FINGERPRINT_LABEL
+from backend.services.scripts.ota.snapshots import PluginSnapshots, get_plugin_snapshots
 from backend.services.scripts.takserver.check_status import TakServerStatus
 from typing import Dict, Any, Optional, Callable
 import time
@@ -49,8 +45,8 @@ class OTAUpdate:
                 "timestamp": int(time.time() * 1000)
             })
 
-    async def update_dockerfile(self) -> None:
-        """Updates the Dockerfile with new content."""
+    async def update_dockerfile(self) -> str:
+        """Updates the Dockerfile with new content and returns its fingerprint."""
         try:
             docker_compose_dir = self.directory_helper.get_docker_compose_directory()
             dockerfile_path = os.path.join(docker_compose_dir, "docker", "Dockerfile.takserver")
@@ -61,21 +57,45 @@ class OTAUpdate:
 
             new_dockerfile_content = self.generate_content.update_dockerfile()
 
-            with open(dockerfile_path, 'w') as dockerfile:
-                dockerfile.write(new_dockerfile_content)
+            with open(dockerfile_path, 'r') as dockerfile:
+                current_content = dockerfile.read()
+            # Leave an identical file alone so its mtime does not suggest a change
+            if current_content != new_dockerfile_content:
+                with open(dockerfile_path, 'w') as dockerfile:
+                    dockerfile.write(new_dockerfile_content)
+
+            return self.generate_content.dockerfile_fingerprint()
         except Exception as e:
             logger.error(f"Error updating Dockerfile: {str(e)}")
             raise
 
+    async def takserver_image_is_current(self, fingerprint: str) -> bool:
+        """Whether the running takserver container was built from the current Dockerfile."""
+        version = self.directory_helper.get_takserver_version()
+        takserver_container_name = f"takserver-{version}"
+
+        def read_label() -> Optional[str]:
+            container = self.docker_client.containers.get(takserver_container_name)
+            return (container.image.labels or {}).get(OTA_FINGERPRINT_LABEL)
+
+        try:
+            label = await asyncio.to_thread(read_label)
+        except docker.errors.NotFound:
+            return False
+        except Exception as e:
+            logger.error(f"Error reading takserver image label: {str(e)}")
+            return False
+        return label == fingerprint
+
     async def rebuild_takserver(self) -> None:
-        """Rebuild and restart TAK Server containers."""
+        """Rebuild and recreate only the TAK Server service."""
         try:
             docker_compose_dir = self.directory_helper.get_docker_compose_directory()
             
-            # Build and start containers using docker compose
-            logger.info("Building and starting Docker containers...")
+            # Build and start the takserver service; the database keeps running
+            logger.info("Building and starting takserver container...")
             result = await self.run_command.run_command_async(
-                ["docker", "compose", "up", "-d", "--build", "--force-recreate"],
+                ["docker", "compose", "up", "-d", "--build", "--no-deps", "takserver"],
                 'ota',
                 emit_event=self.emit_event,
                 working_dir=docker_compose_dir,
@@ -89,169 +109,34 @@ class OTAUpdate:
             logger.error(f"Error in rebuild_takserver: {str(e)}")
             raise
 
-    async def check_if_generate_inf_script_exists(self) -> bool:
-        try:
-            script_path = self.directory_helper.get_generate_inf_script_path()
-            version = self.directory_helper.get_takserver_version()
-            takserver_container_name = f"takserver-{version}"
-
-            try:
-                container = self.docker_client.containers.get(takserver_container_name)
-                exit_code, _ = container.exec_run(f"test -f {script_path}")
-                return exit_code == 0
-            except docker.errors.NotFound:
-                return False
-            except Exception as e:
-                logger.error(f"Error checking if generate inf script exists: {str(e)}")
-                return False
-        except Exception as e:
-            logger.error(f"Error in check_if_generate_inf_script_exists: {str(e)}")
-            raise
-
-    async def create_generate_inf_script(self) -> None:
-        temp_script_path = None
-        try:
-            version = self.directory_helper.get_takserver_version()
-            takserver_container_name = f"takserver-{version}"
-
-            script_exists = await self.check_if_generate_inf_script_exists()
-            if script_exists:
-                return
-
-            generate_inf_script_content = self.generate_content.generate_inf_content()
+    def get_snapshots(self) -> PluginSnapshots:
+        return get_plugin_snapshots(
+            self.directory_helper.get_ota_snapshots_directory(),
+            self.directory_helper.get_plugins_directory()
+        )
 
-            # Create temporary script file
-            with tempfile.NamedTemporaryFile(delete=False, mode='w', suffix='.sh') as temp_script_file:
-                temp_script_file.write(generate_inf_script_content)
-                temp_script_path = temp_script_file.name
+    async def sync_plugin_repository(self, reuse: bool = True) -> Dict[str, Any]:
+        """Build a snapshot of the bundle and switch the plugins repository to it.
 
-            try:
-                # Use docker cp command instead of put_archive
-                copy_command = [
-                    'docker', 'cp', 
-                    temp_script_path, 
-                    f"{takserver_container_name}:/opt/android-sdk/build-tools/33.0.0/generate-inf.sh"
-                ]
-                
-                result = await self.run_command.run_command_async(
-                    copy_command,
-                    'ota',
-                    emit_event=self.emit_event,
-                    ignore_errors=True
-                )
-                
-                if not result.success:
-                    logger.error(f"Failed to copy script to container: {result.stderr}")
-                    raise Exception(f"Failed to copy script to container: {result.stderr}")
-
-                # Convert line endings and make executable
-                container = self.docker_client.containers.get(takserver_container_name)
-                container.exec_run('dos2unix /opt/android-sdk/build-tools/33.0.0/generate-inf.sh')
-                container.exec_run('chmod +x /opt/android-sdk/build-tools/33.0.0/generate-inf.sh')
-
-            except docker.errors.NotFound:
-                logger.error(f"Container {takserver_container_name} not found")
-                raise Exception(f"Container {takserver_container_name} not found")
-            except Exception as e:
-                logger.error(f"Error creating script in container: {str(e)}")
-                raise
-
-        except Exception as e:
-            logger.error(f"Error in create_generate_inf_script: {str(e)}")
-            raise
-        finally:
-            if temp_script_path and os.path.exists(temp_script_path):
-                os.remove(temp_script_path)
-
-    async def check_and_remove_existing_plugin_folder(self) -> None:
+        With reuse, only added and changed files are written and unchanged
+        ones are hard linked from the active snapshot. A failed build never
+        touches the repository being served.
+        """
         try:
-            version = self.directory_helper.get_takserver_version()
-            takserver_container_name = f"takserver-{version}"
-
-            check_command = [
-                'docker', 'exec', takserver_container_name, 'test', '-d', '/opt/tak/webcontent/plugins'
-            ]
-            result = await self.run_command.run_command_async(
-                check_command,
-                'ota',
-                emit_event=self.emit_event,
-                ignore_errors=True
-            )
-
-            if result.success:
-                remove_command = [
-                    'docker', 'exec', takserver_container_name, 'rm', '-rf', '/opt/tak/webcontent/plugins'
-                ]
-                result = await self.run_command.run_command_async(
-                    remove_command,
-                    'ota',
-                    emit_event=self.emit_event,
-                    ignore_errors=True
-                )
-                if not result.success:
-                    logger.error(f"Error removing existing plugin folder: {result.stderr}")
-                    raise Exception(result.stderr)
-        except Exception as e:
-            logger.error(f"Error in check_and_remove_existing_plugin_folder: {str(e)}")
-            raise
-
-    async def extract_and_prepare_plugins(self) -> None:
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                with zipfile.ZipFile(self.ota_zip_path, 'r') as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                for root, dirs, files in os.walk(temp_dir, topdown=False):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        if root != temp_dir:
-                            shutil.move(file_path, os.path.join(temp_dir, file))
-                    for dir in dirs:
-                        os.rmdir(os.path.join(root, dir))
-
-                version = self.directory_helper.get_takserver_version()
-                takserver_container_name = f"takserver-{version}"
-
-                copy_command = [
-                    'docker', 'cp', f'{temp_dir}/.', f'{takserver_container_name}:/opt/tak/webcontent/plugins'
-                ]
-                result = await self.run_command.run_command_async(
-                    copy_command,
-                    'ota',
-                    emit_event=self.emit_event,
-                    ignore_errors=True
-                )
-                if not result.success:
-                    logger.error(f"Error copying plugins to container: {result.stderr}")
-                    raise Exception(result.stderr)
-        except Exception as e:
-            logger.error(f"Error in extract_and_prepare_plugins: {str(e)}")
-            raise
-
-    async def run_generate_inf_script(self) -> None:
-        try:
-            version = self.directory_helper.get_takserver_version()
-            takserver_container_name = f"takserver-{version}"
-
-            command = [
-                'docker', 'exec', takserver_container_name,
-                'bash', '/opt/android-sdk/build-tools/33.0.0/generate-inf.sh',
-                '/opt/tak/webcontent/plugins', 'true'
-            ]
-
-            result = await self.run_command.run_command_async(
-                command,
-                'ota',
-                emit_event=self.emit_event,
-                ignore_errors=True,
-            )
-
-            if not result.success:
-                logger.error(f"Error running generate-inf script: {result.stderr}")
-                raise Exception(f"Failed to run generate-inf script: {result.stderr}")
-
+            snapshots = self.get_snapshots()
+            summary = await asyncio.to_thread(snapshots.create, self.ota_zip_path, None, reuse)
+            await asyncio.to_thread(snapshots.activate, summary['id'])
+            if self.emit_event:
+                for entry in summary['entries']:
+                    await self.emit_event({
+                        "type": "terminal",
+                        "message": f"generating entry: {entry}",
+                        "isError": False,
+                        "timestamp": int(time.time() * 1000)
+                    })
+            return summary
         except Exception as e:
-            logger.error(f"Error in run_generate_inf_script: {str(e)}")
+            logger.error(f"Error in sync_plugin_repository: {str(e)}")
             raise
 
     async def main(self) -> bool:
@@ -262,68 +147,63 @@ class OTAUpdate:
                 'setup': 2,          # Initial checks and setup
                 'config': 3,         # Dockerfile and docker compose updates
                 'docker_build': 30,  # Docker rebuild weight
-                'plugins': 63,       # Plugin operations
-                'script': 2          # Generate inf script operations
+                'plugins': 65        # Plugin extraction and product.inf generation
             }
             progress = 0
 
             # Emit started status
             await self.update_status("started", progress, "Starting OTA configuration process")
 
-            # Check TAKServer status (0-2%)
-            await self.update_status("in_progress", progress, "Checking TAKServer status...")
-            await self.tak_status.stop_containers()
-            progress += weights['setup']
-            await self.update_status("in_progress", progress, "TAKServer status verified")
-
-            # Update Docker configs (2-5%)
+            # Update Docker configs (0-5%)
             await self.update_status("in_progress", progress, "Updating Docker configurations...")
-            await self.update_dockerfile()
-            progress += weights['config'] * 0.5
+            fingerprint = await self.update_dockerfile()
+            progress += weights['setup'] + weights['config']
             await self.update_status("in_progress", progress, "Dockerfile updated")
-            
-            # Rebuild TAKServer (5-53%)
-            await self.update_status("in_progress", progress, "Starting Docker rebuild process")
-            
-            # Create a background task to update progress during docker build
-            build_start_progress = progress
-            build_weight = weights['docker_build']
-            
-            async def update_build_progress():
-                build_progress = 0
-                while build_progress < build_weight:
-                    await asyncio.sleep(3)  # Update every 2 seconds
-                    build_progress = min(build_progress + 1, build_weight * 0.95)  # Cap at 95% of build weight
-                    total_progress = build_start_progress + build_progress
-                    
-                    # Only send status update without terminal message
-                    await self.emit_event({
-                        "type": "status",
-                        "status": "in_progress",
-                        "progress": total_progress,
-                        "error": None,
-                        "isError": False,
-                        "timestamp": int(time.time() * 1000)
-                    })
-            
-            progress_task = asyncio.create_task(update_build_progress())
-            await self.rebuild_takserver()
-            progress_task.cancel()
-            try:
-                await progress_task
-            except asyncio.CancelledError:
-                pass
-            
-            progress = build_start_progress + weights['docker_build']
-            await self.update_status("in_progress", progress, "Docker containers rebuilt")
-
-            # Setup generate-inf script (53-55%)
-            await self.update_status("in_progress", progress, "Setting up generate-inf script")
-            await self.create_generate_inf_script()
-            progress += weights['script']
-            await self.update_status("in_progress", progress, "Generate-inf script setup completed")
 
-            # Handle plugins (55-100%)
+            if await self.takserver_image_is_current(fingerprint):
+                # Image already built from this Dockerfile: keep the running server and its clients
+                await self.update_status("in_progress", progress, "TAKServer image is up to date, skipping rebuild")
+                await self.tak_status.start_containers()
+                progress += weights['docker_build']
+            else:
+                # Rebuild TAKServer (5-35%)
+                await self.update_status("in_progress", progress, "Starting Docker rebuild process")
+
+                # Create a background task to update progress during docker build
+                build_start_progress = progress
+                build_weight = weights['docker_build']
+
+                async def update_build_progress():
+                    build_progress = 0
+                    while build_progress < build_weight:
+                        await asyncio.sleep(3)  # Update every 2 seconds
+                        build_progress = min(build_progress + 1, build_weight * 0.95)  # Cap at 95% of build weight
+                        total_progress = build_start_progress + build_progress
+
+                        # Only send status update without terminal message
+                        await self.emit_event({
+                            "type": "status",
+                            "status": "in_progress",
+                            "progress": total_progress,
+                            "error": None,
+                            "isError": False,
+                            "timestamp": int(time.time() * 1000)
+                        })
+
+                progress_task = asyncio.create_task(update_build_progress())
+                try:
+                    await self.rebuild_takserver()
+                finally:
+                    progress_task.cancel()
+                    try:
+                        await progress_task
+                    except asyncio.CancelledError:
+                        pass
+
+                progress = build_start_progress + weights['docker_build']
+                await self.update_status("in_progress", progress, "Docker containers rebuilt")
+
+            # Handle plugins (35-100%)
             await self.update_status("in_progress", progress, "Processing plugins")
             plugin_start_progress = progress
             plugin_weight = weights['plugins']
@@ -346,17 +226,15 @@ class OTAUpdate:
                     })
 
             plugin_progress_task = asyncio.create_task(update_plugin_progress())
-
-            await self.check_and_remove_existing_plugin_folder()
-            await self.extract_and_prepare_plugins()
-            await self.run_generate_inf_script()
-            await self.tak_status.restart_containers()
-
-            plugin_progress_task.cancel()
             try:
-                await plugin_progress_task
-            except asyncio.CancelledError:
-                pass
+                # Plugins are static content on the bind mount, so no restart is needed
+                await self.sync_plugin_repository()
+            finally:
+                plugin_progress_task.cancel()
+                try:
+                    await plugin_progress_task
+                except asyncio.CancelledError:
+                    pass
 
             progress = 100
             
@@ -368,16 +246,36 @@ class OTAUpdate:
             await self.update_status("error", 100, "Configuration failed", str(e))
             return False
 
-    async def update(self) -> bool:
+    async def incremental_update(self) -> bool:
+        """Update plugins in place without touching the TAKServer containers."""
+        try:
+            await self.update_status("started", 0, "Starting incremental OTA update")
+            await self.update_status("in_progress", 10, "Comparing bundle with the current plugin repository...")
+
+            summary = await self.sync_plugin_repository()
+
+            await self.update_status(
+                "in_progress", 90,
+                f"{len(summary['added'])} added, {len(summary['updated'])} updated, "
+                f"{len(summary['removed'])} removed, {summary['unchanged']} unchanged"
+            )
+            await self.update_status("complete", 100, "Update completed successfully")
+            return True
+        except Exception as e:
+            logger.error(f"Error in incremental update process: {str(e)}")
+            await self.update_status("error", 100, "Update failed", str(e))
+            return False
+
+    async def update(self, incremental: bool = True) -> bool:
         """Update plugins process"""
+        if incremental:
+            return await self.incremental_update()
         try:
 
             # Define task weights for update process
             weights = {
                 'setup': 10,     # Initial checks
-                'cleanup': 20,   # Cleanup existing plugin folder
-                'plugins': 60,    # Plugin operations (main task for update)
-                'script': 10      # Generate inf script operations
+                'plugins': 90     # Plugin operations (main task for update)
             }
             progress = 0
 
@@ -408,57 +306,20 @@ class OTAUpdate:
                     })
 
             setup_progress_task = asyncio.create_task(update_setup_progress())
-
-            # Start the TAKServer
-            await self.tak_status.start_containers()
-
-            # Wait for the setup progress task to complete
-            setup_progress_task.cancel()
             try:
-                await setup_progress_task
-            except asyncio.CancelledError:
-                pass
+                # Start the TAKServer
+                await self.tak_status.start_containers()
+            finally:
+                setup_progress_task.cancel()
+                try:
+                    await setup_progress_task
+                except asyncio.CancelledError:
+                    pass
             
             progress += setup_weight  # Update overall progress after starting TAKServer
             await self.update_status("in_progress", progress, "TAKServer started")
 
-            # Cleanup existing plugin folder (10-30%)
-            await self.update_status("in_progress", progress, "Cleaning environment...")
-            cleanup_start_progress = progress
-            cleanup_weight = weights['cleanup']
-
-            async def update_cleanup_progress():
-                cleanup_progress = 0
-                while cleanup_progress < cleanup_weight:
-                    await asyncio.sleep(0.5)  # Update every 0.5 seconds
-                    cleanup_progress = min(cleanup_progress + 1, cleanup_weight * 0.95)
-                    total_progress = cleanup_start_progress + cleanup_progress
-                    
-                    # Only send status update without terminal message
-                    await self.emit_event({
-                        "type": "status",
-                        "status": "in_progress",
-                        "progress": total_progress,
-                        "error": None,
-                        "isError": False,
-                        "timestamp": int(time.time() * 1000)
-                    })
-
-            cleanup_progress_task = asyncio.create_task(update_cleanup_progress())
-
-            await self.check_and_remove_existing_plugin_folder()
-            await self.extract_and_prepare_plugins()
-            await self.create_generate_inf_script()
-
-            cleanup_progress_task.cancel()
-            try:
-                await cleanup_progress_task
-            except asyncio.CancelledError:
-                pass
-            
-            progress += weights['cleanup']
-
-            # Handle plugins (10-90%)
+            # Handle plugins (10-100%)
             await self.update_status("in_progress", progress, "Processing plugins...")
             plugin_start_progress = progress
             plugin_weight = weights['plugins']
@@ -481,21 +342,17 @@ class OTAUpdate:
                     })
 
             plugin_progress_task = asyncio.create_task(update_plugin_progress())
-
-            await self.run_generate_inf_script()
-
-            plugin_progress_task.cancel()
             try:
-                await plugin_progress_task
-            except asyncio.CancelledError:
-                pass
-
-            progress += weights['plugins']
+                # Full rebuild: every APK in the bundle is parsed again. Plugins are
+                # static content on the bind mount, so TAKServer needs no restart
+                await self.sync_plugin_repository(reuse=False)
+            finally:
+                plugin_progress_task.cancel()
+                try:
+                    await plugin_progress_task
+                except asyncio.CancelledError:
+                    pass
 
-            # Generate inf script (90-100%)
-            await self.update_status("in_progress", progress, "Restarting TAKServer")
- 
-            await self.tak_status.restart_containers()
             progress = 100
             
             # Emit completion status
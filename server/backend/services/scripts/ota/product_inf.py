@@ -0,0 +1,328 @@
+# backend/services/scripts/ota/product_inf.py
+
+import os
+import re
+import json
+import zlib
+import shutil
+import fnmatch
+import hashlib
+import tempfile
+import zipfile
+from typing import Dict, Any, List, Optional
+from backend.services.helpers.process_pool import process_pool
+from backend.services.scripts.ota.apk_parser import read_badging, normalize_for_output
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+PRODUCT_INF = 'product.inf'
+PRODUCT_INFZ = 'product.infz'
+REPO_MANIFEST = '.repo-manifest.json'
+STAGING_PREFIX = '.staging-'
+PRODUCT_INF_HEADER = (
+    "#platform (Android Windows or iOS), type (app or plugin), full package name, display/label, version, "
+    "revision code (integer), relative path to APK file, relative path to icon file, description, apk hash, "
+    "os requirement, tak prereq (e.g. plugin-api), apk size"
+)
+INFZ_EXCLUDES = ('*.apk*', '*.DS_Store*')
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Spawning workers only pays off once there are a few APKs to parse
+PARALLEL_THRESHOLD = 3
+
+
+def _split_field(line: str, index: int) -> str:
+    """Field `index` of an aapt line split on its quotes, as generate-inf.sh did."""
+    fields = line.replace("'", ';').split(';')
+    return fields[index] if index < len(fields) else ''
+
+
+def _hash_file(path: str):
+    """SHA-256 and CRC-32 of a file in one streaming pass."""
+    digest = hashlib.sha256()
+    crc = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(HASH_CHUNK_SIZE)
+            if not block:
+                break
+            digest.update(block)
+            crc = zlib.crc32(block, crc)
+    return digest.hexdigest(), crc
+
+
+def _collation_key(name: str):
+    """Approximate the en_US glob order the container shell listed plugins in."""
+    return (re.sub(r'[^0-9a-z]', '', name.lower()), name.swapcase(), name)
+
+
+def describe_apk(apk_path: str) -> Dict[str, Any]:
+    """Build the product.inf entry for one APK and read its icon.
+
+    Runs in a worker process: the manifest and resource table are parsed
+    once and the file is hashed in a single streaming pass.
+    """
+    badging = read_badging(apk_path)
+    file_name = os.path.basename(apk_path)
+
+    package_line = "package: name='{}' versionCode='{}' versionName='{}'".format(
+        normalize_for_output(badging['package']),
+        badging['versionCode'],
+        normalize_for_output(badging['versionName'])
+    )
+    sdk_line = f"sdkVersion:'{badging['sdkVersion']}'" if badging['sdkVersion'] is not None else ''
+    label_line = f"application-label:'{normalize_for_output(badging['label'])}'" if badging['label'] is not None else ''
+    meta_lines = [
+        f"meta-data: name='{normalize_for_output(name)}' value='{normalize_for_output(value or '')}'"
+        for name, value in badging['metaData']
+    ]
+
+    package_name = _split_field(package_line, 1)
+    version_code = _split_field(package_line, 3)
+    version_name = _split_field(package_line, 5)
+    name_fields = f"{sdk_line} {label_line}"
+    android_version = _split_field(name_fields, 1)
+    name = _split_field(name_fields, 3)
+    description = _split_field('\n'.join(l for l in meta_lines if 'app_desc' in l), 3).replace(',', '.')
+    plugin_api = _split_field('\n'.join(l for l in meta_lines if 'plugin-api' in l), 3).replace(',', '.')
+    if not description:
+        description = f"No description supplied for {name} {version_name}"
+
+    sha256, crc32 = _hash_file(apk_path)
+    size = os.path.getsize(apk_path)
+    graphic = os.path.basename(file_name.replace('.apk', '.png', 1))
+    fields = [
+        'Android',
+        'plugin' if 'Plugin' in file_name else 'app',
+        package_name,
+        name,
+        version_name,
+        version_code,
+        file_name,
+        graphic,
+        description,
+        sha256,
+        android_version,
+        plugin_api,
+        str(size)
+    ]
+    entry = ','.join(fields)
+
+    icon = b''
+    if badging['icon']:
+        with zipfile.ZipFile(apk_path) as apk:
+            try:
+                icon = apk.read(badging['icon'])
+            except KeyError:
+                logger.warning(f"Icon {badging['icon']} missing from {file_name}")
+    return {
+        'file': file_name,
+        'entry': entry,
+        'icon': icon,
+        'iconFile': f"{os.path.splitext(file_name)[0]}.png",
+        'sha256': sha256,
+        'crc32': crc32,
+        'size': size
+    }
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _write_infz(plugins_dir: str) -> None:
+    """Zip everything but the APKs, with paths junked like `zip -r -j`."""
+    infz_path = os.path.join(plugins_dir, PRODUCT_INFZ)
+    temp_path = f"{infz_path}.tmp"
+    seen = set()
+    with zipfile.ZipFile(temp_path, 'w', zipfile.ZIP_DEFLATED) as infz:
+        for root, dirs, files in os.walk(plugins_dir):
+            dirs[:] = sorted(d for d in dirs if not d.startswith(STAGING_PREFIX))
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                if file_name in (PRODUCT_INFZ, REPO_MANIFEST, os.path.basename(temp_path)) or file_name in seen:
+                    continue
+                if any(fnmatch.fnmatch(path, pattern) for pattern in INFZ_EXCLUDES):
+                    continue
+                seen.add(file_name)
+                infz.write(path, file_name)
+    os.replace(temp_path, infz_path)
+
+
+def _describe_all(apks: List[str], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """describe_apk for each path, in order, across processes when there are enough of them."""
+    results = []
+    if len(apks) >= PARALLEL_THRESHOLD:
+        with process_pool(len(apks), max_workers) as pool:
+            futures = [pool.submit(describe_apk, apk) for apk in apks]
+            for apk, future in zip(apks, futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"Failed to read {os.path.basename(apk)}: {str(e)}")
+                    raise Exception(f"Failed to read {os.path.basename(apk)}: {str(e)}")
+    else:
+        for apk in apks:
+            try:
+                results.append(describe_apk(apk))
+            except Exception as e:
+                logger.error(f"Failed to read {os.path.basename(apk)}: {str(e)}")
+                raise Exception(f"Failed to read {os.path.basename(apk)}: {str(e)}")
+    return results
+
+
+def _apk_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'size': result['size'],
+        'crc32': result['crc32'],
+        'sha256': result['sha256'],
+        'entry': result['entry'],
+        'iconFile': result['iconFile']
+    }
+
+
+def load_repo_manifest(plugins_dir: str) -> Optional[Dict[str, Dict[str, Any]]]:
+    """Rows describing every file the repo was last built from, or None if it was never indexed."""
+    path = os.path.join(plugins_dir, REPO_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get('files', {})
+    except Exception as e:
+        logger.error(f"Failed to read repo manifest, treating repo as unindexed: {str(e)}")
+        return None
+
+
+def _publish(plugins_dir: str, files: Dict[str, Dict[str, Any]], create_infz: bool) -> List[str]:
+    """Swap in product.inf (and product.infz) built from the manifest rows, then the manifest itself."""
+    apks = sorted((name for name, row in files.items() if 'entry' in row), key=_collation_key)
+    entries = [files[name]['entry'] for name in apks]
+    lines = [PRODUCT_INF_HEADER] + entries
+    _write_atomic(os.path.join(plugins_dir, PRODUCT_INF), ''.join(f"{line}\n" for line in lines).encode('utf-8'))
+    if create_infz:
+        _write_infz(plugins_dir)
+    elif os.path.exists(os.path.join(plugins_dir, PRODUCT_INFZ)):
+        os.remove(os.path.join(plugins_dir, PRODUCT_INFZ))
+    _write_atomic(
+        os.path.join(plugins_dir, REPO_MANIFEST),
+        json.dumps({'files': files}, indent=2, sort_keys=True).encode('utf-8')
+    )
+    return entries
+
+
+def _link_or_copy(source: str, target: str) -> None:
+    """Hard link source to target, copying when the filesystem refuses links."""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def sync_plugins(
+    plugins_dir: str,
+    zip_path: str,
+    create_infz: bool = True,
+    max_workers: Optional[int] = None,
+    base_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """Bring the plugins directory in line with an OTA bundle, touching only what changed.
+
+    Members are compared with the repo manifest by size and CRC-32 straight
+    from the ZIP central directory, so unchanged APKs are never extracted,
+    hashed or parsed. Added and changed files are staged next to the repo,
+    parsed, then renamed into place; product.inf is rebuilt from the cached
+    rows and swapped in atomically before removed files are deleted.
+
+    When base_dir names another (read-only) repo, plugins_dir is built as a
+    new repo from it instead: unchanged files are hard linked from base_dir
+    and nothing in base_dir is modified.
+    """
+    os.makedirs(plugins_dir, exist_ok=True)
+    in_place = base_dir is None or os.path.realpath(base_dir) == os.path.realpath(plugins_dir)
+    source_dir = plugins_dir if in_place else base_dir
+    manifest = load_repo_manifest(source_dir) if source_dir and os.path.isdir(source_dir) else None
+    previous = manifest or {}
+
+    staging = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=plugins_dir)
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            # Bundles are flattened; a later member wins a name clash, as the old move did
+            incoming = {}
+            for info in archive.infolist():
+                name = os.path.basename(info.filename)
+                if info.is_dir() or not name or name in (PRODUCT_INF, PRODUCT_INFZ, REPO_MANIFEST):
+                    continue
+                incoming[name] = info
+
+            changed = []
+            for name, info in incoming.items():
+                row = previous.get(name)
+                if (row is None or row.get('size') != info.file_size or row.get('crc32') != info.CRC
+                        or not os.path.isfile(os.path.join(source_dir, name))):
+                    changed.append(name)
+
+            for name in changed:
+                with archive.open(incoming[name]) as src, open(os.path.join(staging, name), 'wb') as dest:
+                    shutil.copyfileobj(src, dest, HASH_CHUNK_SIZE)
+
+        # Parse before anything is moved, so a bad APK leaves the live repo untouched
+        results = _describe_all(
+            [os.path.join(staging, name) for name in sorted(changed, key=_collation_key) if name.endswith('apk')],
+            max_workers
+        )
+
+        files = {name: previous[name] for name in incoming if name not in changed}
+        if not in_place:
+            for name, row in files.items():
+                _link_or_copy(os.path.join(source_dir, name), os.path.join(plugins_dir, name))
+                icon = row.get('iconFile')
+                if icon and icon not in incoming and os.path.isfile(os.path.join(source_dir, icon)):
+                    _link_or_copy(os.path.join(source_dir, icon), os.path.join(plugins_dir, icon))
+        for name in changed:
+            if not name.endswith('apk'):
+                files[name] = {'size': incoming[name].file_size, 'crc32': incoming[name].CRC}
+            os.replace(os.path.join(staging, name), os.path.join(plugins_dir, name))
+        for result in results:
+            _write_atomic(os.path.join(plugins_dir, result['iconFile']), result['icon'])
+            files[result['file']] = _apk_row(result)
+            logger.debug(f"Generated entry: {result['entry']}")
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    if not in_place or manifest is None or changed or set(files) != set(previous):
+        _publish(plugins_dir, files, create_infz)
+
+    # Only now that the new index is live can files it no longer lists go away
+    removed = [name for name in previous if name not in incoming]
+    if in_place:
+        keep = set(files) | {row['iconFile'] for row in files.values() if 'iconFile' in row}
+        if manifest is None:
+            candidates = [
+                name for name in os.listdir(plugins_dir)
+                if not name.startswith('.') and name not in (PRODUCT_INF, PRODUCT_INFZ)
+            ]
+            removed = [name for name in candidates if name not in keep]
+        else:
+            candidates = list(manifest) + [row['iconFile'] for row in manifest.values() if 'iconFile' in row]
+        for name in candidates:
+            path = os.path.join(plugins_dir, name)
+            if name not in keep and os.path.isfile(path):
+                os.remove(path)
+
+    summary = {
+        'added': [name for name in changed if name not in previous],
+        'updated': [name for name in changed if name in previous],
+        'removed': removed,
+        'unchanged': len(incoming) - len(changed),
+        'entries': [result['entry'] for result in results]
+    }
+    logger.info(
+        f"Synced plugins: {len(summary['added'])} added, {len(summary['updated'])} updated, "
+        f"{len(summary['removed'])} removed, {summary['unchanged']} unchanged"
+    )
+    return summary
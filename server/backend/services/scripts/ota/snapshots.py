@@ -0,0 +1,208 @@
+# backend/services/scripts/ota/snapshots.py
+
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from backend.services.scripts.ota.product_inf import sync_plugins, load_repo_manifest
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+SNAPSHOT_INDEX = 'snapshots.json'
+BUILDING_PREFIX = '.building-'
+DEFAULT_KEEP = 3
+
+
+class PluginSnapshots:
+    """Immutable, versioned copies of the OTA plugin repository.
+
+    Every bundle becomes a new snapshot directory. Files the previous
+    snapshot already had are hard linked rather than copied, so a snapshot
+    costs only its new content. The served plugins path is a relative
+    symlink to the active snapshot; activating or rolling back replaces
+    that symlink with a single rename, and the link resolves the same way
+    inside the TAKServer container (TAK_DIR is mounted at /opt/tak there).
+    """
+
+    def __init__(self, snapshots_dir: str, plugins_link: str):
+        self.snapshots_dir = snapshots_dir
+        self.plugins_link = plugins_link
+        self.index_path = os.path.join(snapshots_dir, SNAPSHOT_INDEX)
+        self._lock = threading.Lock()
+        os.makedirs(snapshots_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(plugins_link), exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to read snapshot index: {str(e)}")
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]) -> None:
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(index, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.index_path)
+
+    def _path(self, snapshot_id: str) -> str:
+        if not snapshot_id or os.path.basename(snapshot_id) != snapshot_id or snapshot_id.startswith('.'):
+            raise ValueError(f"Invalid snapshot id: {snapshot_id}")
+        return os.path.join(self.snapshots_dir, snapshot_id)
+
+    @staticmethod
+    def _newest_first(index: Dict[str, Dict[str, Any]]) -> List[str]:
+        return sorted(index, key=lambda snapshot_id: (index[snapshot_id].get('createdAt', ''), snapshot_id), reverse=True)
+
+    @staticmethod
+    def _new_id() -> str:
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    # ------------------------------------------------------------------
+    # Active snapshot
+    # ------------------------------------------------------------------
+    def active_id(self) -> Optional[str]:
+        if not os.path.islink(self.plugins_link):
+            return None
+        return os.path.basename(os.readlink(self.plugins_link).rstrip('/'))
+
+    def _point_at(self, snapshot_id: str) -> None:
+        """Atomically repoint the plugins symlink."""
+        target = os.path.relpath(self._path(snapshot_id), os.path.dirname(self.plugins_link))
+        temp_link = f"{self.plugins_link}.{uuid.uuid4().hex[:8]}.tmp"
+        os.symlink(target, temp_link)
+        try:
+            os.replace(temp_link, self.plugins_link)
+        except Exception:
+            os.remove(temp_link)
+            raise
+
+    def _adopt_existing(self, index: Dict[str, Dict[str, Any]]) -> None:
+        """Turn a plain plugins directory from before snapshots into the first snapshot."""
+        if os.path.islink(self.plugins_link) or not os.path.isdir(self.plugins_link):
+            return
+        snapshot_id = self._new_id()
+        os.rename(self.plugins_link, self._path(snapshot_id))
+        self._point_at(snapshot_id)
+        index[snapshot_id] = {'createdAt': datetime.now().isoformat(), 'source': 'existing repository'}
+        self._save_index(index)
+        logger.info(f"Adopted existing plugins directory as snapshot {snapshot_id}")
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+    def create(self, zip_path: str, source: Optional[str] = None, reuse: bool = True) -> Dict[str, Any]:
+        """Build a snapshot from an OTA bundle without activating it.
+
+        With reuse, the active snapshot's unchanged files are hard linked
+        and only new APKs are parsed; otherwise every APK is rebuilt.
+        """
+        with self._lock:
+            index = self._load_index()
+            self._adopt_existing(index)
+            base_id = self.active_id() if reuse else None
+            base_dir = self._path(base_id) if base_id else None
+
+            snapshot_id = self._new_id()
+            building_dir = os.path.join(self.snapshots_dir, f"{BUILDING_PREFIX}{snapshot_id}")
+            try:
+                summary = sync_plugins(building_dir, zip_path, base_dir=base_dir or building_dir)
+                os.rename(building_dir, self._path(snapshot_id))
+            except Exception:
+                shutil.rmtree(building_dir, ignore_errors=True)
+                raise
+
+            index[snapshot_id] = {
+                'createdAt': datetime.now().isoformat(),
+                'source': source or os.path.basename(zip_path),
+                'base': base_id,
+                'added': len(summary['added']),
+                'updated': len(summary['updated']),
+                'removed': len(summary['removed']),
+                'unchanged': summary['unchanged']
+            }
+            self._save_index(index)
+        logger.info(f"Created OTA snapshot {snapshot_id} from {index[snapshot_id]['source']}")
+        return {'id': snapshot_id, **summary}
+
+    def activate(self, snapshot_id: str) -> None:
+        """Serve the given snapshot; also how a rollback is done."""
+        with self._lock:
+            path = self._path(snapshot_id)
+            if not os.path.isdir(path):
+                raise FileNotFoundError(f"Snapshot {snapshot_id} not found")
+            self._adopt_existing(self._load_index())
+            self._point_at(snapshot_id)
+        logger.info(f"Activated OTA snapshot {snapshot_id}")
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Snapshots newest first, with their plugin counts."""
+        with self._lock:
+            index = self._load_index()
+            active = self.active_id()
+        snapshots = []
+        for snapshot_id in self._newest_first(index):
+            path = self._path(snapshot_id)
+            if not os.path.isdir(path):
+                continue
+            files = load_repo_manifest(path) or {}
+            snapshots.append({
+                'id': snapshot_id,
+                'active': snapshot_id == active,
+                'apks': sum(1 for row in files.values() if 'entry' in row),
+                'files': len(files),
+                **index[snapshot_id]
+            })
+        return snapshots
+
+    def garbage_collect(self, keep: int = DEFAULT_KEEP) -> List[str]:
+        """Delete all but the newest `keep` snapshots; the active one is always kept.
+
+        Content shared through hard links stays on disk until its last
+        snapshot is gone.
+        """
+        with self._lock:
+            index = self._load_index()
+            active = self.active_id()
+            ordered = self._newest_first(index)
+            retained = set(ordered[:max(keep, 0)])
+            removed = []
+            for snapshot_id in reversed(ordered):
+                if snapshot_id == active or snapshot_id in retained:
+                    continue
+                shutil.rmtree(self._path(snapshot_id), ignore_errors=True)
+                del index[snapshot_id]
+                removed.append(snapshot_id)
+            # Builds interrupted by a crash
+            for name in os.listdir(self.snapshots_dir):
+                if name.startswith(BUILDING_PREFIX):
+                    shutil.rmtree(os.path.join(self.snapshots_dir, name), ignore_errors=True)
+            self._save_index(index)
+        if removed:
+            logger.info(f"Removed OTA snapshots: {', '.join(removed)}")
+        return removed
+
+
+_snapshots: Dict[str, PluginSnapshots] = {}
+_snapshots_lock = threading.Lock()
+
+
+def get_plugin_snapshots(snapshots_dir: str, plugins_link: str) -> PluginSnapshots:
+    """Return the shared snapshot store for a plugins path."""
+    with _snapshots_lock:
+        store = _snapshots.get(plugins_link)
+        if store is None:
+            store = PluginSnapshots(snapshots_dir, plugins_link)
+            _snapshots[plugins_link] = store
+        return store
@@ -2,9 +2,7 @@
 
 import time
 import subprocess
-import json
-from typing import Dict, Any, AsyncGenerator, Optional, Callable
-import asyncio
+from typing import Dict, Any, Optional, Callable
 from backend.config.logging_config import configure_logging
 import logging
 
@@ -116,25 +114,3 @@ class SystemMonitor:
         except Exception as e:
             logger.error(f"Error getting system metrics: {str(e)}")  # Added error log
             return {}
-
-    async def metrics_generator(self) -> AsyncGenerator[Dict[str, Any], None]:
-        """Generate system metrics events."""
-        while True:
-            try:
-                metrics = self.get_system_metrics()
-                if metrics:
-                    yield {
-                        "event": "system-metrics",
-                        "data": json.dumps(metrics)
-                    }
-                    if self.emit_event:
-                        self.emit_event(metrics)
-            except Exception as e:
-                logger.error(f"Error generating metrics: {str(e)}")  # Added error log
-                yield {
-                    "event": "system-metrics",
-                    "data": json.dumps({
-                        "error": str(e)
-                    })
-                }
-            await asyncio.sleep(2)  # Update every 5 seconds
@@ -1,15 +1,21 @@
 import os
 from backend.services.helpers.run_command import RunCommand
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from backend.config.logging_config import configure_logging
 import docker
 from backend.services.helpers.directories import DirectoryHelper
 from backend.services.scripts.docker.docker_manager import DockerManager
+from backend.services.scripts.takserver.server_state import get_server_state
 import asyncio
 import time
 
 logger = configure_logging(__name__)
 
+WEBUI_READY_TIMEOUT = 120  # 2 minutes timeout
+WEBUI_POLL_INTERVAL = 2
+# How long a finished readiness result is served to later callers
+WEBUI_RESULT_TTL = 5
+
 class TakServerStatus:
     def __init__(self, emit_event=None):
         """Initialize the TakServerStatus class.
@@ -185,6 +191,58 @@ class TakServerStatus:
         logger.info("Containers restarted")
         return {"status": "success", "message": "Containers restarted"}
 
+    async def restart_services(self, services: List[str]) -> Dict[str, Any]:
+        """Restart only the given Docker Compose services.
+
+        Returns:
+            Dict[str, Any]: A dictionary indicating the status and message of the operation.
+        """
+        docker_compose_dir = self.directory_helper.get_docker_compose_directory()
+        result = await self.run_command.run_command_async(
+            ["docker", "compose", "restart", *services],
+            'operation',
+            working_dir=docker_compose_dir,
+            ignore_errors=True
+        )
+
+        if not result.success:
+            logger.error(f"Failed to restart {', '.join(services)}: {result.stderr}")
+            raise RuntimeError(f"Failed to restart {', '.join(services)}: {result.stderr}")
+
+        logger.info(f"Restarted {', '.join(services)}")
+        return {"status": "success", "message": f"Restarted {', '.join(services)}"}
+
+    async def recreate_services(self, services: Optional[List[str]] = None, remove_orphans: bool = False) -> Dict[str, Any]:
+        """Recreate Docker Compose services so compose file changes (ports, volumes) apply.
+
+        Args:
+            services: Services to recreate without touching their dependencies; all when None.
+            remove_orphans: Also remove containers of services no longer in the compose file.
+
+        Returns:
+            Dict[str, Any]: A dictionary indicating the status and message of the operation.
+        """
+        docker_compose_dir = self.directory_helper.get_docker_compose_directory()
+        command = ["docker", "compose", "up", "-d"]
+        if remove_orphans:
+            command.append("--remove-orphans")
+        if services:
+            command += ["--no-deps", *services]
+        result = await self.run_command.run_command_async(
+            command,
+            'operation',
+            working_dir=docker_compose_dir,
+            ignore_errors=True
+        )
+
+        target = ', '.join(services) if services else "all services"
+        if not result.success:
+            logger.error(f"Failed to recreate {target}: {result.stderr}")
+            raise RuntimeError(f"Failed to recreate {target}: {result.stderr}")
+
+        logger.info(f"Recreated {target}")
+        return {"status": "success", "message": f"Recreated {target}"}
+
     async def _check_server_ready(self) -> Dict[str, Any]:
         """Check takserver.log for the final startup message in recent logs only."""
         version = self.directory_helper.get_takserver_version()
@@ -204,18 +262,9 @@ class TakServerStatus:
             )
             
             if result.success and "Retention Application started" in result.stdout:
-                # Also check the timestamp to ensure it's recent (within last 5 minutes)
-                timestamp_cmd = "tail -n 10 /opt/tak/logs/takserver.log | grep -a 'Retention Application started' | cut -d' ' -f1"
-                timestamp_result = await self.run_command.run_command_async(
-                    ["docker", "exec", container_name, "bash", "-c", timestamp_cmd],
-                    'health_check',
-                    ignore_errors=True
-                )
-                
-                if timestamp_result.success and timestamp_result.stdout.strip():
-                    # Log entry found and is recent
-                    logger.info(f"Found recent startup message: {timestamp_result.stdout.strip()}")
-                    return {'status': 'up'}
+                # The matched line starts with its timestamp; no second exec needed to read it
+                logger.info(f"Found recent startup message: {result.stdout.strip().split(' ')[0]}")
+                return {'status': 'up'}
                 
             if "no such container" in result.stderr.lower():
                 logger.error(f'Container {container_name} not found')
@@ -229,27 +278,65 @@ class TakServerStatus:
             return {'status': 'error', 'error': str(e)}
 
     async def check_webui_availability(self) -> Dict[str, Any]:
-        """Check if TAK Server is fully initialized within timeout period."""
+        """Check if TAK Server is fully initialized within timeout period.
+
+        Concurrent callers share one in-flight probe (see WebUIReadiness).
+        """
+        return await get_webui_readiness().check()
+
+
+class WebUIReadiness:
+    """Single-flight readiness check for the TAK Server web UI.
+
+    However many clients ask, at most one probe runs: callers arriving
+    while it is in flight await the same task, and a finished result is
+    reused for WEBUI_RESULT_TTL seconds unless the server state changes.
+    Between log checks the probe sleeps on the server state store, so a
+    stop or crash ends the wait immediately.
+    """
+
+    def __init__(self):
+        self.server_state = get_server_state()
+        self._status_checker: Optional[TakServerStatus] = None
+        self._task: Optional[asyncio.Task] = None
+        self._result: Optional[Dict[str, Any]] = None
+        self._result_at = 0.0
+        self._result_state: Optional[Dict[str, Any]] = None
+
+    async def check(self) -> Dict[str, Any]:
+        if (self._result is not None
+                and time.monotonic() - self._result_at < WEBUI_RESULT_TTL
+                and self._result_state == self.server_state.snapshot()):
+            return self._result
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._probe())
+        # Shielded so one client disconnecting does not cancel everyone's probe
+        return await asyncio.shield(self._task)
+
+    async def _probe(self) -> Dict[str, Any]:
+        result = await self._wait_until_ready()
+        self._result = result
+        self._result_at = time.monotonic()
+        self._result_state = self.server_state.snapshot()
+        return result
+
+    async def _wait_until_ready(self) -> Dict[str, Any]:
+        if self._status_checker is None:
+            self._status_checker = TakServerStatus()
         start_time = time.time()
-        timeout = 120  # 2 minutes timeout
-        
-        # First check if container is running
-        status = await self.get_status()
-        if not status['isRunning']:
-            logger.error('TAK Server is not running')
-            return {
-                'status': 'unavailable',
-                'message': 'TAK Server is not running',
-                'error': 'Server must be started first'
-            }
-            
-        # Log the check but don't emit events
-        logger.info("Checking TAK Server readiness...")
-        
-        # Poll for server readiness
-        while (time.time() - start_time) < timeout:
-            result = await self._check_server_ready()
-            
+
+        while True:
+            # First check if container is running
+            if not self.server_state.snapshot()['isRunning']:
+                logger.error('TAK Server is not running')
+                return {
+                    'status': 'unavailable',
+                    'message': 'TAK Server is not running',
+                    'error': 'Server must be started first'
+                }
+
+            result = await self._status_checker._check_server_ready()
             if result['status'] == 'up':
                 logger.info("TAK Server fully initialized and ready")
                 return {
@@ -257,19 +344,32 @@ class TakServerStatus:
                     'message': 'TAK Server is fully initialized',
                     'error': None
                 }
-                
-            # Progress update in logs only
+
             elapsed = int(time.time() - start_time)
+            if elapsed >= WEBUI_READY_TIMEOUT:
+                break
+            # Progress update in logs only
             if elapsed % 15 == 0 and elapsed > 0:
                 logger.info(f"Still waiting for TAK Server initialization ({elapsed}s elapsed)...")
-                
-            await asyncio.sleep(2)  # Check every 2 seconds
+
+            # Woken early when the server state changes (stopped, restarted)
+            await self.server_state.wait_for_change(timeout=WEBUI_POLL_INTERVAL)
 
         # Timeout occurred
-        logger.error('TAK Server initialization timeout after %d seconds', timeout)
+        logger.error('TAK Server initialization timeout after %d seconds', WEBUI_READY_TIMEOUT)
         return {
             'status': 'unavailable',
             'message': 'TAK Server is still initializing',
-            'error': f'Timeout: Server did not complete initialization within {timeout} seconds'
+            'error': f'Timeout: Server did not complete initialization within {WEBUI_READY_TIMEOUT} seconds'
         }
 
+
+_webui_readiness: Optional[WebUIReadiness] = None
+
+
+def get_webui_readiness() -> WebUIReadiness:
+    """Return the shared web UI readiness check."""
+    global _webui_readiness
+    if _webui_readiness is None:
+        _webui_readiness = WebUIReadiness()
+    return _webui_readiness
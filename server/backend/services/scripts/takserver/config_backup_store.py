@@ -0,0 +1,285 @@
+# ============================================================================
+# Imports
+# ============================================================================
+import os
+import gzip
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+from backend.services.helpers.directories import DirectoryHelper
+from backend.services.helpers.xml_diff import diff_xml
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+OBJECTS_DIR = "objects"
+OBJECT_SUFFIX = ".xml.gz"
+INDEX_FILE = "index.log"
+# Imported full-copy backups are kept here untouched, so older versions or a lost index can still use them
+LEGACY_DIR = "legacy"
+INIT_BACKUP_ID = "init_backup.xml"
+# The index log is rewritten once superseded records outnumber live entries
+COMPACT_RATIO = 1
+# Diffs kept per store, keyed by the two snapshot hashes
+DIFF_CACHE_SIZE = 64
+
+# ============================================================================
+# ConfigBackupStore Class
+# ============================================================================
+class ConfigBackupStore:
+    """Content-addressed, gzip-compressed CoreConfig.xml backups.
+
+    Each distinct configuration is stored once under objects/ by its
+    SHA-256; a backup is an index entry pointing at a snapshot (name,
+    timestamp, size, parent). The index is an append-only log replayed
+    into memory at startup, so listing never touches the snapshots and
+    creating a backup appends one line. head is the backup whose content
+    matches the live config (None after saving content no backup holds),
+    and becomes the parent of the next backup. Full-copy .xml backups from
+    older versions are imported on first load and moved to legacy/.
+    """
+
+    def __init__(self, backups_dir: Optional[str] = None):
+        self.backups_dir = backups_dir or DirectoryHelper.get_backups_directory()
+        self.objects_dir = os.path.join(self.backups_dir, OBJECTS_DIR)
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.index_path = os.path.join(self.backups_dir, INDEX_FILE)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._refs: Dict[str, int] = {}
+        self._head: Optional[str] = None
+        self._records = 0
+        self._diffs: "OrderedDict[tuple, List[Dict[str, Any]]]" = OrderedDict()
+        self._load()
+        self._import_legacy()
+
+# ============================================================================
+# Index Log
+# ============================================================================
+    def _apply(self, record: Dict[str, Any]) -> None:
+        op = record.get("op")
+        if op == "add":
+            entry = {key: value for key, value in record.items() if key != "op"}
+            previous = self._entries.get(entry["id"])
+            if previous:
+                self._refs[previous["hash"]] -= 1
+            self._entries[entry["id"]] = entry
+            self._refs[entry["hash"]] = self._refs.get(entry["hash"], 0) + 1
+            self._head = entry["id"]
+        elif op == "delete":
+            entry = self._entries.pop(record["id"], None)
+            if entry:
+                self._refs[entry["hash"]] -= 1
+            if self._head == record["id"]:
+                self._head = None
+        elif op == "head":
+            self._head = record["id"] if record["id"] in self._entries else None
+        self._records += 1
+
+    def _append(self, records: List[Dict[str, Any]]) -> None:
+        with open(self.index_path, "a") as f:
+            f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        for record in records:
+            self._apply(record)
+        if self._records - len(self._entries) > len(self._entries) * COMPACT_RATIO + 1:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Rewrite the index log with one record per live backup."""
+        records = [{"op": "add", **entry} for entry in self._sorted()]
+        records.append({"op": "head", "id": self._head})
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.index_path)
+        self._records = len(records)
+        logger.debug(f"Compacted backup index to {len(records)} records")
+
+    def _load(self) -> None:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._apply(json.loads(line))
+                except (json.JSONDecodeError, KeyError):
+                    # A torn last line from a crash mid-append
+                    logger.warning(f"Skipping malformed backup index record in {self.index_path}")
+        logger.info(f"Loaded {len(self._entries)} CoreConfig backups ({len(self._refs)} snapshots)")
+
+    def _import_legacy(self) -> None:
+        """Import full-copy .xml backups, keeping the originals under legacy/."""
+        legacy = [name for name in os.listdir(self.backups_dir) if name.endswith(".xml")]
+        for filename in sorted(legacy, key=lambda name: (name != INIT_BACKUP_ID, name)):
+            path = os.path.join(self.backups_dir, filename)
+            with open(path, "rb") as f:
+                content = f.read()
+            if filename == INIT_BACKUP_ID:
+                name = "Initial Configuration"
+                timestamp = datetime.fromtimestamp(os.path.getctime(path)).strftime("%Y%m%d_%H%M%S")
+            else:
+                parts = filename[:-len(".xml")].split('_', 2)
+                timestamp = f"{parts[0]}_{parts[1]}" if len(parts) > 1 else parts[0]
+                name = parts[2] if len(parts) > 2 else "Backup"
+            with self._lock:
+                if filename not in self._entries:
+                    self._add(filename, name, timestamp, content, parent=self._head)
+            legacy_dir = os.path.join(self.backups_dir, LEGACY_DIR)
+            os.makedirs(legacy_dir, exist_ok=True)
+            os.replace(path, os.path.join(legacy_dir, filename))
+            logger.info(f"Imported legacy backup {filename} (original kept in {LEGACY_DIR}/)")
+
+# ============================================================================
+# Snapshots
+# ============================================================================
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, f"{digest}{OBJECT_SUFFIX}")
+
+    def _store_object(self, content: bytes) -> Dict[str, Any]:
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(gzip.compress(content, mtime=0))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        return {"hash": digest, "size": len(content), "storedSize": os.path.getsize(path)}
+
+    def _add(self, backup_id: str, name: str, timestamp: str, content: bytes, parent: Optional[str]) -> Dict[str, Any]:
+        record = {
+            "op": "add",
+            "id": backup_id,
+            "name": name,
+            "timestamp": timestamp,
+            "parent": parent,
+            "isInit": backup_id == INIT_BACKUP_ID,
+            **self._store_object(content)
+        }
+        self._append([record])
+        return dict(self._entries[backup_id])
+
+    def _sorted(self) -> List[Dict[str, Any]]:
+        # Init backup first, then oldest to newest
+        return sorted(self._entries.values(), key=lambda entry: (not entry["isInit"], entry["timestamp"], entry["id"]))
+
+    def _unique_id(self, timestamp: str, name: str) -> str:
+        base = f"{timestamp}_{name}" if name else timestamp
+        backup_id, counter = f"{base}.xml", 1
+        while backup_id in self._entries:
+            counter += 1
+            backup_id = f"{base}-{counter}.xml"
+        return backup_id
+
+# ============================================================================
+# Public API
+# ============================================================================
+    def has(self, backup_id: str) -> bool:
+        return backup_id in self._entries
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._sorted()]
+
+    def get(self, backup_id: str) -> Dict[str, Any]:
+        entry = self._entries.get(backup_id)
+        if entry is None:
+            logger.error("Backup not found")
+            raise Exception("Backup not found")
+        return dict(entry)
+
+    def create(self, content: bytes, name: str = "", backup_id: Optional[str] = None) -> Dict[str, Any]:
+        """Snapshot content as a new backup; identical content shares one stored object."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        with self._lock:
+            backup_id = backup_id or self._unique_id(timestamp, name)
+            display_name = "Initial Configuration" if backup_id == INIT_BACKUP_ID else (name or "Backup")
+            return self._add(backup_id, display_name, timestamp, content, parent=self._head)
+
+    def read(self, backup_id: str) -> bytes:
+        entry = self.get(backup_id)
+        with gzip.open(self._object_path(entry["hash"]), "rb") as f:
+            return f.read()
+
+    def mark_head(self, backup_id: str) -> None:
+        """Record that the live config now matches backup_id, e.g. after a restore."""
+        with self._lock:
+            if backup_id in self._entries and self._head != backup_id:
+                self._append([{"op": "head", "id": backup_id}])
+
+    def mark_live(self, content: bytes) -> None:
+        """Record that the live config was rewritten with content.
+
+        head stays on a backup holding exactly this content (the current
+        head first, else the newest match) and is cleared otherwise, so the
+        next backup's parent never points at a config that was not live.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            head = self._entries.get(self._head) if self._head else None
+            if head and head["hash"] == digest:
+                return
+            matches = [entry for entry in self._sorted() if entry["hash"] == digest]
+            backup_id = matches[-1]["id"] if matches else None
+            if backup_id != self._head:
+                self._append([{"op": "head", "id": backup_id}])
+
+    def delete(self, backup_id: str) -> None:
+        with self._lock:
+            entry = self.get(backup_id)
+            self._append([{"op": "delete", "id": backup_id}])
+            # Drop the snapshot once no backup refers to it
+            if self._refs.get(entry["hash"], 0) <= 0:
+                self._refs.pop(entry["hash"], None)
+                path = self._object_path(entry["hash"])
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def diff(self, old: bytes, new: bytes) -> List[Dict[str, Any]]:
+        """Structural diff of two configurations, cached by content hash."""
+        key = (hashlib.sha256(old).hexdigest(), hashlib.sha256(new).hexdigest())
+        with self._lock:
+            if key in self._diffs:
+                self._diffs.move_to_end(key)
+                return self._diffs[key]
+        changes = diff_xml(old, new)
+        with self._lock:
+            self._diffs[key] = changes
+            if len(self._diffs) > DIFF_CACHE_SIZE:
+                self._diffs.popitem(last=False)
+        return changes
+
+    def usage(self) -> Dict[str, int]:
+        """Logical size of all backups versus bytes actually stored."""
+        with self._lock:
+            stored = {entry["hash"]: entry["storedSize"] for entry in self._entries.values()}
+            return {
+                "backups": len(self._entries),
+                "snapshots": len(stored),
+                "logicalBytes": sum(entry["size"] for entry in self._entries.values()),
+                "storedBytes": sum(stored.values())
+            }
+
+
+_backup_store: Optional[ConfigBackupStore] = None
+_backup_store_lock = threading.Lock()
+
+
+def get_config_backup_store() -> ConfigBackupStore:
+    """Return the shared CoreConfig backup store."""
+    global _backup_store
+    with _backup_store_lock:
+        if _backup_store is None:
+            _backup_store = ConfigBackupStore()
+        return _backup_store
@@ -0,0 +1,531 @@
+# ============================================================================
+# Imports
+# ============================================================================
+import os
+import json
+import contextlib
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+import yaml
+from lxml import etree
+from typing import Dict, Any, Optional, List, Set, Tuple
+from backend.services.helpers.directories import DirectoryHelper
+from backend.services.helpers.xml_schema import schema_errors
+from backend.services.scripts.docker.docker_compose_editor import DockerComposeEditor
+from backend.services.scripts.cert_manager.user_auth_file import get_user_auth_store
+from backend.services.scripts.takserver.config_backup_store import get_config_backup_store
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+CORE_CONFIG = "core-config"
+USER_AUTH = "user-auth"
+DOCKER_COMPOSE = "docker-compose"
+TARGETS = (CORE_CONFIG, USER_AUTH, DOCKER_COMPOSE)
+
+TAKSERVER_SERVICE = "takserver"
+# Open transactions are dropped after this long without activity
+TRANSACTION_TTL_SECONDS = 3600
+
+# Restart actions, least to most disruptive
+ACTION_NONE = "none"
+ACTION_RESTART = "restart"
+ACTION_RECREATE = "recreate"
+
+class TransactionConflict(Exception):
+    """A staged file was changed on disk after the transaction started editing it."""
+
+# ============================================================================
+# Files
+# ============================================================================
+def target_path(target: str) -> str:
+    if target == CORE_CONFIG:
+        return os.path.join(DirectoryHelper.get_tak_directory(), "CoreConfig.xml")
+    if target == USER_AUTH:
+        return os.path.join(DirectoryHelper.get_tak_directory(), "UserAuthenticationFile.xml")
+    if target == DOCKER_COMPOSE:
+        return DockerComposeEditor.get_docker_compose_file_path()
+    raise KeyError(f"Unknown configuration file: {target}")
+
+def _read(path: str) -> str:
+    with open(path, "r") as f:
+        return f.read()
+
+def _digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+def _write_temp(path: str, content: str) -> str:
+    """Write content beside path with path's mode and owner; returns the temp path."""
+    fd, temp_path = tempfile.mkstemp(prefix=".txn-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            st = os.stat(path)
+            os.chmod(temp_path, st.st_mode & 0o7777)
+            try:
+                os.chown(temp_path, st.st_uid, st.st_gid)
+            except PermissionError:
+                pass
+        return temp_path
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+# ============================================================================
+# Compose Port Editing
+# ============================================================================
+# docker-compose.yml is edited as text so the user's comments, anchors and
+# quoting survive; only the takserver ports sequence is rewritten.
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(" "))
+
+def _is_content(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+def _key_of(line: str) -> Optional[str]:
+    key, colon, _ = line.strip().partition(":")
+    return key.strip("'\"") if colon else None
+
+def _block(lines: List[str], start: int) -> Tuple[int, Optional[int]]:
+    """End of the block under lines[start] (trailing blanks and comments excluded) and its child indent."""
+    indent = _indent(lines[start])
+    end, child = start + 1, None
+    while end < len(lines) and (not _is_content(lines[end]) or _indent(lines[end]) > indent):
+        if child is None and _is_content(lines[end]):
+            child = _indent(lines[end])
+        end += 1
+    while end > start + 1 and not _is_content(lines[end - 1]):
+        end -= 1
+    return end, child
+
+def _find_key(lines: List[str], start: int, end: int, indent: int, key: str) -> Optional[int]:
+    for i in range(start, end):
+        if _is_content(lines[i]) and _indent(lines[i]) == indent and _key_of(lines[i]) == key:
+            return i
+    return None
+
+def _scalar(text: str) -> Optional[str]:
+    """A sequence item's scalar value as compose reads it, or None for mappings."""
+    text = text.strip()
+    if text[:1] in ("'", '"'):
+        value = yaml.safe_load(text)
+        return value if isinstance(value, str) else None
+    text = text.split(" #", 1)[0].strip()
+    return None if not text or text.endswith(":") or ": " in text else text
+
+def edit_compose_ports(content: str, add: List[str], remove: List[str]) -> str:
+    """Add or remove takserver port mappings in docker-compose.yml text, leaving every other line as is."""
+    lines = content.split("\n")
+    services = _find_key(lines, 0, len(lines), 0, "services")
+    if services is None:
+        raise ValueError("Takserver service not found in docker-compose file")
+    services_end, service_indent = _block(lines, services)
+    service = _find_key(lines, services + 1, services_end, service_indent, TAKSERVER_SERVICE) if service_indent else None
+    if service is None:
+        raise ValueError("Takserver service not found in docker-compose file")
+    service_end, key_indent = _block(lines, service)
+    key_indent = key_indent if key_indent is not None else service_indent + 2
+
+    ports = _find_key(lines, service + 1, service_end, key_indent, "ports")
+    if ports is None:
+        if not add:
+            return content
+        lines[service_end:service_end] = [" " * key_indent + "ports:"]
+        ports, service_end = service_end, service_end + 1
+
+    prefix, _, value = lines[ports].partition(":")
+    if _is_content(value):
+        # Flow sequence: rewrite just this line, in flow style
+        mappings = [m for m in (yaml.safe_load(value) or []) if m not in remove]
+        mappings += [m for m in add if m not in mappings]
+        lines[ports] = f"{prefix}: [{', '.join(json.dumps(m) for m in mappings)}]"
+        return "\n".join(lines)
+
+    # Block sequence items, which may sit at the key's own indent
+    end, item_indent = ports + 1, None
+    while end < service_end and (not _is_content(lines[end]) or _indent(lines[end]) > key_indent
+                                 or (_indent(lines[end]) == key_indent and lines[end].lstrip().startswith("-"))):
+        if item_indent is None and _is_content(lines[end]):
+            item_indent = _indent(lines[end])
+        end += 1
+    while end > ports + 1 and not _is_content(lines[end - 1]):
+        end -= 1
+
+    items: List[Tuple[Optional[str], List[str]]] = []
+    for line in lines[ports + 1:end]:
+        if _is_content(line) and _indent(line) == item_indent and line.lstrip().startswith("-"):
+            items.append((_scalar(line.lstrip()[1:]), [line]))
+        elif items:
+            items[-1][1].append(line)
+        else:
+            items.append((None, [line]))
+
+    quote = '"'
+    raw = [item[1][0].lstrip()[1:].strip() for item in items if item[0] is not None]
+    if raw and raw[0][:1] == "'":
+        quote = "'"
+    kept = [item for item in items if item[0] not in remove]
+    present = {item[0] for item in kept}
+    if item_indent is None:
+        item_indent = key_indent + 2
+    kept += [(m, [f"{' ' * item_indent}- {quote}{m}{quote}"]) for m in add if m not in present]
+
+    body = [line for _, item_lines in kept for line in item_lines]
+    if not any(_is_content(line) for line in body):
+        lines[ports] = f"{prefix}: []"
+    else:
+        lines[ports] = f"{prefix}:{value}"
+    lines[ports + 1:end] = body
+    return "\n".join(lines)
+
+# ============================================================================
+# Validation
+# ============================================================================
+def _xml_errors(content: str, schema_name: str) -> List[Dict[str, Any]]:
+    schema_path = os.path.join(DirectoryHelper.get_tak_directory(), schema_name)
+    if not os.path.exists(schema_path):
+        return [{"line": None, "column": None, "message": f"{schema_name} not found"}]
+    return schema_errors(content, schema_path)
+
+def _compose_errors(content: str) -> List[Dict[str, Any]]:
+    try:
+        data = yaml.safe_load(content)
+    except yaml.YAMLError as e:
+        mark = getattr(e, "problem_mark", None)
+        return [{
+            "line": mark.line + 1 if mark else None,
+            "column": mark.column + 1 if mark else None,
+            "message": str(getattr(e, "problem", None) or e)
+        }]
+    services = (data or {}).get("services") if isinstance(data, dict) else None
+    if not isinstance(services, dict) or TAKSERVER_SERVICE not in services:
+        return [{"line": None, "column": None, "message": "Takserver service not found in docker-compose file"}]
+
+    errors, host_ports = [], {}
+    for name, service in services.items():
+        for mapping in (service or {}).get("ports") or []:
+            parsed = _parse_port_mapping(mapping)
+            if parsed is None:
+                # Left to compose itself; only mappings understood here are cross-checked
+                continue
+            host_ip, published, _, protocol = parsed
+            for port in published:
+                key = (host_ip, port, protocol)
+                if key in host_ports:
+                    errors.append({
+                        "line": None, "column": None,
+                        "message": f"Host port {port}/{protocol} is published by both {host_ports[key]} and {name}"
+                    })
+                host_ports[key] = name
+    return errors
+
+def _port_range(value: str) -> List[int]:
+    """'8089' or '8000-8010' as a list of ports; ValueError otherwise."""
+    start, _, end = value.partition("-")
+    first, last = int(start), int(end or start)
+    if not 0 < first <= last <= 65535:
+        raise ValueError(value)
+    return list(range(first, last + 1))
+
+def _parse_port_mapping(mapping: Any) -> Optional[Tuple[str, List[int], List[int], str]]:
+    """(host_ip, host ports, container ports, protocol) of a compose port entry, or None.
+
+    Handles short syntax ("8089", "8443:8443", "8000-8010:8000-8010",
+    "127.0.0.1:8089:8089/udp", "[::1]:8089:8089") and long syntax
+    ({target, published, host_ip, protocol}). Host ports are empty when
+    Docker picks them.
+    """
+    try:
+        if isinstance(mapping, dict):
+            published = str(mapping.get("published") or "")
+            return (
+                str(mapping.get("host_ip") or ""),
+                _port_range(published) if published else [],
+                _port_range(str(mapping["target"])),
+                str(mapping.get("protocol") or "tcp"),
+            )
+        value, _, protocol = str(mapping).partition("/")
+        parts = value.rsplit(":", 2)
+        container = _port_range(parts[-1])
+        host = _port_range(parts[-2]) if len(parts) > 1 and parts[-2] else []
+        host_ip = parts[0].strip("[]") if len(parts) == 3 else ""
+        return host_ip, host, container, protocol or "tcp"
+    except (KeyError, ValueError):
+        return None
+
+def _core_config_ports(content: str) -> Set[int]:
+    """Ports TAK Server listens on according to CoreConfig (inputs and connectors)."""
+    root = etree.fromstring(content.encode("utf-8"), etree.XMLParser(resolve_entities=False))
+    ports = set()
+    for element in root.iter():
+        if not isinstance(element.tag, str):
+            continue
+        if etree.QName(element).localname in ("input", "connector") and (element.get("port") or "").isdigit():
+            ports.add(int(element.get("port")))
+    return ports
+
+def _published_ports(compose: Dict[str, Any]) -> Set[int]:
+    ports = set()
+    for mapping in (compose["services"][TAKSERVER_SERVICE] or {}).get("ports") or []:
+        parsed = _parse_port_mapping(mapping)
+        if parsed:
+            ports.update(parsed[2])
+    return ports
+
+# ============================================================================
+# Restart Planning
+# ============================================================================
+def plan_restart(current: Dict[str, str], staged: Dict[str, str]) -> Dict[str, Any]:
+    """Least disruptive restart that applies the staged files.
+
+    - UserAuthenticationFile.xml: none, TAK Server reloads it on change.
+    - CoreConfig.xml: restart the takserver service; the database keeps running.
+    - docker-compose.yml: recreate only the services whose definition changed
+      (a plain restart does not apply new ports or volumes); all services when
+      networks or volumes changed, or when a service was removed, since its
+      container is then only reachable through --remove-orphans.
+    """
+    restart: Set[str] = set()
+    recreate: Set[str] = set()
+    recreate_all = False
+    remove_orphans = False
+    reasons: List[str] = []
+
+    if USER_AUTH in staged and staged[USER_AUTH] != current[USER_AUTH]:
+        reasons.append("UserAuthenticationFile.xml is reloaded by TAK Server without a restart")
+    if CORE_CONFIG in staged and staged[CORE_CONFIG] != current[CORE_CONFIG]:
+        restart.add(TAKSERVER_SERVICE)
+        reasons.append("CoreConfig.xml is read by takserver at startup")
+    if DOCKER_COMPOSE in staged and staged[DOCKER_COMPOSE] != current[DOCKER_COMPOSE]:
+        old = yaml.safe_load(current[DOCKER_COMPOSE]) or {}
+        new = yaml.safe_load(staged[DOCKER_COMPOSE]) or {}
+        old_services, new_services = old.get("services") or {}, new.get("services") or {}
+        for name in sorted(set(old_services) - set(new_services)):
+            remove_orphans = True
+            reasons.append(f"{name} was removed from docker-compose")
+        for name in sorted(new_services):
+            if old_services.get(name) != new_services[name]:
+                recreate.add(name)
+                reasons.append(f"docker-compose definition of {name} changed")
+        for section in sorted((set(old) | set(new)) - {"services"}):
+            if old.get(section) != new.get(section):
+                recreate_all = True
+                reasons.append(f"docker-compose {section} changed")
+
+    if recreate_all or remove_orphans:
+        # Compose leaves unchanged services running, so this only touches what changed
+        return {"action": ACTION_RECREATE, "services": [], "removeOrphans": remove_orphans, "reasons": reasons}
+    if recreate:
+        # Recreating a service also restarts it
+        return {"action": ACTION_RECREATE, "services": sorted(recreate | restart), "removeOrphans": False, "reasons": reasons}
+    if restart:
+        return {"action": ACTION_RESTART, "services": sorted(restart), "removeOrphans": False, "reasons": reasons}
+    return {"action": ACTION_NONE, "services": [], "removeOrphans": False, "reasons": reasons}
+
+def merge_plans(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """One plan covering both; used to apply several commits with a single restart."""
+    order = (ACTION_NONE, ACTION_RESTART, ACTION_RECREATE)
+    action = max(first["action"], second["action"], key=order.index)
+    reasons = first["reasons"] + [reason for reason in second["reasons"] if reason not in first["reasons"]]
+    remove_orphans = first["removeOrphans"] or second["removeOrphans"]
+    if action == ACTION_RECREATE and (
+            (first["action"] == ACTION_RECREATE and not first["services"])
+            or (second["action"] == ACTION_RECREATE and not second["services"])):
+        # Either side recreates everything
+        return {"action": action, "services": [], "removeOrphans": remove_orphans, "reasons": reasons}
+    services = sorted(set(first["services"]) | set(second["services"]))
+    return {"action": action, "services": services, "removeOrphans": remove_orphans, "reasons": reasons}
+
+# ============================================================================
+# ConfigTransaction Class
+# ============================================================================
+class ConfigTransaction:
+    """Staged edits to CoreConfig.xml, UserAuthenticationFile.xml and docker-compose.yml.
+
+    Edits are held in memory until commit, which validates all staged
+    files together, writes them to temp files, then renames them into
+    place (rolling back already replaced files if a rename fails). The
+    on-disk version each file was staged against is recorded, so a commit
+    over a file someone else changed in the meantime is refused.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.staged: Dict[str, str] = {}
+        self._base: Dict[str, str] = {}
+        self.touched = time.monotonic()
+
+    def current(self, target: str) -> str:
+        """The staged content of a file, or what is on disk."""
+        self.touched = time.monotonic()
+        if target in self.staged:
+            return self.staged[target]
+        return _read(target_path(target))
+
+    def stage(self, target: str, content: str) -> None:
+        self.touched = time.monotonic()
+        path = target_path(target)
+        if target not in self._base:
+            self._base[target] = _digest(_read(path))
+        self.staged[target] = content
+
+    def stage_ports(self, add: List[str], remove: List[str]) -> None:
+        """Add or remove takserver port mappings ("host:container") in the staged compose file."""
+        self.stage(DOCKER_COMPOSE, edit_compose_ports(self.current(DOCKER_COMPOSE), add, remove))
+
+    def unstage(self, target: str) -> None:
+        self.staged.pop(target, None)
+        self._base.pop(target, None)
+
+    def validate(self) -> Dict[str, Any]:
+        """Errors per staged file plus cross-file warnings."""
+        errors: Dict[str, List[Dict[str, Any]]] = {}
+        if CORE_CONFIG in self.staged:
+            errors[CORE_CONFIG] = _xml_errors(self.staged[CORE_CONFIG], "CoreConfig.xsd")
+        if USER_AUTH in self.staged:
+            errors[USER_AUTH] = _xml_errors(self.staged[USER_AUTH], "UserAuthenticationFile.xsd")
+        if DOCKER_COMPOSE in self.staged:
+            errors[DOCKER_COMPOSE] = _compose_errors(self.staged[DOCKER_COMPOSE])
+
+        warnings = []
+        if not errors.get(CORE_CONFIG) and not errors.get(DOCKER_COMPOSE) and (
+                CORE_CONFIG in self.staged or DOCKER_COMPOSE in self.staged):
+            listening = _core_config_ports(self.current(CORE_CONFIG))
+            published = _published_ports(yaml.safe_load(self.current(DOCKER_COMPOSE)))
+            for port in sorted(listening - published):
+                warnings.append(f"Port {port} is configured in CoreConfig.xml but not published in docker-compose.yml")
+
+        return {
+            "valid": not any(errors.values()),
+            "errors": {target: found for target, found in errors.items() if found},
+            "warnings": warnings
+        }
+
+    def plan(self) -> Dict[str, Any]:
+        current = {target: _read(target_path(target)) for target in self.staged}
+        return plan_restart(current, self.staged)
+
+    def _check_conflicts(self) -> None:
+        changed = [
+            target for target, base in self._base.items()
+            if _digest(_read(target_path(target))) != base
+        ]
+        if changed:
+            raise TransactionConflict(f"Changed on disk since staging: {', '.join(changed)}")
+
+    def commit(self) -> Dict[str, Any]:
+        """Validate and write every staged file; returns the validation result and restart plan."""
+        if not self.staged:
+            raise ValueError("Nothing staged")
+        validation = self.validate()
+        if not validation["valid"]:
+            raise ValueError(validation["errors"])
+        with contextlib.ExitStack() as stack:
+            if USER_AUTH in self.staged:
+                # Certificate edits write the same file through the store
+                stack.enter_context(get_user_auth_store(DirectoryHelper.get_tak_directory()).locked())
+            return self._write(validation)
+
+    def _write(self, validation: Dict[str, Any]) -> Dict[str, Any]:
+        self._check_conflicts()
+        plan = self.plan()
+
+        if CORE_CONFIG in self.staged:
+            get_config_backup_store().create(
+                _read(target_path(CORE_CONFIG)).encode("utf-8"), f"before transaction {self.id[:8]}"
+            )
+
+        temps: List[Tuple[str, str, str]] = []
+        try:
+            for target, content in self.staged.items():
+                path = target_path(target)
+                temps.append((path, _write_temp(path, content), _read(path)))
+        except Exception:
+            for _, temp_path, _ in temps:
+                os.remove(temp_path)
+            raise
+
+        replaced: List[Tuple[str, str]] = []
+        try:
+            for path, temp_path, original in temps:
+                os.replace(temp_path, path)
+                replaced.append((path, original))
+        except Exception as e:
+            logger.error(f"Config transaction {self.id} failed, rolling back: {str(e)}")
+            for path, original in replaced:
+                os.replace(_write_temp(path, original), path)
+            for path, temp_path, _ in temps:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+
+        if CORE_CONFIG in self.staged:
+            get_config_backup_store().mark_live(self.staged[CORE_CONFIG].encode("utf-8"))
+        logger.info(f"Committed config transaction {self.id}: {', '.join(sorted(self.staged))}")
+        return {"files": sorted(self.staged), "warnings": validation["warnings"], "plan": plan}
+
+    def summary(self) -> Dict[str, Any]:
+        return {"id": self.id, "files": sorted(self.staged)}
+
+# ============================================================================
+# Registry
+# ============================================================================
+class ConfigTransactionRegistry:
+    """Open transactions by id; idle ones expire after TRANSACTION_TTL_SECONDS.
+
+    Commits that defer their restart add it to a pending plan, so a series
+    of edits can be applied later with one restart.
+    """
+
+    def __init__(self):
+        self._transactions: Dict[str, ConfigTransaction] = {}
+        self._pending: Dict[str, Any] = {"action": ACTION_NONE, "services": [], "removeOrphans": False, "reasons": []}
+        self._lock = threading.Lock()
+
+    def defer(self, plan: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._pending = merge_plans(self._pending, plan)
+            return dict(self._pending)
+
+    def pending(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._pending)
+
+    def take_pending(self) -> Dict[str, Any]:
+        with self._lock:
+            plan, self._pending = self._pending, {"action": ACTION_NONE, "services": [], "removeOrphans": False, "reasons": []}
+            return plan
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - TRANSACTION_TTL_SECONDS
+        for transaction_id in [tid for tid, txn in self._transactions.items() if txn.touched < cutoff]:
+            del self._transactions[transaction_id]
+
+    def open(self) -> ConfigTransaction:
+        with self._lock:
+            self._expire()
+            transaction = ConfigTransaction()
+            self._transactions[transaction.id] = transaction
+            return transaction
+
+    def get(self, transaction_id: str) -> ConfigTransaction:
+        with self._lock:
+            self._expire()
+            transaction = self._transactions.get(transaction_id)
+            if transaction is None:
+                raise LookupError(f"Transaction {transaction_id} not found")
+            return transaction
+
+    def close(self, transaction_id: str) -> None:
+        with self._lock:
+            self._transactions.pop(transaction_id, None)
+
+
+config_transactions = ConfigTransactionRegistry()
@@ -1,23 +1,119 @@
 import os
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Optional, Callable, List
 import xml.etree.ElementTree as ET
 from backend.services.helpers.directories import DirectoryHelper
 from backend.config.logging_config import configure_logging
 from backend.services.scripts.takserver.core_config import CoreConfigManager
 from backend.services.helpers.run_command import RunCommand
+from backend.services.scripts.takserver.session_history import SessionHistory
+from backend.services.scripts.takserver.check_status import get_webui_readiness
+from backend.services.scripts.takserver.server_state import get_server_state
 import time
 import asyncio
 import json
 logger = configure_logging(__name__)
 
+# Field order of the rows in a compact roster snapshot
+CLIENT_FIELDS = [
+    "clientUid", "callsign", "takClient", "takVersion", "inGroups", "outGroups",
+    "role", "team", "ipAddress", "lastReportTime"
+]
+# A full snapshot is published at least this often so new subscribers can start from it
+SNAPSHOT_INTERVAL = 30
+# lastReportTime moves on every report; only forward it once it has moved this far
+LAST_REPORT_RESOLUTION_MS = 15000
+
+class ClientRosterDelta:
+    """Turn successive connected-client lists into added/removed/updated deltas.
+
+    Clients are keyed by clientUid and compared field by field, so the
+    JSON sent per tick grows with the number of clients that changed, not
+    with the size of the roster. Every delta carries a sequence number
+    that continues from the last snapshot; a subscriber that sees a gap
+    waits for the next snapshot.
+    """
+
+    def __init__(self):
+        self.clients: Dict[str, Dict[str, Any]] = {}
+        # lastReportTime as last sent, which may trail the real value by the resolution
+        self._sent_report: Dict[str, Any] = {}
+        self.seq = 0
+        self._snapshot_at = 0.0
+
+    def reset(self) -> None:
+        self.clients.clear()
+        self._sent_report.clear()
+        self._snapshot_at = 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The full roster as rows in CLIENT_FIELDS order."""
+        self.seq += 1
+        self._snapshot_at = time.monotonic()
+        self._sent_report = {uid: client.get("lastReportTime") for uid, client in self.clients.items()}
+        return {
+            "type": "snapshot",
+            "status": "success",
+            "seq": self.seq,
+            "fields": CLIENT_FIELDS,
+            "rows": [[client.get(field) for field in CLIENT_FIELDS] for client in self.clients.values()],
+            "timestamp": int(time.time() * 1000)
+        }
+
+    def _report_moved(self, uid: str, value: Any) -> bool:
+        sent = self._sent_report.get(uid)
+        if sent is None or value is None:
+            return sent != value
+        return abs(value - sent) >= LAST_REPORT_RESOLUTION_MS
+
+    def apply(self, clients: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Fold in a new client list; returns the event to publish, or None if nothing changed."""
+        current = {client.get("clientUid"): client for client in clients if client.get("clientUid")}
+        if not self._snapshot_at or time.monotonic() - self._snapshot_at >= SNAPSHOT_INTERVAL:
+            self.clients = current
+            return self.snapshot()
+
+        added, updated = [], []
+        for uid, client in current.items():
+            previous = self.clients.get(uid)
+            if previous is None:
+                added.append(client)
+                self._sent_report[uid] = client.get("lastReportTime")
+                continue
+            changes = {
+                field: value for field, value in client.items()
+                if field != "lastReportTime" and previous.get(field) != value
+            }
+            if self._report_moved(uid, client.get("lastReportTime")):
+                changes["lastReportTime"] = client.get("lastReportTime")
+                self._sent_report[uid] = client.get("lastReportTime")
+            if changes:
+                updated.append({"clientUid": uid, "changes": changes})
+        removed = [uid for uid in self.clients if uid not in current]
+        for uid in removed:
+            self._sent_report.pop(uid, None)
+        self.clients = current
+
+        if not (added or removed or updated):
+            return None
+        if len(added) + len(removed) + len(updated) > len(current) // 2 + 1:
+            # Most of the roster changed: a snapshot is smaller than the delta
+            return self.snapshot()
+        self.seq += 1
+        return {
+            "type": "delta",
+            "status": "success",
+            "seq": self.seq,
+            "added": added,
+            "removed": removed,
+            "updated": updated,
+            "timestamp": int(time.time() * 1000)
+        }
+
 class ConnectedClients:
     def __init__(self, emit_event: Optional[Callable[[Dict[str, Any]], None]] = None):
         self.directory_helper = DirectoryHelper()
         self.run_command = RunCommand()
         self.emit_event = emit_event
-        self.last_clients_hash = None
-        self.monitoring_task = None
-        self.is_monitoring = False
 
     async def get_auth_file_path(self) -> str:
         """Get the UserAuthenticationFile.xml path."""
@@ -89,17 +185,23 @@ class ConnectedClients:
             logger.error(f"Error retrieving certificate password: {str(e)}")
             return None
 
-    async def execute_curl_command(self) -> str:
-        """Execute curl command to get subscriptions using cert_info and truststore password."""
+    async def execute_curl_command(self, wait_for_ready: bool = True) -> str:
+        """Execute curl command to get subscriptions using cert_info and truststore password.
+
+        Args:
+            wait_for_ready: Check takserver.log for startup first; callers that
+                already know the server is ready can skip it.
+        """
         try:
-            # Wait for the server to be ready before executing the curl command
-            server_ready_response = await self.wait_for_server_ready()
-            server_ready_data = json.loads(server_ready_response)
-            
-            # If server is not ready, return the response directly to the API
-            if server_ready_data.get("status") == "error":
-                logger.error("Server is not ready.")
-                return server_ready_response
+            if wait_for_ready:
+                # Wait for the server to be ready before executing the curl command
+                server_ready_response = await self.wait_for_server_ready()
+                server_ready_data = json.loads(server_ready_response)
+
+                # If server is not ready, return the response directly to the API
+                if server_ready_data.get("status") == "error":
+                    logger.error("Server is not ready.")
+                    return server_ready_response
             
             cert_info = await self.get_admin_user()
             if not cert_info:
@@ -271,109 +373,63 @@ class ConnectedClients:
             "code": "SERVER_TIMEOUT"
         })
 
-    async def start_monitoring(self, queue: asyncio.Queue, check_interval: int = 1):
-        """Start monitoring connected clients and emit events when changes are detected.
-        
-        Args:
-            queue: The asyncio Queue to put events into
-            check_interval: How often to check for changes (in seconds)
-        """
-        if self.is_monitoring:
-            logger.warning("Connected clients monitoring is already running")
-            return
-            
-        self.is_monitoring = True
-        logger.info("Starting connected clients monitoring")
-        
+class ConnectedClientsMonitor:
+    """One connected-clients poll per call, for the probe scheduler.
+
+    Each poll records the roster into the session history and returns the
+    roster snapshot or delta to publish, an error event the first time a
+    distinct error is seen, or None when nothing changed. Readiness comes
+    from the shared web UI check, so a poll is a single curl rather than
+    a log tail plus a curl.
+    """
+
+    def __init__(self, history: Optional[SessionHistory] = None):
+        self.clients = ConnectedClients()
+        self.history = history
+        self.roster = ClientRosterDelta()
+        self.last_error = None
+
+    def _error(self, code: str, message: str) -> Optional[Dict[str, Any]]:
+        # Emit each distinct error once
+        if (code, message) == self.last_error:
+            return None
+        logger.warning(f"Error getting connected clients: {message}")
+        self.last_error = (code, message)
+        return {
+            "type": "error",
+            "status": "error",
+            "message": message,
+            "code": code,
+            "timestamp": int(time.time() * 1000)
+        }
+
+    async def poll(self) -> Optional[Dict[str, Any]]:
         try:
-            while self.is_monitoring:
-                try:
-                    # Get current clients
-                    result = await self.execute_curl_command()
-                    result_data = json.loads(result)
-                    
-                    if result_data.get("status") == "success":
-                        # Calculate a hash of the current clients to detect changes
-                        clients = result_data.get("clients", [])
-                        
-                        # Sort clients by clientUid to ensure consistent comparison
-                        clients.sort(key=lambda x: x.get("clientUid", ""))
-                        
-                        # Create a hash of the clients data
-                        current_hash = hash(json.dumps(clients, sort_keys=True))
-                        
-                        # Only emit an event if the clients have changed
-                        if current_hash != self.last_clients_hash:
-                            logger.info(f"Connected clients changed: {len(clients)} clients")
-                            
-                            # Emit the event with the updated clients
-                            await queue.put({
-                                "event": "connected_clients",
-                                "data": json.dumps({
-                                    "status": "success",
-                                    "clients": clients,
-                                    "timestamp": int(time.time() * 1000)
-                                })
-                            })
-                            
-                            # Update the last hash
-                            self.last_clients_hash = current_hash
-                        else:
-                            logger.debug("No change in connected clients")
-                    else:
-                        # If there was an error, emit it once
-                        if self.last_clients_hash is not None:
-                            logger.warning(f"Error getting connected clients: {result_data.get('message')}")
-                            
-                            # Emit the error event
-                            await queue.put({
-                                "event": "connected_clients",
-                                "data": json.dumps({
-                                    "status": "error",
-                                    "message": result_data.get("message", "Unknown error"),
-                                    "code": result_data.get("code", "UNKNOWN_ERROR"),
-                                    "timestamp": int(time.time() * 1000)
-                                })
-                            })
-                            
-                            # Reset the last hash to ensure we emit the next successful result
-                            self.last_clients_hash = None
-                    
-                    # Send a ping every 30 seconds to keep the connection alive
-                    await queue.put({
-                        "event": "ping",
-                        "data": ""
-                    })
-                    
-                except Exception as e:
-                    logger.error(f"Error in connected clients monitoring: {str(e)}")
-                    
-                    # Emit the error event
-                    await queue.put({
-                        "event": "connected_clients",
-                        "data": json.dumps({
-                            "status": "error",
-                            "message": f"Monitoring error: {str(e)}",
-                            "code": "MONITORING_ERROR",
-                            "timestamp": int(time.time() * 1000)
-                        })
-                    })
-                    
-                    # Reset the last hash to ensure we emit the next successful result
-                    self.last_clients_hash = None
-                
-                # Wait before checking again
-                await asyncio.sleep(check_interval)
-                
-        except asyncio.CancelledError:
-            logger.info("Connected clients monitoring cancelled")
-        finally:
-            self.is_monitoring = False
-            logger.info("Connected clients monitoring stopped")
-    
-    def stop_monitoring(self):
-        """Stop the monitoring task."""
-        self.is_monitoring = False
-        if self.monitoring_task and not self.monitoring_task.done():
-            self.monitoring_task.cancel()
-            logger.info("Connected clients monitoring task cancelled")
\ No newline at end of file
+            if not get_server_state().snapshot()["isRunning"]:
+                # Nobody can be connected to a stopped server
+                if self.history is not None:
+                    await asyncio.to_thread(self.history.close_all)
+                return self._error("SERVER_NOT_RUNNING", "TAK Server is not running")
+            readiness = await get_webui_readiness().check()
+            if readiness.get("status") != "available":
+                return self._error("SERVER_NOT_READY", readiness.get("message") or "TAK Server is not ready")
+
+            result_data = json.loads(await self.clients.execute_curl_command(wait_for_ready=False))
+            if result_data.get("status") != "success":
+                return self._error(result_data.get("code", "UNKNOWN_ERROR"), result_data.get("message", "Unknown error"))
+
+            if self.last_error is not None:
+                # Resume with a full roster after an error
+                self.roster.reset()
+                self.last_error = None
+            clients = result_data.get("clients", [])
+            if self.history is not None:
+                # Appends to the day's log and may seal the previous one
+                await asyncio.to_thread(self.history.observe, clients)
+            event = self.roster.apply(clients)
+            if event is not None:
+                logger.debug(f"Connected clients changed: {len(self.roster.clients)} clients")
+            return event
+        except Exception as e:
+            logger.error(f"Error in connected clients monitoring: {str(e)}")
+            return self._error("MONITORING_ERROR", f"Monitoring error: {str(e)}")
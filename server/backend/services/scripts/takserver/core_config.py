@@ -1,34 +1,48 @@
 import os
-import xml.etree.ElementTree as ET
-import subprocess
-from typing import Dict, Any, Tuple, List
-from datetime import datetime
-import shutil
+from typing import Dict, Any, List
 from backend.config.logging_config import configure_logging
 from backend.services.helpers.directories import DirectoryHelper
+from backend.services.helpers.xml_schema import schema_errors, format_errors
+from backend.services.scripts.takserver.config_backup_store import ConfigBackupStore, INIT_BACKUP_ID, get_config_backup_store
 
 # Configure logging using centralized config
 logger = configure_logging(__name__)
 
+# Backup id standing for the live CoreConfig.xml in diffs
+CURRENT_CONFIG = "current"
+
 class CoreConfigManager:
     def __init__(self):
         self.directory_helper = DirectoryHelper()
-        self.backups_dir = self.directory_helper.get_backups_directory()
             
     def _initialize_paths(self):
         """Initialize paths that require version detection"""
         self.tak_path = self.directory_helper.get_tak_directory()
         self.config_path = os.path.join(self.tak_path, "CoreConfig.xml")
-        self.validate_script = os.path.join(self.tak_path, "validateConfig.sh")
-        self.init_backup_path = os.path.join(self.backups_dir, "init_backup.xml")
+        self.schema_path = os.path.join(self.tak_path, "CoreConfig.xsd")
+
+    @property
+    def backup_store(self) -> ConfigBackupStore:
+        return get_config_backup_store()
+
+    def _read_config_bytes(self) -> bytes:
+        with open(self.config_path, 'rb') as file:
+            return file.read()
+
+    def _replace_config(self, content: str) -> None:
+        """Write content to a temporary file and move it over CoreConfig.xml."""
+        temp_path = f"{self.config_path}.temp"
+        with open(temp_path, 'w') as file:
+            file.write(content)
+        os.replace(temp_path, self.config_path)
 
     def ensure_init_backup(self) -> None:
         """Ensure initial backup exists, create if it doesn't"""
         self._initialize_paths()  # Initialize paths before operation
-        if not os.path.exists(self.init_backup_path):
+        if not self.backup_store.has(INIT_BACKUP_ID):
             if os.path.exists(self.config_path):
                 try:
-                    shutil.copy2(self.config_path, self.init_backup_path)
+                    self.backup_store.create(self._read_config_bytes(), backup_id=INIT_BACKUP_ID)
                 except Exception as e:
                     logger.error(f"Failed to create initial backup: {str(e)}")
                     raise Exception("Failed to create initial backup")
@@ -36,101 +50,76 @@ class CoreConfigManager:
                 logger.error("CoreConfig.xml not found")
                 raise Exception("CoreConfig.xml not found")
             
-    def create_backup(self, name: str = "") -> Dict[str, str]:
-        """Create a new backup with timestamp"""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        backup_name = f"{timestamp}_{name}.xml" if name else f"{timestamp}.xml"
-        backup_path = os.path.join(self.backups_dir, backup_name)
-        
+    def create_backup(self, name: str = "") -> Dict[str, Any]:
+        """Create a new backup of the current configuration"""
+        self._initialize_paths()  # Initialize paths before operation
         try:
-            shutil.copy2(self.config_path, backup_path)
-            return {
-                "id": backup_name,
-                "name": name or "Backup",
-                "timestamp": timestamp,
-                "path": backup_path
-            }
+            return self.backup_store.create(self._read_config_bytes(), name)
         except Exception as e:
             logger.error(f"Failed to create backup: {str(e)}")
             raise Exception(f"Failed to create backup: {str(e)}")
 
-    def get_backups(self) -> List[Dict[str, str]]:
-        """Get list of all backups"""
-        backups = []
-        for filename in os.listdir(self.backups_dir):
-            if filename.endswith('.xml'):
-                file_path = os.path.join(self.backups_dir, filename)
-                is_init = filename == "init_backup.xml"
-                
-                if is_init:
-                    backup_info = {
-                        "id": filename,
-                        "name": "Initial Configuration",
-                        "timestamp": datetime.fromtimestamp(os.path.getctime(file_path)).strftime("%Y%m%d_%H%M%S"),
-                        "path": file_path,
-                        "isInit": True
-                    }
-                else:
-                    # Parse timestamp and name from filename
-                    parts = filename.replace('.xml', '').split('_', 2)
-                    timestamp = f"{parts[0]}_{parts[1]}"
-                    name = parts[2] if len(parts) > 2 else "Backup"
-                    
-                    backup_info = {
-                        "id": filename,
-                        "name": name,
-                        "timestamp": timestamp,
-                        "path": file_path,
-                        "isInit": False
-                    }
-                backups.append(backup_info)
-                
-        # Sort backups by timestamp, but keep init backup first
-        return sorted(backups, key=lambda x: (not x["isInit"], x["timestamp"]))
+    def get_backups(self) -> List[Dict[str, Any]]:
+        """Get list of all backups, initial backup first"""
+        return self.backup_store.list()
+
+    def get_backup_content(self, backup_id: str) -> str:
+        """Get the XML of a backup"""
+        return self.backup_store.read(backup_id).decode('utf-8')
 
     def restore_backup(self, backup_id: str) -> bool:
         """Restore configuration from a backup"""
-        backup_path = os.path.join(self.backups_dir, backup_id)
-        if not os.path.exists(backup_path):
+        if not self.backup_store.has(backup_id):
             logger.error("Backup not found")
             raise Exception("Backup not found")
             
+        self._initialize_paths()  # Initialize paths before operation
         try:
-            # Validate backup file first
-            with open(backup_path, 'r') as file:
-                content = file.read()
+            content = self.get_backup_content(backup_id)
             
             # Validate the backup content
-            is_valid, error_msg = self._validate_with_xmllint(backup_path)
-            if not is_valid:
+            errors = self.check_xml(content)
+            if errors:
+                error_msg = format_errors(errors)
                 logger.error(f"Invalid backup configuration: {error_msg}")
                 raise Exception(f"Invalid backup configuration: {error_msg}")
             
             # Restore the backup
-            shutil.copy2(backup_path, self.config_path)
+            self._replace_config(content)
+            self.backup_store.mark_head(backup_id)
             return True
         except Exception as e:
             logger.error(f"Failed to restore backup: {str(e)}")
             raise Exception(f"Failed to restore backup: {str(e)}")
 
     def delete_backup(self, backup_id: str) -> bool:
-        """Delete a backup file"""
-        if backup_id == "init_backup.xml":
+        """Delete a backup"""
+        if backup_id == INIT_BACKUP_ID:
             logger.error("Cannot delete initial backup")
             raise Exception("Cannot delete initial backup")
             
-        backup_path = os.path.join(self.backups_dir, backup_id)
-        if not os.path.exists(backup_path):
+        if not self.backup_store.has(backup_id):
             logger.error("Backup not found")
             raise Exception("Backup not found")
             
         try:
-            os.remove(backup_path)
+            self.backup_store.delete(backup_id)
             return True
         except Exception as e:
             logger.error(f"Failed to delete backup: {str(e)}")
             raise Exception(f"Failed to delete backup: {str(e)}")
 
+    def diff_backups(self, from_id: str, to_id: str = CURRENT_CONFIG) -> List[Dict[str, Any]]:
+        """Structural XML diff between two backups; CURRENT_CONFIG stands for the live file."""
+        self._initialize_paths()  # Initialize paths before operation
+
+        def content(backup_id: str) -> bytes:
+            if backup_id == CURRENT_CONFIG:
+                return self._read_config_bytes()
+            return self.backup_store.read(backup_id)
+
+        return self.backup_store.diff(content(from_id), content(to_id))
+
     def read_config(self) -> str:
         """Read the CoreConfig.xml file"""
         self._initialize_paths()  # Initialize paths before operation
@@ -151,85 +140,39 @@ class CoreConfigManager:
             # Ensure init backup exists
             self.ensure_init_backup()
             
-            # Validate XML format first
-            ET.fromstring(content)
-            
-            # Write new content to a temporary file for validation
-            temp_path = f"{self.config_path}.temp"
-            with open(temp_path, 'w') as file:
-                file.write(content)
-
-            # Validate using TAK Server's validation script
-            is_valid, error_msg = self._validate_with_xmllint(temp_path)
-            if not is_valid:
-                os.remove(temp_path)
+            # Validate against CoreConfig.xsd before touching the file
+            errors = self.check_xml(content)
+            if errors:
+                error_msg = format_errors(errors)
                 logger.error(f"Invalid TAK Server configuration: {error_msg}")
                 raise Exception(f"Invalid TAK Server configuration: {error_msg}")
 
-            # If validation passes, move temp file to actual location
-            os.rename(temp_path, self.config_path)
+            self._replace_config(content)
+            self.backup_store.mark_live(content.encode('utf-8'))
             return True
 
-        except ET.ParseError as e:
-            logger.error(f"Invalid XML format: {str(e)}")
-            raise Exception(f"Invalid XML format: {str(e)}")
         except Exception as e:
             logger.error(f"Error writing to CoreConfig.xml: {str(e)}")
             raise Exception(f"Error writing to CoreConfig.xml: {str(e)}")
 
-    def validate_xml(self, content: str) -> bool:
-        """Validate XML content using TAK Server's validation script"""
-        try:
-            # First validate basic XML format
-            ET.fromstring(content)
-            
-            # Write content to temporary file for validation
-            temp_path = f"{self.config_path}.temp"
-            with open(temp_path, 'w') as file:
-                file.write(content)
+    def check_xml(self, content: str) -> List[Dict[str, Any]]:
+        """Validate XML content against CoreConfig.xsd in-process.
 
-            # Validate using TAK Server's validation script
-            is_valid, error_msg = self._validate_with_xmllint(temp_path)
-            
-            # Clean up temp file
-            os.remove(temp_path)
-            
-            if not is_valid:
-                logger.error(error_msg)
-                raise Exception(error_msg)
-                
-            return True
-        except ET.ParseError as e:
-            logger.error(f"Invalid XML format: {str(e)}")
-            raise Exception(f"Invalid XML format: {str(e)}")
-        except Exception as e:
-            logger.error(f"Validation error: {str(e)}")
-            raise Exception(str(e))
+        Returns syntax or schema errors with line and column; an empty
+        list means the content is valid. The compiled schema is cached
+        until CoreConfig.xsd changes.
+        """
+        self._initialize_paths()  # Initialize paths before operation
+        if not os.path.exists(self.schema_path):
+            logger.error("CoreConfig.xsd not found")
+            raise Exception("CoreConfig.xsd not found")
+        return schema_errors(content, self.schema_path)
 
-    def _validate_with_xmllint(self, file_path: str) -> Tuple[bool, str]:
-        """Run xmllint validation using TAK Server's validation script"""
-        try:
-            # Make sure the validation script is executable
-            if not os.access(self.validate_script, os.X_OK):
-                os.chmod(self.validate_script, 0o755)
-
-            # Run the validation script
-            result = subprocess.run(
-                [self.validate_script, file_path],
-                capture_output=True,
-                text=True,
-                cwd=self.tak_path
-            )
-
-            # Check if validation was successful
-            if result.returncode == 0:
-                return True, ""
-            else:
-                logger.error(f"Validation failed: {result.stderr.strip()}")
-                return False, result.stderr.strip() or "Validation failed"
-        except subprocess.SubprocessError as e:
-            logger.error(f"Validation script error: {str(e)}")
-            return False, f"Validation script error: {str(e)}"
-        except Exception as e:
-            logger.error(f"Validation error: {str(e)}")
-            return False, f"Validation error: {str(e)}" 
\ No newline at end of file
+    def validate_xml(self, content: str) -> bool:
+        """Validate XML content against CoreConfig.xsd"""
+        errors = self.check_xml(content)
+        if errors:
+            error_msg = format_errors(errors)
+            logger.error(f"Validation error: {error_msg}")
+            raise Exception(error_msg)
+        return True
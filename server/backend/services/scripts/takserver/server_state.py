@@ -0,0 +1,281 @@
+# ============================================================================
+# Imports
+# ============================================================================
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, Any, Optional, Callable, Awaitable
+import docker
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+from backend.services.helpers.directories import DirectoryHelper
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Coalesce bursts (an install writing version.txt and the compose folder, a compose restart)
+STATE_DEBOUNCE_SECONDS = 0.5
+# Wait before reattaching to the Docker event stream after it drops
+DOCKER_RECONNECT_SECONDS = 5
+
+RUNNING_ACTIONS = {'start', 'unpause'}
+STOPPED_ACTIONS = {'die', 'stop', 'pause', 'destroy'}
+
+NOT_INSTALLED = {
+    "isInstalled": False,
+    "isRunning": False,
+    "version": None
+}
+
+# ============================================================================
+# Working Directory Watch
+# ============================================================================
+class _WorkingDirectoryHandler(FileSystemEventHandler):
+    """Forward working directory changes from the watchdog thread to the store."""
+
+    def __init__(self, store: "ServerStateStore"):
+        self.store = store
+
+    def on_any_event(self, event):
+        # The working directory itself deleted or created: its own watch has to be re-armed
+        rewatch = event.is_directory and os.path.normpath(event.src_path) == self.store.working_dir
+        self.store.mark_dirty(files=True, rewatch=rewatch and event.event_type in ('created', 'deleted', 'moved'))
+
+# ============================================================================
+# ServerStateStore Class
+# ============================================================================
+class ServerStateStore:
+    """Single source of truth for TAK Server installed/running/version.
+
+    Installation state is derived from version.txt and the compose folder
+    in the working directory, re-read only when a watchdog event reports a
+    change there. Container state comes from the Docker event stream, so
+    nothing is polled while the server sits idle. Every change is pushed
+    to emit_event; HTTP handlers read the current snapshot.
+    """
+
+    def __init__(self, emit_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None):
+        self.emit_event = emit_event
+        self.directory_helper = DirectoryHelper()
+        self._status: Dict[str, Any] = dict(NOT_INSTALLED)
+        self._published = False
+        self._container_version: Optional[str] = None
+        self._containers: Dict[str, bool] = {}
+        self._dirty_files = False
+        self._dirty_containers = False
+        self._dirty_lock = threading.Lock()
+        self._dirty_event: Optional[asyncio.Event] = None
+        self._changed = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._observer: Optional[Observer] = None
+        self.working_dir = os.path.normpath(self.directory_helper.get_default_working_directory())
+        self._working_watch = None
+        self._rewatch = False
+        self._watch_task: Optional[asyncio.Task] = None
+        self._docker_thread: Optional[threading.Thread] = None
+        self._docker_events = None
+        self._stopping = threading.Event()
+        self._refresh_lock = asyncio.Lock()
+        self._started = False
+
+# ============================================================================
+# Lifecycle
+# ============================================================================
+    async def start(self) -> None:
+        """Load the current state once and start the file and Docker watches."""
+        if self._started:
+            return
+        self._started = True
+        self._loop = asyncio.get_running_loop()
+        self._dirty_event = asyncio.Event()
+        self._stopping.clear()
+        await self.refresh()
+
+        self._observer = Observer()
+        # The parent watch sees the working directory itself removed (uninstall) or recreated
+        self._observer.schedule(_WorkingDirectoryHandler(self), os.path.dirname(self.working_dir), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+        self._watch_working_directory()
+
+        self._docker_thread = threading.Thread(target=self._docker_events_worker, name="docker-events", daemon=True)
+        self._docker_thread.start()
+        self._watch_task = asyncio.create_task(self._watch_loop())
+        logger.info(f"Watching TAK Server state in {self.working_dir}")
+
+    def stop(self) -> None:
+        """Stop the file watch and detach from the Docker event stream."""
+        self._stopping.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer = None
+            self._working_watch = None
+        if self._docker_events is not None:
+            try:
+                self._docker_events.close()
+            except Exception:
+                pass
+        if self._watch_task:
+            self._watch_task.cancel()
+            self._watch_task = None
+        self._started = False
+
+    def _watch_working_directory(self) -> None:
+        """(Re)attach the working directory watch, e.g. after an uninstall removed it."""
+        if not self._observer:
+            return
+        if self._working_watch is not None:
+            try:
+                self._observer.unschedule(self._working_watch)
+            except Exception:
+                pass
+            self._working_watch = None
+        if os.path.isdir(self.working_dir):
+            self._working_watch = self._observer.schedule(_WorkingDirectoryHandler(self), self.working_dir, recursive=False)
+
+    def mark_dirty(self, files: bool = False, containers: bool = False, rewatch: bool = False) -> None:
+        """Schedule a refresh; safe to call from the watchdog and Docker threads."""
+        with self._dirty_lock:
+            self._dirty_files |= files
+            self._dirty_containers |= containers
+            self._rewatch |= rewatch
+        if self._loop and self._dirty_event:
+            self._loop.call_soon_threadsafe(self._dirty_event.set)
+
+    async def _watch_loop(self) -> None:
+        while True:
+            try:
+                await self._dirty_event.wait()
+                await asyncio.sleep(STATE_DEBOUNCE_SECONDS)
+                self._dirty_event.clear()
+                with self._dirty_lock:
+                    files, self._dirty_files = self._dirty_files, False
+                    containers, self._dirty_containers = self._dirty_containers, False
+                    rewatch, self._rewatch = self._rewatch, False
+                if rewatch:
+                    self._watch_working_directory()
+                await self.refresh(files=files, containers=containers)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error refreshing TAK Server state: {str(e)}")
+
+# ============================================================================
+# Docker Events
+# ============================================================================
+    def _docker_events_worker(self) -> None:
+        """Follow container start/stop events; runs in a daemon thread."""
+        while not self._stopping.is_set():
+            try:
+                client = docker.from_env()
+                self._docker_events = client.events(decode=True, filters={'type': 'container'})
+                # Anything may have happened while detached
+                self.mark_dirty(containers=True)
+                for event in self._docker_events:
+                    name = event.get('Actor', {}).get('Attributes', {}).get('name')
+                    action = (event.get('Action') or event.get('status') or '').split(':')[0]
+                    if name in self._containers and action in RUNNING_ACTIONS | STOPPED_ACTIONS:
+                        self._loop.call_soon_threadsafe(self._apply_container_event, name, action in RUNNING_ACTIONS)
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                logger.debug(f"Docker event stream unavailable: {str(e)}")
+            finally:
+                self._docker_events = None
+            self._stopping.wait(DOCKER_RECONNECT_SECONDS)
+
+    def _apply_container_event(self, name: str, running: bool) -> None:
+        if name in self._containers and self._containers[name] != running:
+            self._containers[name] = running
+            self._dirty_event.set()
+
+# ============================================================================
+# State
+# ============================================================================
+    def snapshot(self) -> Dict[str, Any]:
+        """The current status, as returned by /takserver-status."""
+        return dict(self._status)
+
+    async def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the status next changes; False on timeout."""
+        changed = self._changed
+        try:
+            await asyncio.wait_for(changed.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _read_installation(self) -> Dict[str, Any]:
+        version_file = self.directory_helper.get_version_file_path()
+        try:
+            with open(version_file, 'r') as f:
+                version = f.read().strip()
+        except OSError:
+            return dict(NOT_INSTALLED)
+        if not version:
+            return dict(NOT_INSTALLED)
+        compose_dir = os.path.join(self.directory_helper.get_default_working_directory(), f"takserver-docker-{version.lower()}")
+        if not os.path.exists(compose_dir):
+            logger.debug("docker-compose directory not found")
+            return dict(NOT_INSTALLED)
+        return {"isInstalled": True, "isRunning": False, "version": version}
+
+    def _list_containers(self, version: str) -> Dict[str, bool]:
+        """Running state of the two TAK Server containers for a version."""
+        containers = {f"takserver-{version}": False, f"tak-database-{version}": False}
+        try:
+            client = docker.from_env()
+            for container in client.containers.list(all=True, filters={'name': f"-{version}"}):
+                if container.name in containers:
+                    containers[container.name] = container.status == 'running'
+        except Exception as e:
+            logger.error(f"Error checking container status: {str(e)}")
+        return containers
+
+    async def refresh(self, files: bool = True, containers: bool = True) -> Dict[str, Any]:
+        """Re-derive the status from disk and/or Docker and publish it if it changed."""
+        async with self._refresh_lock:
+            status = dict(self._status)
+            if files or not status["isInstalled"]:
+                status = await asyncio.to_thread(self._read_installation)
+
+            version = status["version"].lower() if status["version"] else None
+            if version != self._container_version:
+                self._container_version = version
+                self._containers = {}
+                containers = True
+            if version and containers:
+                self._containers = await asyncio.to_thread(self._list_containers, version)
+
+            status["isRunning"] = bool(version) and bool(self._containers) and all(self._containers.values())
+            await self._publish(status)
+            return self.snapshot()
+
+    async def _publish(self, status: Dict[str, Any]) -> None:
+        if status == self._status and self._published:
+            return
+        self._status = status
+        self._published = True
+        logger.info("Server status changed: %s", status)
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        if self.emit_event:
+            await self.emit_event({
+                "type": "status",
+                "data": dict(status),
+                "timestamp": int(time.time() * 1000)
+            })
+
+
+_server_state: Optional[ServerStateStore] = None
+
+
+def get_server_state(emit_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None) -> ServerStateStore:
+    """Return the shared server state store, attaching emit_event when given."""
+    global _server_state
+    if _server_state is None:
+        _server_state = ServerStateStore()
+    if emit_event is not None:
+        _server_state.emit_event = emit_event
+    return _server_state
@@ -0,0 +1,345 @@
+# ============================================================================
+# Imports
+# ============================================================================
+import os
+import json
+import time
+import bisect
+import threading
+from datetime import datetime, timezone, timedelta
+from typing import Dict, Any, Optional, List, Iterable
+from backend.services.helpers.directories import DirectoryHelper
+from backend.config.logging_config import configure_logging
+
+logger = configure_logging(__name__)
+
+# Column order of a transition row
+HISTORY_COLUMNS = ["ts", "event", "clientUid", "callsign", "groups", "ipAddress"]
+CONNECT = "connect"
+DISCONNECT = "disconnect"
+
+ACTIVE_SUFFIX = ".log"
+SEALED_SUFFIX = ".json"
+CHECKPOINT_FILE = "checkpoint.json"
+RETENTION_DAYS = 90
+# How often the time of the last observation is persisted
+CHECKPOINT_INTERVAL_MS = 60 * 1000
+HOUR_MS = 3600 * 1000
+DAY_MS = 24 * HOUR_MS
+
+# ============================================================================
+# Partition Files
+# ============================================================================
+def _partition_of(ts: int) -> str:
+    """UTC day a timestamp (ms) belongs to."""
+    return datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime("%Y%m%d")
+
+def _seal_rows(rows: List[list]) -> Dict[str, Any]:
+    """Columnar form of a day: delta-encoded times, dictionary-encoded strings."""
+    strings: List[str] = []
+    lookup: Dict[Any, int] = {}
+
+    def encode(value) -> int:
+        if value not in lookup:
+            lookup[value] = len(strings)
+            strings.append(value)
+        return lookup[value]
+
+    ts_deltas, previous = [], 0
+    for row in rows:
+        ts_deltas.append(row[0] - previous)
+        previous = row[0]
+    return {
+        "columns": HISTORY_COLUMNS,
+        "rows": len(rows),
+        "strings": strings,
+        "data": {
+            "ts": ts_deltas,
+            "event": "".join("c" if row[1] == CONNECT else "d" for row in rows),
+            **{
+                column: [encode(row[index]) for row in rows]
+                for index, column in enumerate(HISTORY_COLUMNS) if index >= 2
+            }
+        }
+    }
+
+def _unseal_rows(document: Dict[str, Any]) -> List[list]:
+    data, strings = document["data"], document["strings"]
+    rows, ts = [], 0
+    for i in range(document["rows"]):
+        ts += data["ts"][i]
+        rows.append([ts, CONNECT if data["event"][i] == "c" else DISCONNECT] + [
+            strings[data[column][i]] for column in HISTORY_COLUMNS[2:]
+        ])
+    return rows
+
+# ============================================================================
+# SessionHistory Class
+# ============================================================================
+class SessionHistory:
+    """Connect/disconnect history of TAK clients, keyed by clientUid.
+
+    Transitions are appended to one log file per UTC day. A finished day
+    is rewritten once into a columnar file with dictionary-encoded
+    strings, so a report does not re-read raw logs. All sessions are held
+    in memory as intervals sorted by connect time, with a sorted list of
+    disconnect times; churn queries are bisections over those lists. For
+    range queries each UTC day also gets the list of sessions open at its
+    midnight, built once from the previous day's, so finding sessions that
+    started before a range costs one day of connects rather than a scan
+    of the whole history.
+
+    observe() does file I/O and is meant to run off the event loop; it
+    holds _io_lock while writing and _lock only while updating memory, so
+    queries never wait on the disk.
+    """
+
+    def __init__(self, history_dir: Optional[str] = None, retention_days: int = RETENTION_DAYS):
+        self.history_dir = history_dir or DirectoryHelper.get_session_history_directory()
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._starts: List[int] = []
+        self._sessions: List[Dict[str, Any]] = []
+        self._ends: List[int] = []
+        self._open: Dict[str, Dict[str, Any]] = {}
+        # Day start (ms) -> sessions connected before it and not yet disconnected at it
+        self._open_at_day: Dict[int, List[Dict[str, Any]]] = {}
+        self._active_day: Optional[str] = None
+        self._last_observed: Optional[int] = None
+        self._checkpoint_written = 0
+        self._load()
+
+# ============================================================================
+# Storage
+# ============================================================================
+    def _path(self, day: str, suffix: str) -> str:
+        return os.path.join(self.history_dir, f"{day}{suffix}")
+
+    def _read_partition(self, day: str) -> List[list]:
+        sealed = self._path(day, SEALED_SUFFIX)
+        if os.path.exists(sealed):
+            with open(sealed, "r") as f:
+                return _unseal_rows(json.load(f))
+        rows = []
+        active = self._path(day, ACTIVE_SUFFIX)
+        if os.path.exists(active):
+            with open(active, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # A torn last line from a crash mid-append
+                        logger.warning(f"Skipping malformed session history row in {active}")
+        return rows
+
+    def _seal(self, day: str) -> None:
+        """Rewrite a finished day's append log as a columnar file."""
+        active = self._path(day, ACTIVE_SUFFIX)
+        if not os.path.exists(active):
+            return
+        rows = self._read_partition(day)
+        sealed = self._path(day, SEALED_SUFFIX)
+        temp_path = f"{sealed}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(_seal_rows(rows), f, separators=(",", ":"))
+        os.replace(temp_path, sealed)
+        os.remove(active)
+        logger.debug(f"Sealed session history partition {day} ({len(rows)} rows)")
+
+    def _append(self, rows: List[list], now: int) -> None:
+        """Append one observation's rows to the partition of the observation time."""
+        if not rows:
+            return
+        day = _partition_of(now)
+        if self._active_day and day != self._active_day:
+            self._seal(self._active_day)
+        self._active_day = day
+        with open(self._path(day, ACTIVE_SUFFIX), "a") as f:
+            f.write("".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows))
+
+    def _write_checkpoint(self, now: int) -> None:
+        if now - self._checkpoint_written < CHECKPOINT_INTERVAL_MS:
+            return
+        path = os.path.join(self.history_dir, CHECKPOINT_FILE)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump({"lastObserved": now}, f)
+        os.replace(temp_path, path)
+        self._checkpoint_written = now
+
+    def _load(self) -> None:
+        """Rebuild the interval index from the partitions inside the retention window."""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        today = _partition_of(int(time.time() * 1000))
+        days = set()
+        for name in os.listdir(self.history_dir):
+            day, suffix = os.path.splitext(name)
+            if suffix not in (ACTIVE_SUFFIX, SEALED_SUFFIX) or not day.isdigit():
+                continue
+            if day < cutoff:
+                os.remove(os.path.join(self.history_dir, name))
+                continue
+            days.add(day)
+
+        rows = 0
+        for day in sorted(days):
+            if day != today:
+                self._seal(day)
+            for row in self._read_partition(day):
+                self._index(row)
+                self._last_observed = max(self._last_observed or 0, row[0])
+                rows += 1
+        self._active_day = today if today in days else None
+
+        checkpoint = os.path.join(self.history_dir, CHECKPOINT_FILE)
+        if os.path.exists(checkpoint):
+            try:
+                with open(checkpoint, "r") as f:
+                    self._last_observed = max(self._last_observed or 0, json.load(f).get("lastObserved") or 0)
+            except Exception as e:
+                logger.error(f"Failed to read session history checkpoint: {str(e)}")
+        logger.info(f"Loaded {len(self._sessions)} client sessions ({rows} transitions) from {len(days)} partitions")
+
+# ============================================================================
+# Interval Index
+# ============================================================================
+    def _index(self, row: list) -> None:
+        ts, event, uid, callsign, groups, ip = row
+        if event == CONNECT:
+            if uid in self._open:
+                return
+            session = {
+                "clientUid": uid,
+                "callsign": callsign,
+                "groups": groups,
+                "ipAddress": ip,
+                "connectedAt": ts,
+                "disconnectedAt": None,
+                "disconnectCallsign": None,
+                "disconnectGroups": None,
+                "disconnectIpAddress": None
+            }
+            # Observations arrive in time order, so appending keeps the index sorted
+            position = bisect.bisect_right(self._starts, ts)
+            self._starts.insert(position, ts)
+            self._sessions.insert(position, session)
+            self._open[uid] = session
+        else:
+            session = self._open.pop(uid, None)
+            if session is None:
+                return
+            session["disconnectedAt"] = ts
+            session["disconnectCallsign"] = callsign
+            session["disconnectGroups"] = groups
+            session["disconnectIpAddress"] = ip
+            bisect.insort(self._ends, ts)
+
+    @staticmethod
+    def _connect_row(ts: int, client: Dict[str, Any]) -> list:
+        groups = ",".join(sorted(set(client.get("inGroups") or []) | set(client.get("outGroups") or [])))
+        return [ts, CONNECT, client.get("clientUid"), client.get("callsign"), groups, client.get("ipAddress")]
+
+    def observe(self, clients: Iterable[Dict[str, Any]], now: Optional[int] = None) -> None:
+        """Record who connected or disconnected since the last observation."""
+        now = now or int(time.time() * 1000)
+        current = {client.get("clientUid"): client for client in clients if client.get("clientUid")}
+        # Held across both steps so rows reach the log in the order they were indexed
+        with self._io_lock:
+            with self._lock:
+                # Sessions left open by a previous run ended no later than its last observation
+                gone_at = self._last_observed if self._last_observed and not self._checkpoint_written else now
+                # A departed client is recorded with its last known callsign, groups and IP
+                rows = [
+                    [gone_at, DISCONNECT, uid, session["callsign"], session["groups"], session["ipAddress"]]
+                    for uid, session in self._open.items() if uid not in current
+                ]
+                rows += [self._connect_row(now, client) for uid, client in current.items() if uid not in self._open]
+                for row in rows:
+                    self._index(row)
+                self._last_observed = now
+            self._append(rows, now)
+            self._write_checkpoint(now)
+
+    def close_all(self, now: Optional[int] = None) -> None:
+        """Disconnect every open session, e.g. when the server stops."""
+        self.observe([], now)
+
+# ============================================================================
+# Queries
+# ============================================================================
+    @staticmethod
+    def _open_at(sessions: Iterable[Dict[str, Any]], at: int) -> List[Dict[str, Any]]:
+        return [session for session in sessions if session["disconnectedAt"] is None or session["disconnectedAt"] >= at]
+
+    def _sessions_open_at_day(self, day: int) -> List[Dict[str, Any]]:
+        """Sessions connected before day (a UTC midnight) and still connected at it.
+
+        Built forward from the nearest earlier day already computed. Days
+        up to the last observation are cached: nobody can connect before
+        them any more, and a session that closes later still closed after
+        them.
+        """
+        if day in self._open_at_day:
+            return self._open_at_day[day]
+        if not self._starts or day <= self._starts[0]:
+            return []
+        first_day = self._starts[0] - self._starts[0] % DAY_MS
+        known = [d for d in self._open_at_day if first_day < d < day]
+        current = max(known) if known else first_day
+        carried = self._open_at_day.get(current, [])
+        cacheable_until = self._last_observed or 0
+        # Past the last connect, later days only lose sessions
+        last_day = self._starts[-1] - self._starts[-1] % DAY_MS + DAY_MS
+        if day > last_day:
+            return self._open_at(self._sessions_open_at_day(last_day), day)
+        while current < day:
+            following = current + DAY_MS
+            started = self._sessions[bisect.bisect_left(self._starts, current):bisect.bisect_left(self._starts, following)]
+            carried = self._open_at(carried, following) + self._open_at(started, following)
+            current = following
+            if current <= cacheable_until:
+                self._open_at_day[current] = carried
+        return carried
+
+    def connected_between(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Sessions that overlap [start, end] (ms since epoch)."""
+        with self._lock:
+            day = start - start % DAY_MS
+            # Connected before start and still connected at it
+            earlier = self._open_at(self._sessions_open_at_day(day), start)
+            earlier += self._open_at(self._sessions[bisect.bisect_left(self._starts, day):bisect.bisect_left(self._starts, start)], start)
+            earlier.sort(key=lambda session: session["connectedAt"])
+            # Connected within the range
+            during = self._sessions[bisect.bisect_left(self._starts, start):bisect.bisect_right(self._starts, end)]
+            return [dict(session) for session in earlier + during]
+
+    def churn_per_hour(self, start: int, end: int) -> List[Dict[str, Any]]:
+        """Connects and disconnects per UTC hour in [start, end]."""
+        with self._lock:
+            buckets = []
+            hour = start - start % HOUR_MS
+            while hour <= end:
+                upper = min(hour + HOUR_MS, end + 1)
+                lower = max(hour, start)
+                buckets.append({
+                    "hour": hour,
+                    "connects": bisect.bisect_left(self._starts, upper) - bisect.bisect_left(self._starts, lower),
+                    "disconnects": bisect.bisect_left(self._ends, upper) - bisect.bisect_left(self._ends, lower)
+                })
+                hour += HOUR_MS
+            return buckets
+
+
+_session_history: Optional[SessionHistory] = None
+
+
+def get_session_history() -> SessionHistory:
+    """Return the shared session history."""
+    global _session_history
+    if _session_history is None:
+        _session_history = SessionHistory()
+    return _session_history